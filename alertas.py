@@ -0,0 +1,182 @@
+# alertas.py — Regras de alerta de estoque (declarativas, avaliadas em máscaras) + destinos de notificação
+import json
+import os
+import threading
+import urllib.request
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from giro import LEAD_TIME_DIAS
+from planilha import PASTA_CACHE
+
+# quando: lista de (coluna, operador, valor), todas precisam valer; valor texto = outra coluna
+# badge: (classe css, rótulo) no card • faixa: (cor, ícone, animação) da linha "dias sem vender"
+# notificar=False: só enfeita o card, não vira alerta
+# mensagem: str.format com os apelidos de CAMPOS (nome de coluna com "." vira acesso a atributo no format)
+CAMPOS = {"produto": "PRODUTO", "estoque": "EM ESTOQUE", "dias": "DIAS_SEM_VENDER", "cobertura": "COBERTURA_DIAS",
+          "venda": "Valor Venda Sugerido", "custo": "Media C. UNITARIO"}
+REGRAS = [
+    {"id": "estoque_baixo", "titulo": "Estoque baixo", "nivel": "aviso",
+     "quando": [("EM ESTOQUE", "<=", 3)],
+     "badge": ("low", "⚠️ Baixo"),
+     "mensagem": "{produto}: só {estoque:.0f} em estoque"},
+    {"id": "saindo", "titulo": "Saindo bem", "nivel": "info", "notificar": False,
+     "quando": [("TOTAL_QTD", ">=", 15)],
+     "badge": ("hot", "🔥 Saindo")},
+    {"id": "sem_vendas", "titulo": "Comprado e nunca vendido", "nivel": "info", "notificar": False,
+     "quando": [("TOTAL_QTD", "==", 0), ("ULT_COMPRA", "existe", None), ("ULT_VENDA", "vazio", None)],
+     "badge": ("slow", "❄️ Sem vendas")},
+    {"id": "parado_60", "titulo": "Parado há 60+ dias", "nivel": "critico",
+     "quando": [("EM ESTOQUE", ">", 0), ("DIAS_SEM_VENDER", ">=", 60)],
+     "faixa": ("#ef4444", "⛔", "pulseRed"),
+     "mensagem": "{produto}: {dias:.0f} dias sem vender ({estoque:.0f} em estoque)"},
+    {"id": "parado_30", "titulo": "Parado há 30+ dias", "nivel": "aviso",
+     "quando": [("EM ESTOQUE", ">", 0), ("DIAS_SEM_VENDER", ">=", 30), ("DIAS_SEM_VENDER", "<", 60)],
+     "faixa": ("#f59e0b", "⚠️", "pulseOrange"),
+     "mensagem": "{produto}: {dias:.0f} dias sem vender ({estoque:.0f} em estoque)"},
+    {"id": "parado_7", "titulo": "Parado há 7+ dias", "nivel": "info", "notificar": False,
+     "quando": [("EM ESTOQUE", ">", 0), ("DIAS_SEM_VENDER", ">=", 7), ("DIAS_SEM_VENDER", "<", 30)],
+     "faixa": ("#a78bfa", "🕒", "pulsePurple")},
+    {"id": "cobertura_curta", "titulo": "Cobertura abaixo do prazo de reposição", "nivel": "critico",
+     "quando": [("VEL_DIA", ">", 0), ("COBERTURA_DIAS", "<", LEAD_TIME_DIAS)],
+     "mensagem": "{produto}: cobre {cobertura:.0f} dias, reposição leva " + str(LEAD_TIME_DIAS)},
+    {"id": "margem_negativa", "titulo": "Venda sugerida abaixo do custo", "nivel": "critico",
+     "quando": [("Valor Venda Sugerido", ">", 0), ("Valor Venda Sugerido", "<", "Media C. UNITARIO")],
+     "mensagem": "{produto}: venda sugerida {venda:.2f} < custo médio {custo:.2f}"},
+]
+FAIXA_OK = ("#22c55e", "✅", "pulseGreen")
+NIVEIS = {"critico": "🔴", "aviso": "🟠", "info": "🔵"}
+COLUNAS_ALERTA = ["chave", "regra", "nivel", "titulo", "PRODUTO", "mensagem"]
+
+OPERADORES = {"<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+              "==": np.equal, "!=": np.not_equal}
+
+
+# =============================
+# Avaliação (uma vez por versão dos dados, via grafo de artefatos)
+# =============================
+def tabela_produtos(catalogo, giro, ultima_compra):
+    # uma linha por linha do catálogo (mesmas posições usadas na grade do PESQUISAR)
+    t = catalogo.reset_index(drop=True)
+    if giro is not None and not giro.empty:
+        g = giro.drop_duplicates("PRODUTO").set_index("PRODUTO")
+        for c in ("VEL_DIA", "COBERTURA_DIAS", "DIAS_SEM_VENDER", "ULT_VENDA"):
+            if c in g.columns:
+                t[c] = t["PRODUTO"].map(g[c])
+    if ultima_compra is not None and not ultima_compra.empty:
+        t["ULT_COMPRA"] = t["PRODUTO"].map(ultima_compra.drop_duplicates("PRODUTO").set_index("PRODUTO")["ULT_COMPRA"])
+    return t
+
+def condicao(tabela, coluna, operador, valor):
+    n = len(tabela)
+    if coluna not in tabela.columns:
+        return np.zeros(n, dtype=bool)
+    serie = tabela[coluna]
+    if operador == "existe":
+        return serie.notna().to_numpy()
+    if operador == "vazio":
+        return serie.isna().to_numpy()
+    a = pd.to_numeric(serie, errors="coerce").to_numpy(dtype="float64")
+    if isinstance(valor, str):
+        if valor not in tabela.columns:
+            return np.zeros(n, dtype=bool)
+        b = pd.to_numeric(tabela[valor], errors="coerce").to_numpy(dtype="float64")
+    else:
+        b = float(valor)
+    with np.errstate(invalid="ignore"):
+        return OPERADORES[operador](a, b)   # NaN nunca dispara
+
+def avaliar(tabela, regras=REGRAS):
+    mascaras = {}
+    for regra in regras:
+        m = np.ones(len(tabela), dtype=bool)
+        for coluna, operador, valor in regra["quando"]:
+            m &= condicao(tabela, coluna, operador, valor)
+        mascaras[regra["id"]] = m
+    return pd.DataFrame(mascaras, index=tabela.index)
+
+def mensagem(regra, r):
+    # modelo com erro (campo que não existe, valor vazio num :.0f…) não derruba a carga: cai no título
+    valores = {apelido: r.get(coluna) for apelido, coluna in CAMPOS.items()}
+    try:
+        return regra.get("mensagem", "{produto}").format_map(valores)
+    except (KeyError, IndexError, AttributeError, ValueError, TypeError):
+        return f"{valores['produto']}: {regra['titulo']}"
+
+def listar(tabela, mascaras, regras=REGRAS):
+    # formato longo, só para as regras que notificam; mensagem montada apenas nas linhas disparadas
+    linhas = []
+    for regra in regras:
+        if not regra.get("notificar", True):
+            continue
+        for _, r in tabela.loc[mascaras[regra["id"]].to_numpy()].iterrows():
+            produto = str(r["PRODUTO"])
+            linhas.append({
+                "chave": f"{regra['id']}|{produto}", "regra": regra["id"], "nivel": regra["nivel"],
+                "titulo": regra["titulo"], "PRODUTO": produto,
+                "mensagem": mensagem(regra, r),
+            })
+    return pd.DataFrame(linhas, columns=COLUNAS_ALERTA).drop_duplicates("chave").reset_index(drop=True)
+
+def calcular_alertas(catalogo, giro, ultima_compra):
+    tabela = tabela_produtos(catalogo, giro, ultima_compra)
+    mascaras = avaliar(tabela)
+    return {"mascaras": mascaras, "lista": listar(tabela, mascaras)}
+
+
+# =============================
+# Destinos (sinks) de notificação
+# =============================
+class SinkArquivo:
+    # uma linha JSON por alerta novo
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+
+    def enviar(self, alertas):
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        with self._lock, open(self.caminho, "a", encoding="utf-8") as f:
+            for a in alertas:
+                f.write(json.dumps(a, ensure_ascii=False) + "\n")
+
+class SinkWebhook:
+    # POST JSON {"alertas": [...]} (Slack/Discord/servidor local de teste)
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def enviar(self, alertas):
+        corpo = json.dumps({"alertas": alertas}, ensure_ascii=False).encode("utf-8")
+        req = urllib.request.Request(self.url, data=corpo, headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(req, timeout=self.timeout):
+            pass
+
+def sinks_configurados():
+    # LOJA_ALERTAS_ARQUIVO (padrão .cache/alertas.jsonl; vazio desliga) e LOJA_ALERTAS_WEBHOOK
+    sinks = []
+    arquivo = os.environ.get("LOJA_ALERTAS_ARQUIVO", os.path.join(PASTA_CACHE, "alertas.jsonl"))
+    if arquivo:
+        sinks.append(SinkArquivo(arquivo))
+    if os.environ.get("LOJA_ALERTAS_WEBHOOK"):
+        sinks.append(SinkWebhook(os.environ["LOJA_ALERTAS_WEBHOOK"]))
+    return sinks
+
+def notificar(novos, sinks):
+    # em segundo plano: webhook lento não segura o rerun
+    if novos is None or novos.empty or not sinks:
+        return None
+    quando = datetime.now().isoformat(timespec="seconds")
+    registros = [dict(a, quando=quando) for a in novos.to_dict("records")]
+
+    def enviar():
+        for sink in sinks:
+            try:
+                sink.enviar(registros)
+            except Exception:
+                pass   # destino fora do ar não derruba os outros
+
+    t = threading.Thread(target=enviar, daemon=True)
+    t.start()
+    return t
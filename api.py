@@ -0,0 +1,266 @@
+# api.py — API HTTP somente leitura (JSON) sobre o armazém: KPIs, produtos, Top 5, encalhados e valor do estoque
+#
+#   python api.py                                  # 127.0.0.1:8502, armazém de LOJA_DB
+#   python api.py --host 0.0.0.0 --porta 8600 --log
+#
+#   GET /saude
+#   GET /meses
+#   GET /kpis?mes=2025-11                          (sem mes ou mes=Todos: período inteiro)
+#   GET /produtos?q=fone&ordenar=Mais+vendidos&baixo=1&limite=20&pagina=1
+#   GET /produtos/<nome exato>
+#   GET /top5?limite=5
+#   GET /encalhados?limite=10
+#   GET /estoque/valor
+#
+# Lê o mesmo armazém SQLite que o dashboard grava (consultas de armazem.py, catálogo e índice de
+# busca montados como em artefatos/busca). Cada resposta é serializada uma vez por versão dos dados
+# e guardada com ETag; If-None-Match igual devolve 304 sem corpo.
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+
+import armazem
+from artefatos import catalogo, estoque_tipado, hash_valor
+from busca import ORDENACOES, CacheLRU, filtrar_ordenar, indice_busca, normalizar_termo
+
+INTERVALO_VERSAO = 1.0       # s entre consultas à tabela meta (versão dos dados)
+CAPACIDADE_RESPOSTAS = 2048  # corpos JSON guardados por versão
+LIMITE_PAGINA = 200
+
+
+class ErroApi(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+# =============================
+# Foto dos dados por versão do armazém (trocada inteira quando a versão muda)
+# =============================
+class Foto:
+    def __init__(self, versao, caminho=None):
+        self.versao = versao
+        estoque, vend, ult = armazem.base_catalogo(caminho)
+        self.catalogo = catalogo(estoque_tipado(estoque), vend).reset_index(drop=True)
+        if not ult.empty and "PRODUTO" in self.catalogo.columns:
+            self.catalogo["ULT_COMPRA"] = self.catalogo["PRODUTO"].map(ult.set_index("PRODUTO")["ULT_COMPRA"])
+        self.indice = indice_busca(self.catalogo, ult)
+        nomes = self.catalogo["PRODUTO"].astype(str) if "PRODUTO" in self.catalogo.columns else pd.Series(dtype=object)
+        # nome exato e nome em casefold -> posição (primeira ocorrência)
+        self.por_nome = {}
+        for i, nome in enumerate(nomes):
+            self.por_nome.setdefault(nome, i)
+            self.por_nome.setdefault(nome.casefold(), i)
+        self.respostas = CacheLRU(CAPACIDADE_RESPOSTAS)
+
+class Dados:
+    def __init__(self, caminho=None, intervalo=INTERVALO_VERSAO):
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self.foto = None
+        self.checado = 0.0
+        self._lock = threading.Lock()
+
+    def atual(self):
+        # a versão (hash das abas em meta) é consultada no máximo uma vez por intervalo
+        foto = self.foto
+        if foto is not None and time.monotonic() - self.checado < self.intervalo:
+            return foto
+        with self._lock:
+            if self.foto is not None and time.monotonic() - self.checado < self.intervalo:
+                return self.foto
+            versao = hash_valor(armazem.versao(self.caminho))[:16]
+            if self.foto is None or self.foto.versao != versao:
+                self.foto = Foto(versao, self.caminho)
+            self.checado = time.monotonic()
+            return self.foto
+
+
+# =============================
+# Serialização
+# =============================
+def registros(df):
+    # NaN -> null, datas em ISO
+    if df is None or df.empty:
+        return []
+    return json.loads(df.to_json(orient="records", date_format="iso", force_ascii=False))
+
+def corpo_json(obj):
+    corpo = json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+    return corpo, '"' + hashlib.sha1(corpo).hexdigest()[:20] + '"'
+
+
+# =============================
+# Parâmetros
+# =============================
+def primeiro(qs, nome, padrao=""):
+    return qs.get(nome, [padrao])[0]
+
+def inteiro(qs, nome, padrao, minimo, maximo):
+    try:
+        v = int(primeiro(qs, nome, padrao))
+    except ValueError:
+        raise ErroApi(400, f"parâmetro '{nome}' precisa ser inteiro")
+    return max(minimo, min(maximo, v))
+
+def marcado(qs, nome):
+    return primeiro(qs, nome, "0").strip().lower() in ("1", "true", "sim", "s")
+
+def mes_valido(qs):
+    mes = primeiro(qs, "mes", "Todos").strip() or "Todos"
+    if mes != "Todos":
+        try:
+            mes = str(pd.Period(mes, freq="M"))
+        except ValueError:
+            raise ErroApi(400, "mes deve ser YYYY-MM ou Todos")
+    return mes
+
+
+# =============================
+# Rotas: (parâmetros normalizados a partir da query) -> (função que monta o JSON)
+# =============================
+def rota_saude(foto, dados):
+    return {"status": "ok", "versao": foto.versao, "produtos": len(foto.catalogo)}
+
+def rota_meses(foto, dados):
+    return {"meses": armazem.meses(dados.caminho)}
+
+def rota_kpis(foto, dados, mes):
+    return {"mes": mes, **armazem.kpis(mes, dados.caminho)}
+
+def rota_estoque_valor(foto, dados):
+    k = armazem.kpis("Todos", dados.caminho)
+    return {c: k[c] for c in ("valor_custo_estoque", "valor_venda_estoque", "quantidade_total_itens")}
+
+def rota_top5(foto, dados, limite):
+    return {"itens": registros(armazem.top5(limite, dados.caminho))}
+
+def rota_encalhados(foto, dados, hoje, limite):
+    return {"hoje": hoje, "itens": registros(armazem.encalhados(hoje=hoje, limite=limite, caminho=dados.caminho))}
+
+def rota_busca(foto, dados, termo, filtros, ordenar, limite, pagina):
+    ids = foto.respostas.obter(("ids", termo, filtros, ordenar),
+                               lambda: filtrar_ordenar(foto.catalogo, foto.indice, termo, filtros, ordenar))
+    inicio = (pagina - 1) * limite
+    return {"total": int(len(ids)), "pagina": pagina, "limite": limite, "ordenar": ordenar,
+            "itens": registros(foto.catalogo.iloc[ids[inicio:inicio + limite]])}
+
+def rota_produto(foto, dados, nome):
+    # nomes da planilha às vezes têm espaço sobrando no fim
+    i = next((foto.por_nome[n] for n in (nome, nome.casefold(), nome.strip(), nome.strip().casefold()) if n in foto.por_nome), None)
+    if i is None:
+        raise ErroApi(404, f"produto não encontrado: {nome}")
+    return registros(foto.catalogo.iloc[[i]])[0]
+
+def resolver(caminho, qs):
+    # devolve (chave da resposta, função); a chave só leva parâmetros já normalizados
+    partes = [p for p in caminho.split("/") if p]
+    if partes == ["saude"]:
+        return ("saude",), rota_saude, ()
+    if partes == ["meses"]:
+        return ("meses",), rota_meses, ()
+    if partes == ["kpis"]:
+        mes = mes_valido(qs)
+        return ("kpis", mes), rota_kpis, (mes,)
+    if partes == ["estoque", "valor"]:
+        return ("estoque_valor",), rota_estoque_valor, ()
+    if partes == ["top5"]:
+        limite = inteiro(qs, "limite", 5, 1, LIMITE_PAGINA)
+        return ("top5", limite), rota_top5, (limite,)
+    if partes == ["encalhados"]:
+        hoje = datetime.now().strftime("%Y-%m-%d")
+        limite = inteiro(qs, "limite", 10, 1, LIMITE_PAGINA)
+        return ("encalhados", hoje, limite), rota_encalhados, (hoje, limite)
+    if partes == ["produtos"]:
+        ordenar = primeiro(qs, "ordenar", ORDENACOES[0])
+        if ordenar not in ORDENACOES:
+            raise ErroApi(400, "ordenar deve ser um de: " + ", ".join(ORDENACOES))
+        termo = normalizar_termo(primeiro(qs, "q"))
+        filtros = tuple(marcado(qs, f) for f in ("baixo", "alto", "vendidos", "sem_venda"))
+        limite = inteiro(qs, "limite", 20, 1, LIMITE_PAGINA)
+        pagina = inteiro(qs, "pagina", 1, 1, 10**6)
+        params = (termo, filtros, ordenar, limite, pagina)
+        return ("produtos",) + params, rota_busca, params
+    if partes[:1] == ["produtos"]:
+        # o nome é todo o resto do caminho ("Cabo USB-C/Lightning" pode chegar com a barra crua)
+        nome = unquote(caminho.lstrip("/")[len("produtos/"):])
+        return ("produto", nome), rota_produto, (nome,)
+    raise ErroApi(404, f"rota desconhecida: {caminho}")
+
+
+# =============================
+# Servidor
+# =============================
+class Manipulador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive: o PDV e o bot reaproveitam a conexão
+    disable_nagle_algorithm = True  # cabeçalho e corpo saem em writes separados: sem isso, +40 ms de ACK atrasado
+    dados = None
+    registrar = False
+
+    def log_message(self, formato, *args):
+        if self.registrar:
+            super().log_message(formato, *args)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            foto = self.dados.atual()
+            chave, rota, params = resolver(url.path, parse_qs(url.query))
+            status = 200
+            corpo, etag = foto.respostas.obter(chave, lambda: corpo_json(rota(foto, self.dados, *params)))
+        except ErroApi as e:
+            status = e.status
+            corpo, etag = corpo_json({"erro": str(e)})
+        except Exception as e:
+            status = 500
+            corpo, etag = corpo_json({"erro": f"{type(e).__name__}: {e}"})
+        if status == 200 and etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        if status == 200:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(corpo)
+
+def criar_servidor(host="127.0.0.1", porta=8502, caminho=None, registrar=False):
+    manipulador = type("ManipuladorLoja", (Manipulador,), {"dados": Dados(caminho), "registrar": registrar})
+    servidor = ThreadingHTTPServer((host, porta), manipulador)
+    servidor.daemon_threads = True
+    return servidor
+
+
+def main():
+    ap = argparse.ArgumentParser(description="API JSON somente leitura sobre o armazém da loja.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--porta", type=int, default=8502)
+    ap.add_argument("--db", default=None, help="arquivo SQLite (padrão: LOJA_DB / .cache/loja.sqlite)")
+    ap.add_argument("--log", action="store_true", help="uma linha por requisição no stderr")
+    args = ap.parse_args()
+
+    servidor = criar_servidor(args.host, args.porta, args.db, args.log)
+    print(f"API em http://{args.host}:{servidor.server_address[1]}/ • armazém {args.db or armazem.ARQUIVO_DB}", file=sys.stderr)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
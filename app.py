@@ -1,43 +1,26 @@
 # app.py — Dashboard Loja Importados (Roxo Minimalista) — Dark Theme Mobile
+import os
+from datetime import datetime, timedelta
+from types import MappingProxyType
+
 import streamlit as st
+from perfil import Perfil, modo_perfil
 
-# ================================================
-# 🔄 BOTÃO FLUTUANTE PREMIUM (ROXO NEON + ANIMAÇÃO)
-# ================================================
-st.markdown("""
-<style>
-
-.refresh-btn {
-    position: fixed;
-    bottom: 26px;
-    right: 26px;
-    z-index: 9999;
-
-    background: linear-gradient(135deg, #a855f7, #7c3aed);
-    color: white;
-    border-radius: 50%;
-    width: 68px;
-    height: 68px;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-
-    font-size: 32px;
-    cursor: pointer;
-
-    box-shadow: 0 0 25px rgba(168, 85, 247, 0.65);
-    transition: transform 0.25s ease, box-shadow 0.25s ease;
-}
+# perfil opcional do rerun inteiro (?perfil=amostra|cprofile na URL ou LOJA_PERFIL=...)
+# rerun anterior interrompido (st.stop/st.rerun/exceção) não chegou ao parar() do fim: encerra aqui
+_perfil_anterior = st.session_state.pop("_perfil", None)
+if _perfil_anterior is not None:
+    _perfil_anterior.parar()
+_perfil = Perfil.iniciar_se(modo_perfil(st.query_params.get("perfil")), raiz=__file__)
+if _perfil is not None:
+    st.session_state["_perfil"] = _perfil
 
-.refresh-btn:hover {
-    transform: scale(1.15) rotate(190deg);
-    box-shadow: 0 0 40px rgba(168, 85, 247, 0.95);
-}
+st.set_page_config(page_title="Loja Importados – Dashboard", layout="wide", initial_sidebar_state="collapsed")
 
-.refresh-btn:active {
-    transform: scale(0.92);
-}
-</style>
+# ================================================
+# 🔄 BOTÃO FLUTUANTE PREMIUM (ROXO NEON + ANIMAÇÃO) — estilo no estilo.css
+# ================================================
+BOTAO_REFRESH_HTML = """
 
 <div class="refresh-btn" onclick="triggerRefresh()">
     🔄
@@ -48,267 +31,28 @@ function triggerRefresh() {
     window.parent.postMessage({isStreamlitMessage: true, type: "streamlit:setComponentValue", value: "refresh_now"}, "*");
 }
 </script>
-""", unsafe_allow_html=True)
-
-# Listener
-if "refresh_now" in st.session_state and st.session_state["refresh_now"]:
-    st.session_state["refresh_now"] = False
-    st.rerun()
-
-
-import pandas as pd
-import plotly.express as px
-import re
-from datetime import datetime, timedelta
-import requests
-from io import BytesIO
-
-st.set_page_config(page_title="Loja Importados – Dashboard", layout="wide", initial_sidebar_state="collapsed")
-
-
-
-# --- Cálculo GLOBAL de Produtos Encalhados (limpo) ---
-def compute_encalhados_global(dfs, limit=10):
-    import pandas as _pd
-    estoque = dfs.get("ESTOQUE", _pd.DataFrame()).copy()
-    vendas = dfs.get("VENDAS", _pd.DataFrame()).copy()
-    compras = dfs.get("COMPRAS", _pd.DataFrame()).copy()
-
-    if not compras.empty:
-        compras["DATA"] = _pd.to_datetime(compras["DATA"], errors="coerce")
-    if not vendas.empty:
-        vendas["DATA"] = _pd.to_datetime(vendas["DATA"], errors="coerce")
-
-    if estoque.empty:
-        return [], _pd.DataFrame()
-
-    # última venda
-    if not vendas.empty and "PRODUTO" in vendas.columns:
-        last_sale = vendas.groupby("PRODUTO")["DATA"].max().reset_index().rename(columns={"DATA": "ULT_VENDA"})
-    else:
-        last_sale = _pd.DataFrame(columns=["PRODUTO", "ULT_VENDA"])
-
-    # última compra
-    if not compras.empty and "PRODUTO" in compras.columns:
-        last_buy = compras.groupby("PRODUTO")["DATA"].max().reset_index().rename(columns={"DATA": "ULT_COMPRA"})
-    else:
-        last_buy = _pd.DataFrame(columns=["PRODUTO", "ULT_COMPRA"])
-
-    enc = estoque.merge(last_sale, how="left", on="PRODUTO").merge(last_buy, how="left", on="PRODUTO")
-    enc = enc[enc.get("EM ESTOQUE", 0) > 0].copy()
-
-    today = _pd.Timestamp.now()
-    enc["DIAS_PARADO"] = enc.apply(
-        lambda row: (today - row["ULT_VENDA"]).days if _pd.notna(row["ULT_VENDA"])
-        else (today - row["ULT_COMPRA"]).days if _pd.notna(row["ULT_COMPRA"])
-        else 9999, axis=1
-    )
-
-    enc_sorted = enc.sort_values("DIAS_PARADO", ascending=False).head(limit)
-    return enc_sorted["PRODUTO"].tolist(), enc_sorted
-
-
-# --- Cálculo GLOBAL Top 5 mais vendidos ---
-def compute_top5_global(dfs):
-    import pandas as _pd
-    vendas = dfs.get("VENDAS", _pd.DataFrame()).copy()
-    if vendas.empty or "PRODUTO" not in vendas.columns:
-        return []
-    if "QTD" not in vendas.columns:
-        for c in vendas.columns:
-            if c.upper() in ("QTD","QUANTIDADE","QTY"):
-                vendas["QTD"] = vendas[c]
-                break
-    vendas["QTD"] = vendas.get("QTD", 0).fillna(0).astype(int)
-    top = vendas.groupby("PRODUTO")["QTD"].sum().sort_values(ascending=False).head(5)
-    return list(top.index)
-
-
-# --- Cálculo GLOBAL Top 5 mais vendidos ---
-def compute_top5_global(dfs):
-    import pandas as _pd
-    vendas = dfs.get("VENDAS", _pd.DataFrame()).copy()
-    if vendas.empty or "PRODUTO" not in vendas.columns:
-        return []
-    if "QTD" not in vendas.columns:
-        # try to infer a quantity column
-        for c in vendas.columns:
-            if c.upper() in ("QTD","QUANTIDADE","QTY"):
-                vendas["QTD"] = vendas[c]
-                break
-    vendas["QTD"] = vendas.get("QTD", 0).fillna(0).astype(int)
-    top = vendas.groupby("PRODUTO")["QTD"].sum().sort_values(ascending=False).head(5)
-    return top.index.tolist()
-
-    _top5_list_global = []
-    import pandas as _pd
-    estoque_all = dfs.get("ESTOQUE", _pd.DataFrame()).copy()
-    vendas_all = dfs.get("VENDAS", _pd.DataFrame()).copy()
-    compras_all = dfs.get("COMPRAS", _pd.DataFrame()).copy()
-
-    if not compras_all.empty:
-        compras_all["DATA"] = _pd.to_datetime(compras_all["DATA"], errors="coerce")
-    if not vendas_all.empty:
-        vendas_all["DATA"] = _pd.to_datetime(vendas_all["DATA"], errors="coerce")
-
-    if estoque_all.empty:
-        return [], _pd.DataFrame()
-
-    # last sale
-    if not vendas_all.empty and "PRODUTO" in vendas_all.columns:
-        last_sale = vendas_all.groupby("PRODUTO")["DATA"].max().reset_index().rename(columns={"DATA":"ULT_VENDA"})
-    else:
-        last_sale = _pd.DataFrame(columns=["PRODUTO","ULT_VENDA"])
-    # last buy
-    if not compras_all.empty and "PRODUTO" in compras_all.columns:
-        last_buy = compras_all.groupby("PRODUTO")["DATA"].max().reset_index().rename(columns={"DATA":"ULT_COMPRA"})
-    else:
-        last_buy = _pd.DataFrame(columns=["PRODUTO","ULT_COMPRA"])
-
-    enc = estoque_all.merge(last_sale, how="left", on="PRODUTO").merge(last_buy, how="left", on="PRODUTO")
-    enc = enc[enc.get("EM ESTOQUE", 0) > 0].copy()
-
-    today = _pd.Timestamp.now()
-
-    def calc_days(row):
-        if _pd.notna(row.get("ULT_VENDA")):
-            return (today - row["ULT_VENDA"]).days
-        if _pd.notna(row.get("ULT_COMPRA")):
-            return (today - row["ULT_COMPRA"]).days
-        return 9999
-
-    enc["DIAS_PARADO"] = enc.apply(calc_days, axis=1)
-    enc_sorted = enc.sort_values("DIAS_PARADO", ascending=False).head(limit)
-    enc_list = enc_sorted["PRODUTO"].tolist()
-    return enc_list, enc_sorted
-
-# compute once and show alert
-try:
-    _enc_list_global, _enc_df_global = compute_encalhados_global(dfs, limit=10)
-    if len(_enc_list_global) > 0:
-        st.warning(f"❄️ Produtos encalhados detectados: {len(_enc_list_global)} — vá em VENDAS > Produtos encalhados para ver a lista.")
-except Exception:
-    _enc_list_global, _enc_df_global = [], None
-
-
-URL_PLANILHA = "https://docs.google.com/spreadsheets/d/1TsRjsfw1TVfeEWBBvhKvsGQ5YUCktn2b/export?format=xlsx"
+"""
 
 # =============================
-# CSS - Dark Theme (tabelas incluídas)
+# CSS - Dark Theme (tabelas incluídas): arquivo estático lido uma vez por processo
 # =============================
-st.markdown("""
-<style>
-:root{
-  --bg:#0b0b0b;
-  --accent:#8b5cf6;
-  --accent-2:#a78bfa;
-  --muted:#bdbdbd;
-  --card-bg:#141414;
-  --table-head:#161616;
-  --table-row:#121212;
-}
-body, .stApp { background: var(--bg) !important; color:#f0f0f0 !important; font-family: Inter, system-ui, -apple-system, 'Segoe UI', Roboto, 'Helvetica Neue', Arial; }
-.topbar { display:flex; align-items:center; gap:12px; margin-bottom:8px; }
-.logo-wrap { width:44px; height:44px; display:flex; align-items:center; justify-content:center; border-radius:10px; background: linear-gradient(135deg,var(--accent),var(--accent-2)); box-shadow: 0 6px 18px rgba(0,0,0,0.5); }
-.logo-wrap svg { width:26px; height:26px; }
-.title { font-size:20px; font-weight:800; color:var(--accent-2); margin:0; line-height:1; }
-.subtitle { margin:0; font-size:12px; color:var(--muted); margin-top:2px; }
-.kpi-row { display:flex; gap:10px; align-items:center; margin-bottom:20px; flex-wrap:wrap; }
-.kpi { background:var(--card-bg); border-radius:10px; padding:10px 14px; box-shadow:0 6px 16px rgba(0,0,0,0.45); border-left:6px solid var(--accent); min-width:160px; display:flex; flex-direction:column; justify-content:center; color:#f0f0f0; }
-.kpi h3 { margin:0; font-size:12px; color:var(--accent-2); font-weight:800; letter-spacing:0.2px; }
-.kpi .value { margin-top:6px; font-size:20px; font-weight:900; color:#f0f0f0; white-space:nowrap; }
-.stTabs { margin-top: 20px !important; }
-.stTabs button { background:#1e1e1e !important; border:1px solid #333 !important; border-radius:12px !important; padding:8px 14px !important; margin-right:8px !important; margin-bottom:8px !important; font-weight:700 !important; color:var(--accent-2) !important; box-shadow:0 3px 10px rgba(0,0,0,0.2) !important; }
-
-/* Streamlit dataframes - dark */
-.stDataFrame, .element-container, .stTable {
-  color: #f0f0f0 !important;
-  font-size:13px !important;
-}
-.stDataFrame thead th {
-  background: linear-gradient(90deg, rgba(139,92,246,0.16), rgba(167,139,250,0.06)) !important;
-  color: #f0f0f0 !important;
-  font-weight:700 !important;
-  border-bottom: 1px solid #2a2a2a !important;
-}
-.stDataFrame tbody tr td {
-  background: transparent !important;
-  border-bottom: 1px solid rgba(255,255,255,0.03) !important;
-  color: #eaeaea !important;
-}
+@st.cache_resource
+def estilo_estatico():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "estilo.css"), encoding="utf-8") as f:
+        return "<style>\n" + f.read() + "\n</style>"
 
-/* Smaller scrollbars in dark */
-div[data-testid="stHorizontalBlock"] > div > section::-webkit-scrollbar { height:8px; }
-div[data-testid="stVerticalBlock"] > div > section::-webkit-scrollbar { width:8px; }
+st.markdown(estilo_estatico() + BOTAO_REFRESH_HTML, unsafe_allow_html=True)
 
-/* Make container cards darker */
-.element-container { background: transparent !important; }
-
-/* responsive tweaks */
-@media (max-width: 600px) {
-  .title { font-size:16px; }
-  .kpi .value { font-size:16px; }
-}
-
-.badge{
-    padding:4px 8px;
-    border-radius:8px;
-    font-size:12px;
-    display:inline-block;
-    font-weight:700;
-    letter-spacing:0.3px;
-    animation:fadeIn 0.6s ease;
-}
-
-.low{
-    background:rgba(255,0,0,0.25);
-    color:#ffb4b4;
-    box-shadow:0 0 8px rgba(255,0,0,0.35);
-}
-.hot{
-    background:rgba(150,0,255,0.25);
-    color:#e0b0ff;
-    box-shadow:0 0 8px rgba(150,0,255,0.35);
-}
-.zero{
-    background:rgba(255,255,255,0.1);
-    color:#fff;
-    box-shadow:0 0 8px rgba(255,255,255,0.15);
-}
-
-@keyframes fadeIn{
-    from{opacity:0; transform:translateY(4px);}
-    to{opacity:1; transform:translateY(0);}
-}
-
-.avatar{
-    width:64px;height:64px;border-radius:14px;
-    background:linear-gradient(120deg,#a78bfa,#ec4899,#06b6d4);
-    background-size:300% 300%;
-    animation:neonMove 6s ease infinite;
-    display:flex;align-items:center;justify-content:center;
-    color:white;font-weight:900;font-size:22px;
-    box-shadow:0 4px 14px rgba(0,0,0,0.5);
-}
-@keyframes neonMove{
-    0%{background-position:0% 50%;}
-    50%{background-position:100% 50%;}
-    100%{background-position:0% 50%;}
-}
-
-@keyframes pulseRed{0%{opacity:.7;}50%{opacity:1;}100%{opacity:.7;}}
-@keyframes pulseOrange{0%{opacity:.7;}50%{opacity:1;}100%{opacity:.7;}}
-@keyframes pulsePurple{0%{opacity:.7;}50%{opacity:1;}100%{opacity:.7;}}
-@keyframes pulseGreen{0%{opacity:.7;}50%{opacity:1;}100%{opacity:.7;}}
+# Listener
+if "refresh_now" in st.session_state and st.session_state["refresh_now"]:
+    st.session_state["refresh_now"] = False
+    st.rerun()
 
-.card-ecom:hover{
-    transform:translateY(-2px);
-    transition:.2s;
-    box-shadow:0 8px 20px rgba(0,0,0,0.35);
-}
+# na partida só o armazém (SQLite): plotly/planilha/exportação entram depois dos KPIs
+import armazem
 
-</style>
-""", unsafe_allow_html=True)
+# LOJA_URL_PLANILHA aponta para outra exportação (ex.: servidor local do teste de carga)
+URL_PLANILHA = os.environ.get("LOJA_URL_PLANILHA", "https://docs.google.com/spreadsheets/d/1TsRjsfw1TVfeEWBBvhKvsGQ5YUCktn2b/export?format=xlsx")
 
 # =============================
 # Top Bar
@@ -332,68 +76,8 @@ st.markdown("""
 # =============================
 # Helpers
 # =============================
-def parse_money_value(x):
-    try:
-        if pd.isna(x): return float("nan")
-    except: pass
-    s=str(x).strip()
-    if s in ("","nan","none","-"): return float("nan")
-    s=re.sub(r"[^\d\.,\-]","",s)
-    if "." in s and "," in s: s=s.replace(".","").replace(",",".")
-    else:
-        if "," in s and "." not in s: s=s.replace(",",".")
-        if s.count(".")>1: s=s.replace(".","")
-    s=re.sub(r"[^\d\.\-]","",s)
-    try: return float(s)
-    except: return float("nan")
-
-def parse_money_series(serie):
-    return serie.astype(str).map(parse_money_value).astype("float64") if serie is not None else pd.Series(dtype="float64")
-
-def parse_int_series(serie):
-    def to_int(x):
-        try:
-            if pd.isna(x): return pd.NA
-        except: pass
-        s=re.sub(r"[^\d\-]","",str(x))
-        if s in ("","-","nan"): return pd.NA
-        try: return int(float(s))
-        except: return pd.NA
-    return serie.map(to_int).astype("Int64")
-
-def formatar_reais_sem_centavos(v):
-    try: v=float(v)
-    except: return "R$ 0"
-    return f"R$ {f'{v:,.0f}'.replace(',', '.')}" 
-
-def formatar_reais_com_centavos(v):
-    try: v=float(v)
-    except: return "R$ 0,00"
-    s = f"{v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    return f"R$ {s}"
-
-def carregar_xlsx_from_url(url):
-    r=requests.get(url,timeout=25)
-    r.raise_for_status()
-    return pd.ExcelFile(BytesIO(r.content))
-
-def detectar_linha_cabecalho(df_raw,keywords):
-    for i in range(min(len(df_raw),12)):
-        linha=" ".join(df_raw.iloc[i].astype(str).str.upper().tolist())
-        if any(kw.upper() in linha for kw in keywords): return i
-    return None
-
-def limpar_aba_raw(df_raw,nome):
-    busca={"ESTOQUE":["PRODUTO","EM ESTOQUE"],"VENDAS":["DATA","PRODUTO"],"COMPRAS":["DATA","CUSTO"]}.get(nome,["PRODUTO"])
-    linha=detectar_linha_cabecalho(df_raw,busca)
-    if linha is None: return None
-    df_tmp=df_raw.copy()
-    df_tmp.columns=df_tmp.iloc[linha]
-    df=df_tmp.iloc[linha+1:].copy()
-    df.columns=[str(c).strip() for c in df.columns]
-    df=df.drop(columns=[c for c in df.columns if str(c).lower() in ("nan","none","")],errors="ignore")
-    df=df.loc[:,~df.isna().all()]
-    return df.reset_index(drop=True)
+# moeda: versão por valor (KPIs) e vetorizada por Series (tabelas/cards/rótulos), mesma saída
+from moeda import formatar_reais_sem_centavos, formatar_reais_serie
 
 # =============================
 # Preparar tabela vendas
@@ -404,7 +88,7 @@ def preparar_tabela_vendas(df):
 
     d = df.copy()
 
-    # DATA
+    # DATA (já datetime64) só vira texto aqui: a ordem já vem da tabela paginada (frame tipado)
     if "DATA" in d.columns:
         d["DATA"] = d["DATA"].dt.strftime("%d/%m/%Y")
 
@@ -431,22 +115,17 @@ def preparar_tabela_vendas(df):
     except:
         pass
 
-    d["VALOR VENDA"] = d["VALOR VENDA"].map(formatar_reais_com_centavos)
-    d["VALOR TOTAL"] = d["VALOR TOTAL"].map(formatar_reais_com_centavos)
-    d["MEDIA CUSTO UNITARIO"] = d["MEDIA CUSTO UNITARIO"].map(formatar_reais_com_centavos)
-    d["LUCRO UNITARIO"] = d["LUCRO UNITARIO"].map(formatar_reais_com_centavos)
+    d["VALOR VENDA"] = formatar_reais_serie(d["VALOR VENDA"])
+    d["VALOR TOTAL"] = formatar_reais_serie(d["VALOR TOTAL"])
+    d["MEDIA CUSTO UNITARIO"] = formatar_reais_serie(d["MEDIA CUSTO UNITARIO"])
+    d["LUCRO UNITARIO"] = formatar_reais_serie(d["LUCRO UNITARIO"])
+    for c in ("CUSTO MEDIO DATA", "CUSTO FIFO"):
+        if c in d.columns:
+            d[c] = formatar_reais_serie(d[c])
 
     # Remover colunas lixo
     d = d.loc[:, ~d.columns.astype(str).str.contains("^Unnamed|MES_ANO")]
 
-    # Ordenação: mais recente primeiro
-    if "DATA" in d.columns:
-        try:
-            d["_sort"] = pd.to_datetime(d["DATA"], format="%d/%m/%Y", errors="coerce")
-            d = d.sort_values("_sort", ascending=False).drop(columns=["_sort"])
-        except:
-            pass
-
     
     # ensure raw values for lucro calculation
     try:
@@ -454,10 +133,8 @@ def preparar_tabela_vendas(df):
     except:
         d["VALOR VENDA_RAW"] = pd.to_numeric(df["VALOR VENDA"], errors="coerce").fillna(0)
 
-    try:
-        d["CUSTO_RAW"] = parse_money_series(df["MEDIA CUSTO UNITARIO"]).fillna(0)
-    except:
-        d["CUSTO_RAW"] = pd.to_numeric(df["MEDIA CUSTO UNITARIO"], errors="coerce").fillna(0)
+    # custo vigente na data da venda (LOJA_CUSTEIO); sem custeio cai no MEDIA CUSTO UNITARIO da planilha
+    d["CUSTO_RAW"] = custo_vigente(df).fillna(0)
 
     # calculate lucro total
     try:
@@ -467,13 +144,74 @@ def preparar_tabela_vendas(df):
 
     # format lucro total
     try:
-        d["LUCRO TOTAL"] = d["LUCRO TOTAL"].map(formatar_reais_com_centavos)
+        d["LUCRO TOTAL"] = formatar_reais_serie(d["LUCRO TOTAL"])
     except:
         d["LUCRO TOTAL"] = d["LUCRO TOTAL"].apply(lambda x: f"R$ {x:,.2f}".replace(',', 'X').replace('.', ',').replace('X','.') )
 
     return d
 
 
+def botoes_exportacao(df, nome_base, key, linhas=None, **kw):
+    # exporta o frame tipado (filtro + ordenação atuais); o arquivo só é gerado no clique
+    # df pode ser uma função que monta o frame (aí `linhas` informa o tamanho)
+    formatos = ["CSV (;)"] + (["Parquet"] if PARQUET_DISPONIVEL else [])
+    col_fmt, col_btn = st.columns([1,3])
+    with col_fmt:
+        formato = st.selectbox("Formato", formatos, key=f"{key}_fmt", label_visibility="collapsed")
+    ext, mime = ("parquet", "application/vnd.apache.parquet") if formato == "Parquet" else ("csv", "text/csv")
+    with col_btn:
+        st.download_button(
+            f"⬇️ Exportar {len(df) if linhas is None else linhas} linhas",
+            data=exportador(df, ext, **kw),
+            file_name=f"{nome_base}_{datetime.now().strftime('%Y%m%d_%H%M')}.{ext}",
+            mime=mime,
+            key=f"{key}_dl",
+            on_click="ignore",
+        )
+
+def tabela_paginada(df, key, versao, formatar=None, colunas=None, rotulos=None, ordenar_por=None, crescente=True):
+    # filtro/ordenação no frame tipado (posições num LRU por consulta); só a página visível é formatada e enviada
+    colunas = [c for c in (colunas or df.columns) if c in df.columns]
+    rotulos = rotulos or {}
+    nome = lambda c: rotulos.get(c, c)
+    c1, c2, c3, c4, c5 = st.columns([2,3,2,1,1])
+    with c1:
+        coluna_filtro = st.selectbox("Filtrar coluna", colunas, format_func=nome, key=f"{key}_fcol")
+    with c2:
+        texto = st.text_input("Filtro", key=f"{key}_ftxt", placeholder="texto, ou > 10, <= 01/11/2025 …")
+    with c3:
+        ordenar_por = st.selectbox("Ordenar por", colunas, index=colunas.index(ordenar_por) if ordenar_por in colunas else 0,
+                                   format_func=nome, key=f"{key}_ord")
+    with c4:
+        crescente = st.toggle("Crescente", value=crescente, key=f"{key}_cresc")
+    with c5:
+        por_pagina = st.selectbox("Linhas/pg", POR_PAGINA, index=1, key=f"{key}_pp")
+
+    texto = " ".join(texto.split())
+    try:
+        pos = obter_cache_tabelas().obter((key, versao, coluna_filtro, texto, ordenar_por, crescente),
+                                          lambda: posicoes(df, coluna_filtro, texto, ordenar_por, crescente))
+    except ValueError:
+        st.caption(f"⚠️ Filtro não serve para a coluna {nome(coluna_filtro)}: ignorado")
+        pos = obter_cache_tabelas().obter((key, versao, None, "", ordenar_por, crescente),
+                                          lambda: posicoes(df, None, "", ordenar_por, crescente))
+
+    # página fora do intervalo (filtro novo encolheu o resultado): volta para a última
+    chave_pagina = f"{key}_pagina"
+    _, paginas, _, _ = janela(len(pos), 1, por_pagina)
+    if st.session_state.get(chave_pagina, 1) > paginas:
+        st.session_state[chave_pagina] = paginas
+    c1, c2 = st.columns([1,4])
+    with c1:
+        pagina = st.number_input("Página", min_value=1, max_value=paginas, step=1, key=chave_pagina)
+    pagina, paginas, inicio, fim = janela(len(pos), pagina, por_pagina)
+    with c2:
+        st.markdown(f"<div style='padding-top:34px;color:#9ca3af;font-size:13px;'>Linhas {inicio + 1 if fim else 0}–{fim} de {len(pos)} • página {pagina} de {paginas}</div>", unsafe_allow_html=True)
+
+    parte = df.iloc[pos[inicio:fim]]
+    st.dataframe(formatar(parte) if formatar else parte, use_container_width=True)
+    return pos
+
 def plotly_dark_config(fig):
     fig.update_layout(
         plot_bgcolor="#0b0b0b",
@@ -487,168 +225,207 @@ def plotly_dark_config(fig):
     return fig
 
 # =============================
-# Carregar planilha
+# Filtro mês (aplica somente em VENDAS/COMPRAS) + KPIs
+# Saem do armazém (SQLite): com dados de uma carga anterior, aparecem antes do download da planilha
 # =============================
-try:
-    xls = carregar_xlsx_from_url(URL_PLANILHA)
-except Exception as e:
-    st.error("Erro ao abrir a planilha.")
-    st.exception(e)
-    st.stop()
-
-abas_all = xls.sheet_names
-dfs = {}
-for aba in ["ESTOQUE","VENDAS","COMPRAS"]:
-    if aba in abas_all:
-        raw = pd.read_excel(URL_PLANILHA, sheet_name=aba, header=None)
-        cleaned = limpar_aba_raw(raw, aba)
-        if cleaned is not None:
-            dfs[aba] = cleaned
-# === Inicializações corretas ===
-try:
-    _top5_list_global = compute_top5_global(dfs)
-except Exception:
-    _top5_list_global = []
-
-try:
-    _enc_list_global, _enc_df_global = compute_encalhados_global(dfs, limit=10)
-except Exception:
-    _enc_list_global, _enc_df_global = [], None
+def desenhar_filtro_mes(mes=None):
+    # mes: escolha já feita neste rerun (redesenho depois de uma carga que trouxe meses novos)
+    meses = ["Todos"] + armazem.meses()
+    padrao = mes if mes in meses else datetime.now().strftime("%Y-%m")
+    index_padrao = meses.index(padrao) if padrao in meses else 0
+    # sem key: a identidade do widget vem das opções, então o redesenho com meses novos não colide
+    return meses, slot_filtro.selectbox("Filtrar por mês (YYYY-MM):", meses, index=index_padrao)
+
+def desenhar_kpis(mes):
+    indicadores = armazem.kpis(mes)
+    slot_kpis.markdown(f"""
+    <div class="kpi-row">
+      <div class="kpi"><h3>💵 Total Vendido</h3><div class="value">{formatar_reais_sem_centavos(indicadores["total_vendido"])}</div></div>
+      <div class="kpi" style="border-left-color:#34d399;"><h3>🧾 Total Lucro</h3><div class="value">{formatar_reais_sem_centavos(indicadores["total_lucro"])}</div></div>
+      <div class="kpi" style="border-left-color:#f59e0b;"><h3>💸 Total Compras</h3><div class="value">{formatar_reais_sem_centavos(indicadores["total_compras"])}</div></div>
+      <div class="kpi" style="border-left-color:#8b5cf6;"><h3>📦 Valor Custo Estoque</h3><div class="value">{formatar_reais_sem_centavos(indicadores["valor_custo_estoque"])}</div></div>
+      <div class="kpi" style="border-left-color:#a78bfa;"><h3>🏷️ Valor Venda Estoque</h3><div class="value">{formatar_reais_sem_centavos(indicadores["valor_venda_estoque"])}</div></div>
+      <div class="kpi" style="border-left-color:#6ee7b7;"><h3>🔢 Qtde Total Itens</h3><div class="value">{indicadores["quantidade_total_itens"]}</div></div>
+    </div>
+    """, unsafe_allow_html=True)
+    return indicadores
 
+col_filter, col_kpis = st.columns([1,3])
+slot_filtro, slot_kpis = col_filter.empty(), col_kpis.empty()
+armazem_quente = any(armazem.versao().values())
+if armazem_quente:
+    meses_filtro, mes_selecionado = desenhar_filtro_mes()
+    indicadores = desenhar_kpis(mes_selecionado)
 
+# =============================
+# Demais módulos do app
+# =============================
+import pandas as pd
+from tendencia import (DIAS_SPARKLINE, SEMANAS_CALENDARIO, calendario_svg, completar_dias, pontos_para_largura,
+                       reduzir_serie, sparkline_svg)
+from planilha import carregar_xlsx_from_url, carregar_abas, carregar_csv, fontes_csv, parse_money_series
+from artefatos import montar_grafo, entradas_grafo, vendas_semanais, hash_valor
+from custo import CUSTEIO, NOMES_CUSTEIO, custo_vigente
+from giro import LEAD_TIME_DIAS, DIAS_SEGURANCA
+from exportacao import exportador, PARQUET_DISPONIVEL
+from voo_unico import VooUnico
+import compartilhado
+from busca import CacheLRU, ORDENACOES, chave_consulta, filtrar_ordenar
+from paginacao import POR_PAGINA, janela, posicoes
+from alertas import REGRAS, FAIXA_OK, NIVEIS, COLUNAS_ALERTA, notificar, sinks_configurados
+from miniaturas import miniaturas, src_miniatura, versao_imagens
+from vitrine import ALTURA as ALTURA_VITRINE, VITRINE_PADRAO, html_vitrine, montar_dados
 
 # =============================
-# Conversores e ajustes
+# Carregar planilha + derivar (single-flight: sessões simultâneas dividem uma carga só)
 # =============================
-# Normaliza colunas de estoque
-if "ESTOQUE" in dfs:
-    df_e = dfs["ESTOQUE"].copy()
-    if "Media C. UNITARIO" in df_e.columns:
-        df_e["Media C. UNITARIO"] = parse_money_series(df_e["Media C. UNITARIO"]).fillna(0)
-    else:
-        for alt in ["MEDIA C. UNITARIO","MEDIA CUSTO UNITARIO","MEDIA C. UNIT"]:
-            if alt in df_e.columns:
-                df_e["Media C. UNITARIO"] = parse_money_series(df_e[alt]).fillna(0)
-                break
-    if "Valor Venda Sugerido" in df_e.columns:
-        df_e["Valor Venda Sugerido"] = parse_money_series(df_e["Valor Venda Sugerido"]).fillna(0)
-    else:
-        for alt in ["VALOR VENDA SUGERIDO","VALOR VENDA","VALOR_VENDA"]:
-            if alt in df_e.columns:
-                df_e["Valor Venda Sugerido"] = parse_money_series(df_e[alt]).fillna(0)
-                break
-    if "EM ESTOQUE" in df_e.columns:
-        df_e["EM ESTOQUE"] = parse_int_series(df_e["EM ESTOQUE"]).fillna(0).astype(int)
+@st.cache_resource(max_entries=6)
+def carregar_csv_cache(caminho, aba, versao):
+    return carregar_csv(caminho, aba)
+
+@st.cache_resource
+def obter_grafo():
+    return montar_grafo()
+
+@st.cache_resource
+def obter_voo():
+    return VooUnico()
+
+@st.cache_resource
+def obter_cache_busca():
+    return CacheLRU()
+
+@st.cache_resource
+def obter_cache_tabelas():
+    # posições de VENDAS/ESTOQUE por (tabela, versão, filtro, ordenação): trocar de página não refaz o sort
+    return CacheLRU(64)
+
+def carregar_e_derivar(fontes):
+    fonte = (URL_PLANILHA, fontes)
+    grafo = obter_grafo()
+    with compartilhado.trava(fonte):
+        # outro processo acabou de carregar (LOJA_COMPARTILHADO_VALIDADE): mapeia a foto dele em vez de baixar
+        foto = compartilhado.recente(fonte)
+        if foto is not None:
+            dfs, art_mapeados = compartilhado.abrir(foto)
+            dfs = dict(dfs)
+            grafo.semear({n: (foto["chaves"][n], v) for n, v in art_mapeados.items()})
+            art = grafo.atualizar(entradas_grafo(dfs))
+        else:
+            xls = carregar_xlsx_from_url(URL_PLANILHA)
+            # cabeçalho/colunas vêm do esquema em cache (.cache/esquema.json) quando ainda válido
+            dfs = carregar_abas(xls, URL_PLANILHA)
+            # exportações CSV do PDV (LOJA_CSV_<ABA>) substituem a aba correspondente; lidas em blocos
+            for aba_csv, caminho_csv in fontes:
+                info_csv = os.stat(caminho_csv)
+                df_csv = carregar_csv_cache(caminho_csv, aba_csv, (info_csv.st_mtime_ns, info_csv.st_size))
+                if df_csv is not None:
+                    dfs[aba_csv] = df_csv
+            # artefatos memoizados pelo hash das abas de que dependem
+            art = grafo.atualizar(entradas_grafo(dfs))
+            # foto compartilhada (Arrow mapeado): abas e artefatos grandes passam a ser os do mmap,
+            # os frames recém-lidos são descartados; outros processos mapeiam os mesmos arquivos
+            foto = compartilhado.publicar(fonte, dfs, {n: art[n] for n in compartilhado.ARTEFATOS if n in art},
+                                          {**grafo.hashes, **grafo.chaves})
+            if foto is not None:
+                abas_mapeadas, art_mapeados = compartilhado.abrir(foto)
+                dfs.update(abas_mapeadas)
+                grafo.semear({n: (foto["chaves"][n], v) for n, v in art_mapeados.items()})
+                art = {**art, **art_mapeados}
+    hashes, recalculados = dict(grafo.hashes), list(grafo.recalculados)
+    # armazém local (SQLite): grava só as abas que mudaram; KPIs/Top 5/encalhados/mês saem em SQL
+    # VENDAS vai ao armazém já custeada (custo na data): muda também quando COMPRAS muda
+    dfs_armazem, hashes_armazem = dict(dfs), dict(hashes)
+    if "VENDAS" in dfs:
+        dfs_armazem["VENDAS"] = art["vendas_custeadas"]
+        hashes_armazem["VENDAS"] = hash_valor((hashes.get("VENDAS"), hashes.get("COMPRAS"), "custeada"))
+    gravadas = armazem.gravar(dfs_armazem, hashes_armazem)
+    # alertas: regras reavaliadas só quando os dados mudam; dedupe contra os ativos da carga anterior
+    if "alertas" in recalculados:
+        alertas_novos = armazem.registrar_alertas(art["alertas"]["lista"])
+        notificar(alertas_novos, sinks_configurados())
     else:
-        for alt in ["ESTOQUE","QTD","QUANTIDADE"]:
-            if alt in df_e.columns:
-                df_e["EM ESTOQUE"] = parse_int_series(df_e[alt]).fillna(0).astype(int)
-                break
-    if "PRODUTO" not in df_e.columns:
-        for c in df_e.columns:
-            if df_e[c].dtype == object:
-                df_e = df_e.rename(columns={c:"PRODUTO"})
-                break
-    dfs["ESTOQUE"] = df_e
+        alertas_novos = pd.DataFrame(columns=COLUNAS_ALERTA)
+    # resultado compartilhado entre sessões: somente leitura
+    return MappingProxyType({
+        "dfs": MappingProxyType(dfs), "art": MappingProxyType(art),
+        "hashes": hashes, "recalculados": recalculados, "gravadas": gravadas,
+        "alertas_novos": alertas_novos,
+    })
+
+fontes_carga = tuple(sorted(fontes_csv().items()))
+try:
+    carga, carga_compartilhada = obter_voo().fazer(("carga", URL_PLANILHA, fontes_carga), lambda: carregar_e_derivar(fontes_carga))
+except Exception as e:
+    st.error("Erro ao carregar a planilha.")
+    st.exception(e)
+    st.stop()
 
-# VENDAS
-if "VENDAS" in dfs:
-    df_v = dfs["VENDAS"].copy()
-    df_v.columns = [str(c).strip() for c in df_v.columns]
-    money_map={"VALOR VENDA":["VALOR VENDA","VALOR_VENDA","VALORVENDA"],
-               "VALOR TOTAL":["VALOR TOTAL","VALOR_TOTAL","VALORTOTAL"],
-               "MEDIA CUSTO UNITARIO":["MEDIA C. UNITARIO","MEDIA CUSTO UNITARIO","MEDIA CUSTO"],
-               "LUCRO UNITARIO":["LUCRO UNITARIO","LUCRO_UNITARIO"]}
-    for target,vars_ in money_map.items():
-        for v in vars_:
-            if v in df_v.columns:
-                df_v[target]=parse_money_series(df_v[v])
-                break
-    qtd_cols=[c for c in df_v.columns if c.upper() in ("QTD","QUANTIDADE","QTY")]
-    if qtd_cols: df_v["QTD"]=parse_int_series(df_v[qtd_cols[0]]).fillna(0).astype(int)
-    if "DATA" in df_v.columns:
-        df_v["DATA"]=pd.to_datetime(df_v["DATA"],errors="coerce")
-        df_v["MES_ANO"]=df_v["DATA"].dt.strftime("%Y-%m")
-    else:
-        df_v["MES_ANO"]=pd.NA
-    if "VALOR TOTAL" not in df_v and "VALOR VENDA" in df_v:
-        df_v["VALOR TOTAL"]=df_v["VALOR VENDA"].fillna(0)*df_v.get("QTD",0).fillna(0)
-    if "LUCRO UNITARIO" not in df_v and ("VALOR VENDA" in df_v and "MEDIA CUSTO UNITARIO" in df_v):
-        df_v["LUCRO UNITARIO"]=df_v["VALOR VENDA"].fillna(0)-df_v["MEDIA CUSTO UNITARIO"].fillna(0)
-    # garantir ordenação: mais recente primeiro
-    if "DATA" in df_v.columns:
-        df_v = df_v.sort_values("DATA", ascending=False).reset_index(drop=True)
-    dfs["VENDAS"] = df_v
-
-# COMPRAS
-if "COMPRAS" in dfs:
-    df_c = dfs["COMPRAS"].copy()
-    qcols=[c for c in df_c.columns if "QUANT" in c.upper()]
-    if qcols: df_c["QUANTIDADE"]=parse_int_series(df_c[qcols[0]]).fillna(0).astype(int)
-    ccols=[c for c in df_c.columns if any(k in c.upper() for k in ("CUSTO","UNIT"))]
-    if ccols: df_c["CUSTO UNITÁRIO"]=parse_money_series(df_c[ccols[0]]).fillna(0)
-    df_c["CUSTO TOTAL (RECALC)"]=df_c.get("QUANTIDADE",0)*df_c.get("CUSTO UNITÁRIO",0)
-    if "DATA" in df_c.columns:
-        df_c["DATA"]=pd.to_datetime(df_c["DATA"],errors="coerce")
-        df_c["MES_ANO"]=df_c["DATA"].dt.strftime("%Y-%m")
-    dfs["COMPRAS"]=df_c
+dfs = carga["dfs"]
+art = carga["art"]
+abas_gravadas = carga["gravadas"]
+if not armazem_quente:
+    meses_filtro, mes_selecionado = desenhar_filtro_mes()
+    indicadores = desenhar_kpis(mes_selecionado)
+elif abas_gravadas:
+    # a carga trouxe dados novos: filtro (se entrou mês novo) e KPIs redesenhados no mesmo lugar
+    if ["Todos"] + armazem.meses() != meses_filtro:
+        meses_filtro, mes_selecionado = desenhar_filtro_mes(mes_selecionado)
+    indicadores = desenhar_kpis(mes_selecionado)
+versao_armazem = armazem.versao()
 
 # =============================
-# INDICADORES DE ESTOQUE (NÃO AFETADOS PELO FILTRO)
+# ALERTAS (avaliados na carga; aqui só exibição)
 # =============================
-estoque_df = dfs.get("ESTOQUE", pd.DataFrame()).copy()
-if not estoque_df.empty:
-    estoque_df["Media C. UNITARIO"] = estoque_df.get("Media C. UNITARIO", 0).fillna(0).astype(float)
-    estoque_df["Valor Venda Sugerido"] = estoque_df.get("Valor Venda Sugerido", 0).fillna(0).astype(float)
-    estoque_df["EM ESTOQUE"] = estoque_df.get("EM ESTOQUE", 0).fillna(0).astype(int)
-    valor_custo_estoque = (estoque_df["Media C. UNITARIO"] * estoque_df["EM ESTOQUE"]).sum()
-    valor_venda_estoque = (estoque_df["Valor Venda Sugerido"] * estoque_df["EM ESTOQUE"]).sum()
-    quantidade_total_itens = int(estoque_df["EM ESTOQUE"].sum())
-else:
-    valor_custo_estoque = 0
-    valor_venda_estoque = 0
-    quantidade_total_itens = 0
+alertas_novos = carga["alertas_novos"]
+if len(alertas_novos):
+    resumo_novos = " • ".join(f"{NIVEIS.get(n, '')} {m}" for n, m in zip(alertas_novos["nivel"].head(5), alertas_novos["mensagem"].head(5)))
+    st.warning(f"🔔 {len(alertas_novos)} alerta(s) novo(s): {resumo_novos}" + (" …" if len(alertas_novos) > 5 else ""))
+lista_alertas = art["alertas"]["lista"]
+if not lista_alertas.empty:
+    with st.expander(f"🔔 Alertas ativos ({len(lista_alertas)})", expanded=False):
+        alertas_exib = lista_alertas.assign(nivel=lista_alertas["nivel"].map(NIVEIS))
+        st.dataframe(alertas_exib[["nivel", "titulo", "mensagem"]], use_container_width=True, hide_index=True)
+
+@st.cache_data(max_entries=64)
+def vendas_diarias_cache(produto, versao):
+    return armazem.vendas_diarias(produto)
+
+@st.cache_data(max_entries=64)
+def serie_estoque_cache(produto, versao):
+    return armazem.serie_estoque(produto)
+
+@st.cache_data(max_entries=8)
+def destaques_cache(versao, hoje):
+    # Top 5 + encalhados: mudam só com os dados (ou com o dia, que conta "dias parado")
+    return armazem.top5(), armazem.encalhados(hoje=hoje, limite=10)
+
+@st.cache_resource(max_entries=4)
+def vitrine_cache(chave, _art, top5, encalhados, embutida):
+    # HTML do PESQUISAR no navegador: um por (versão das abas, dia, pasta de fotos, destaques)
+    fotos = {}
+    if not embutida and "PRODUTO" in _art["catalogo"].columns:
+        fotos = {p: src_miniatura(n) for p, n in miniaturas(_art["catalogo"]["PRODUTO"].astype(str)).items()}
+    matriz = _art["matriz_vendas"]
+    nomes = _art["catalogo"]["PRODUTO"] if "PRODUTO" in _art["catalogo"].columns else [None] * len(_art["catalogo"])
+    sparklines = matriz.bloco(matriz.linhas(nomes), *matriz.periodo(chave[1], DIAS_SPARKLINE))
+    dados = montar_dados(_art["catalogo"], _art["giro"], _art["ultima_compra"], _art["alertas"]["mascaras"],
+                         top5, encalhados, fotos, sparklines)
+    return html_vitrine(dados, embutida)
 
 # =============================
-# Filtro mês (aplica somente em VENDAS/COMPRAS)
+# INDICADORES DE ESTOQUE (NÃO AFETADOS PELO FILTRO)
 # =============================
-meses = ["Todos"]
-if "VENDAS" in dfs:
-    meses += sorted(dfs["VENDAS"]["MES_ANO"].dropna().unique().tolist(), reverse=True)
-mes_atual = datetime.now().strftime("%Y-%m")
-index_padrao = meses.index(mes_atual) if mes_atual in meses else 0
-col_filter, col_kpis = st.columns([1,3])
-with col_filter:
-    mes_selecionado = st.selectbox("Filtrar por mês (YYYY-MM):", meses, index=index_padrao)
-
-def filtrar_mes_df(df,mes):
-    if df is None or df.empty: return df
-    if mes=="Todos": return df
-    return df[df["MES_ANO"]==mes].copy() if "MES_ANO" in df.columns else df
+estoque_df = art["estoque_tipado"]
 
-vendas_filtradas = filtrar_mes_df(dfs.get("VENDAS", pd.DataFrame()), mes_selecionado)
-if not vendas_filtradas.empty and "DATA" in vendas_filtradas.columns:
-    vendas_filtradas = vendas_filtradas.sort_values("DATA", ascending=False).reset_index(drop=True)
-compras_filtradas = filtrar_mes_df(dfs.get("COMPRAS", pd.DataFrame()), mes_selecionado)
+# período vem do armazém (faixa de DATA indexada), já em ordem: mais recente primeiro
+vendas_filtradas = armazem.vendas_periodo(mes_selecionado)
 
-# =============================
-# KPIs (vendas + estoque ao lado)
-# =============================
-total_vendido = vendas_filtradas.get("VALOR TOTAL", pd.Series()).fillna(0).sum()
-total_lucro = (vendas_filtradas.get("LUCRO UNITARIO", 0).fillna(0) * vendas_filtradas.get("QTD", 0).fillna(0)).sum()
-total_compras = compras_filtradas.get("CUSTO TOTAL (RECALC)", pd.Series()).fillna(0).sum()
+_top5_df_global, _enc_df_global = destaques_cache(tuple(versao_armazem.values()), datetime.now().strftime("%Y-%m-%d"))
+_top5_list_global = _top5_df_global["PRODUTO"].tolist()
+_enc_list_global = _enc_df_global["PRODUTO"].tolist() if not _enc_df_global.empty else []
 
-with col_kpis:
-    st.markdown(f"""
-    <div class="kpi-row">
-      <div class="kpi"><h3>💵 Total Vendido</h3><div class="value">{formatar_reais_sem_centavos(total_vendido)}</div></div>
-      <div class="kpi" style="border-left-color:#34d399;"><h3>🧾 Total Lucro</h3><div class="value">{formatar_reais_sem_centavos(total_lucro)}</div></div>
-      <div class="kpi" style="border-left-color:#f59e0b;"><h3>💸 Total Compras</h3><div class="value">{formatar_reais_sem_centavos(total_compras)}</div></div>
-      <div class="kpi" style="border-left-color:#8b5cf6;"><h3>📦 Valor Custo Estoque</h3><div class="value">{formatar_reais_sem_centavos(valor_custo_estoque)}</div></div>
-      <div class="kpi" style="border-left-color:#a78bfa;"><h3>🏷️ Valor Venda Estoque</h3><div class="value">{formatar_reais_sem_centavos(valor_venda_estoque)}</div></div>
-      <div class="kpi" style="border-left-color:#6ee7b7;"><h3>🔢 Qtde Total Itens</h3><div class="value">{quantidade_total_itens}</div></div>
-    </div>
-    """, unsafe_allow_html=True)
+import plotly.express as px   # gráficos só daqui para baixo
 
 # =============================
 # TABS (AGORA APENAS 3)
@@ -665,9 +442,8 @@ with tabs[0]:
     if vendas_filtradas.empty:
         st.info("Sem dados de vendas.")
     else:
+        # DATA chega tipada do armazém (já em ordem: mais recente primeiro)
         df_sem=vendas_filtradas.copy()
-        df_sem["DATA"]=pd.to_datetime(df_sem["DATA"], errors="coerce")
-        df_sem=df_sem.sort_values("DATA", ascending=False).reset_index(drop=True)
         df_sem["SEMANA"]=df_sem["DATA"].dt.isocalendar().week
         df_sem["ANO"]=df_sem["DATA"].dt.year
 
@@ -679,11 +455,11 @@ with tabs[0]:
             except:
                 return "N/A"
 
-        df_sem_group=df_sem.groupby(["ANO","SEMANA"], dropna=False)["VALOR TOTAL"].sum().reset_index()
+        df_sem_group=vendas_semanais(df_sem)
 
         if not df_sem_group.empty:
             df_sem_group["INTERVALO"]=df_sem_group.apply(semana_intervalo, axis=1)
-            df_sem_group["LABEL"]=df_sem_group["VALOR TOTAL"].apply(formatar_reais_com_centavos)
+            df_sem_group["LABEL"]=formatar_reais_serie(df_sem_group["VALOR TOTAL"])
 
             st.markdown("### 📊 Faturamento Semanal do Mês")
 
@@ -700,22 +476,29 @@ with tabs[0]:
             st.plotly_chart(fig_sem, use_container_width=True, config=dict(displayModeBar=False))
 
         st.markdown("### 📄 Tabela de Vendas (mais recentes primeiro)")
-        tabela_vendas_exib=preparar_tabela_vendas(df_sem)
-        st.dataframe(tabela_vendas_exib, use_container_width=True)
+        # lucro tipado (ordenável/filtrável); a formatação fica só para a página visível
+        df_sem["LUCRO TOTAL"]=(pd.to_numeric(df_sem.get("VALOR VENDA", 0), errors="coerce").fillna(0) - custo_vigente(df_sem).fillna(0)) * df_sem.get("QTD", 0)
+        colunas_vendas=[c for c in df_sem.columns if not str(c).startswith("Unnamed") and c != "MES_ANO"]
+        pos_vendas=tabela_paginada(
+            df_sem, "tab_vendas", (tuple(versao_armazem.values()), mes_selecionado),
+            formatar=preparar_tabela_vendas, colunas=colunas_vendas, ordenar_por="DATA", crescente=False,
+        )
+        botoes_exportacao(
+            lambda: df_sem.iloc[pos_vendas], f"vendas_{mes_selecionado}", "exp_vendas", linhas=len(pos_vendas),
+            colunas=colunas_vendas,
+        )
 
         # ---------------------
         # TOP 5 PRODUTOS BOMBANDO (por quantidade vendida)
         # ---------------------
         try:
-            vendas_all = dfs.get("VENDAS", pd.DataFrame()).copy()
-            if not vendas_all.empty and "PRODUTO" in vendas_all.columns:
-                top5 = vendas_all.groupby("PRODUTO")["QTD"].sum().reset_index().sort_values("QTD", ascending=False).head(5)
-                if not top5.empty:
-                    st.markdown("""### 🔥 Top 5 — Produtos bombando (por unidades vendidas)
+            top5 = _top5_df_global.copy()
+            if not top5.empty:
+                st.markdown("""### 🔥 Top 5 — Produtos bombando (por unidades vendidas)
 """, unsafe_allow_html=True)
-                    # render as small table
-                    top5["QTD"] = top5["QTD"].astype(int)
-                    st.table(top5.rename(columns={"PRODUTO":"Produto","QTD":"Unidades"}))
+                # render as small table
+                top5["QTD"] = top5["QTD"].astype(int)
+                st.table(top5.rename(columns={"PRODUTO":"Produto","QTD":"Unidades"}))
         except Exception:
             pass
 
@@ -724,66 +507,50 @@ with tabs[0]:
         # PRODUTOS ENCALHADOS — lógica profissional (global)
         # ---------------------
         try:
-            estoque_all = dfs.get("ESTOQUE", pd.DataFrame()).copy()
-            vendas_all = dfs.get("VENDAS", pd.DataFrame()).copy()
-            compras_all = dfs.get("COMPRAS", pd.DataFrame()).copy()
-
-            if not compras_all.empty:
-                compras_all["DATA"] = pd.to_datetime(compras_all["DATA"], errors="coerce")
-
-            if not vendas_all.empty:
-                vendas_all["DATA"] = pd.to_datetime(vendas_all["DATA"], errors="coerce")
-
-            if not estoque_all.empty:
-                estoque_all = estoque_all.copy()
-
-                # Última venda
-                if not vendas_all.empty:
-                    last_sale = vendas_all.groupby("PRODUTO")["DATA"].max().reset_index().rename(columns={"DATA":"ULT_VENDA"})
-                else:
-                    last_sale = pd.DataFrame(columns=["PRODUTO","ULT_VENDA"])
-
-                # Última compra
-                if not compras_all.empty:
-                    last_buy = compras_all.groupby("PRODUTO")["DATA"].max().reset_index().rename(columns={"DATA":"ULT_COMPRA"})
-                else:
-                    last_buy = pd.DataFrame(columns=["PRODUTO","ULT_COMPRA"])
-
-                enc = estoque_all.merge(last_sale, how="left", on="PRODUTO").merge(last_buy, how="left", on="PRODUTO")
-
-                # Consider only products with estoque > 0
-                enc = enc[enc["EM ESTOQUE"] > 0].copy()
-
-                # Calculate days stopped
-                today = pd.Timestamp.now()
-
-                def calc_days(row):
-                    if pd.notna(row["ULT_VENDA"]):
-                        return (today - row["ULT_VENDA"]).days
-                    if pd.notna(row["ULT_COMPRA"]):
-                        return (today - row["ULT_COMPRA"]).days
-                    return 9999  # extreme case
-
-                enc["DIAS_PARADO"] = enc.apply(calc_days, axis=1)
-
-                enc = enc.sort_values("DIAS_PARADO", ascending=False).head(10)
-
-                if not enc.empty:
-                    enc_display = enc[["PRODUTO","EM ESTOQUE","ULT_VENDA","ULT_COMPRA","DIAS_PARADO"]].copy()
-                    enc_display["ULT_VENDA"] = enc_display["ULT_VENDA"].dt.strftime("%d/%m/%Y").fillna("—")
-                    enc_display["ULT_COMPRA"] = enc_display["ULT_COMPRA"].dt.strftime("%d/%m/%Y").fillna("—")
-
-                    st.markdown("### ❄️ Produtos encalhados (global) — baseado em última venda / compra e estoque atual")
-                    st.table(enc_display.rename(columns={
-                        "PRODUTO":"Produto",
-                        "EM ESTOQUE":"Estoque",
-                        "ULT_VENDA":"Última venda",
-                        "ULT_COMPRA":"Última compra",
-                        "DIAS_PARADO":"Dias parado"
-                    }))
+            enc = _enc_df_global
+            if enc is not None and not enc.empty:
+                enc_display = enc[["PRODUTO","EM ESTOQUE","ULT_VENDA","ULT_COMPRA","DIAS_PARADO"]].copy()
+                enc_display["ULT_VENDA"] = enc_display["ULT_VENDA"].dt.strftime("%d/%m/%Y").fillna("—")
+                enc_display["ULT_COMPRA"] = enc_display["ULT_COMPRA"].dt.strftime("%d/%m/%Y").fillna("—")
+
+                st.markdown("### ❄️ Produtos encalhados (global) — baseado em última venda / compra e estoque atual")
+                st.table(enc_display.rename(columns={
+                    "PRODUTO":"Produto",
+                    "EM ESTOQUE":"Estoque",
+                    "ULT_VENDA":"Última venda",
+                    "ULT_COMPRA":"Última compra",
+                    "DIAS_PARADO":"Dias parado"
+                }))
         except Exception as e:
             st.write("Erro encalhados:", e)
 
+    # ---------------------
+    # TENDÊNCIA DIÁRIA — histórico completo (reduzido com LTTB)
+    # ---------------------
+    produtos_hist = armazem.produtos_vendidos()
+    if produtos_hist:
+        st.markdown("### 📈 Tendência diária — histórico completo")
+        col_t1, col_t2 = st.columns([3,1])
+        with col_t1:
+            produto_tend = st.selectbox("Produto", ["Todos"] + produtos_hist, index=0, key="tend_produto")
+        with col_t2:
+            metrica_tend = st.selectbox("Métrica", ["Faturamento", "Unidades"], index=0, key="tend_metrica")
+
+        diario = completar_dias(vendas_diarias_cache(None if produto_tend == "Todos" else produto_tend, versao_armazem["VENDAS"]))
+        if diario.empty:
+            st.info("Sem vendas para o produto selecionado.")
+        else:
+            coluna_tend = "VALOR TOTAL" if metrica_tend == "Faturamento" else "QTD"
+            alvo = pontos_para_largura()   # largura fixa assumida (tendencia.LARGURA_GRAFICO), gráfico em coluna cheia
+            reduzido = reduzir_serie(diario, coluna_tend, alvo)
+            reduzido = reduzido.assign(**{coluna_tend: reduzido[coluna_tend].round(2)})
+
+            fig_tend = px.line(reduzido, x="DATA", y=coluna_tend, height=320, color_discrete_sequence=["#a78bfa"])
+            plotly_dark_config(fig_tend)
+            fig_tend.update_layout(xaxis_title=None, yaxis_title=None)
+            st.plotly_chart(fig_tend, use_container_width=True, config=dict(displayModeBar=False))
+            st.caption(f"{len(diario)} dias no histórico → {len(reduzido)} pontos no gráfico")
+
 
 
 
@@ -826,30 +593,79 @@ with tabs[1]:
         else:
             st.info("Sem itens para gerar o gráfico.")
 
-        estoque_clas=estoque_display.copy()
-        estoque_clas["CUSTO_UNITARIO_FMT"]=estoque_clas["Media C. UNITARIO"].map(formatar_reais_com_centavos)
-        estoque_clas["VENDA_SUGERIDA_FMT"]=estoque_clas["Valor Venda Sugerido"].map(formatar_reais_com_centavos)
-        estoque_clas["VALOR_TOTAL_CUSTO_FMT"]=estoque_clas["VALOR_CUSTO_TOTAL_RAW"].map(formatar_reais_sem_centavos)
-        estoque_clas["VALOR_TOTAL_VENDA_FMT"]=estoque_clas["VALOR_VENDA_TOTAL_RAW"].map(formatar_reais_sem_centavos)
-
-        display_df=estoque_clas[[
-            "PRODUTO",
-            "EM ESTOQUE",
-            "CUSTO_UNITARIO_FMT",
-            "VENDA_SUGERIDA_FMT",
-            "VALOR_TOTAL_CUSTO_FMT",
-            "VALOR_TOTAL_VENDA_FMT"
-        ]].rename(columns={
-            "CUSTO_UNITARIO_FMT":"CUSTO UNITÁRIO",
-            "VENDA_SUGERIDA_FMT":"VENDA SUGERIDA",
-            "VALOR_TOTAL_CUSTO_FMT":"VALOR TOTAL CUSTO",
-            "VALOR_TOTAL_VENDA_FMT":"VALOR TOTAL VENDA"
-        })
-
-        display_df=display_df.sort_values("EM ESTOQUE", ascending=False).reset_index(drop=True)
+        rotulos_estoque={
+            "Media C. UNITARIO":"CUSTO UNITÁRIO",
+            "Valor Venda Sugerido":"VENDA SUGERIDA",
+            "VALOR_CUSTO_TOTAL_RAW":"VALOR TOTAL CUSTO",
+            "VALOR_VENDA_TOTAL_RAW":"VALOR TOTAL VENDA"
+        }
+        colunas_estoque=["PRODUTO","EM ESTOQUE","Media C. UNITARIO","Valor Venda Sugerido","VALOR_CUSTO_TOTAL_RAW","VALOR_VENDA_TOTAL_RAW"]
+
+        def formatar_estoque(p):
+            return pd.DataFrame({
+                "PRODUTO": p["PRODUTO"],
+                "EM ESTOQUE": p["EM ESTOQUE"],
+                "CUSTO UNITÁRIO": formatar_reais_serie(p["Media C. UNITARIO"]),
+                "VENDA SUGERIDA": formatar_reais_serie(p["Valor Venda Sugerido"]),
+                "VALOR TOTAL CUSTO": formatar_reais_serie(p["VALOR_CUSTO_TOTAL_RAW"], centavos=False),
+                "VALOR TOTAL VENDA": formatar_reais_serie(p["VALOR_VENDA_TOTAL_RAW"], centavos=False),
+            }).reset_index(drop=True)
 
         st.markdown("### 📋 Estoque — visão detalhada")
-        st.dataframe(display_df, use_container_width=True)
+        pos_estoque=tabela_paginada(
+            estoque_display, "tab_estoque", carga["hashes"].get("ESTOQUE"),
+            formatar=formatar_estoque, colunas=colunas_estoque, rotulos=rotulos_estoque,
+            ordenar_por="EM ESTOQUE", crescente=False,
+        )
+        botoes_exportacao(
+            lambda: estoque_display.iloc[pos_estoque], "estoque", "exp_estoque", linhas=len(pos_estoque),
+            colunas=colunas_estoque, renomear=rotulos_estoque,
+        )
+
+        # ---------------------
+        # REPOSIÇÃO — giro, cobertura e ponto de reposição (todos os SKUs)
+        # ---------------------
+        giro_df = art["giro"]
+        if not giro_df.empty:
+            st.markdown(f"### 🔁 Reposição — giro e cobertura (prazo {LEAD_TIME_DIAS}d + segurança {DIAS_SEGURANCA}d)")
+            so_repor = st.checkbox("Mostrar só itens para repor", value=True, key="so_repor")
+            rep = giro_df.merge(estoque_df[["PRODUTO","EM ESTOQUE"]], how="left", on="PRODUTO")
+            if so_repor:
+                rep = rep[rep["REPOR"]]
+            rep = rep.sort_values(["COBERTURA_DIAS","VEL_DIA"], ascending=[True, False], na_position="last")
+            rep_display = pd.DataFrame({
+                "Produto": rep["PRODUTO"],
+                "Estoque": rep["EM ESTOQUE"],
+                "7 dias": rep["QTD_7D"],
+                "30 dias": rep["QTD_30D"],
+                "90 dias": rep["QTD_90D"],
+                "Vendas/dia": rep["VEL_DIA"].round(2),
+                "Cobertura (dias)": rep["COBERTURA_DIAS"].round(0),
+                "Ponto de reposição": rep["PONTO_REPOSICAO"],
+            }).reset_index(drop=True)
+            if rep_display.empty:
+                st.info("Nenhum item abaixo do ponto de reposição.")
+            else:
+                st.dataframe(rep_display, use_container_width=True)
+
+        # ---------------------
+        # ESTOQUE AO LONGO DO TEMPO — reconstruído das fotos em delta do armazém
+        # ---------------------
+        st.markdown("### 📉 Estoque ao longo do tempo")
+        produto_hist_est = st.selectbox("Produto", sorted(estoque_df["PRODUTO"].dropna().astype(str).unique()), key="hist_estoque_produto")
+        serie_est = serie_estoque_cache(produto_hist_est, versao_armazem["ESTOQUE"])
+        if serie_est.empty:
+            st.info("Ainda sem histórico de estoque para este produto.")
+        else:
+            # fecha a escada no momento atual
+            serie_est = pd.concat([serie_est, serie_est.tail(1).assign(DATA=pd.Timestamp.now())], ignore_index=True)
+            fig_est = px.line(serie_est, x="DATA", y="EM ESTOQUE", height=300, line_shape="hv", color_discrete_sequence=["#34d399"])
+            plotly_dark_config(fig_est)
+            fig_est.update_layout(xaxis_title=None, yaxis_title=None)
+            st.plotly_chart(fig_est, use_container_width=True, config=dict(displayModeBar=False))
+            zerou = serie_est[serie_est["EM ESTOQUE"] <= 0]
+            if not zerou.empty:
+                st.caption("Zerou em: " + ", ".join(zerou["DATA"].dt.strftime("%d/%m/%Y %H:%M").drop_duplicates().tail(5)))
 
 
 
@@ -865,245 +681,249 @@ with tabs[1]:
 # =============================
 
 with tabs[2]:
-    # ===== Modernized E-commerce Search / Grid =====
-    st.markdown("""
-    <style>
-    /* glass + neon aesthetic for cards */
-    .search-topbar { display:flex; gap:12px; align-items:center; margin-bottom:12px; }
-    .glass-card { background: rgba(255,255,255,0.03); border-radius:14px; padding:10px; backdrop-filter: blur(6px) saturate(120%); -webkit-backdrop-filter: blur(6px); border:1px solid rgba(255,255,255,0.04); box-shadow: 0 6px 24px rgba(0,0,0,0.6); }
-    .neon-btn { padding:8px 12px; border-radius:10px; border:1px solid rgba(167,139,250,0.12); font-weight:700; }
-    .card-grid-ecom { display:grid; grid-template-columns: repeat(3,1fr); gap:16px; margin-top:12px; }
-    @media(max-width:1200px){ .card-grid-ecom{grid-template-columns:repeat(2,1fr);} }
-    @media(max-width:720px){ .card-grid-ecom{grid-template-columns:1fr;} }
-
-    .card-ecom{
-        background: linear-gradient(180deg, rgba(255,255,255,0.02), rgba(255,255,255,0.01));
-        border-radius:12px;
-        padding:14px;
-        border:1px solid rgba(167,139,250,0.06);
-        display:flex;
-        gap:12px;
-        align-items:center;
-        transition: transform .18s ease, box-shadow .18s ease;
-        backdrop-filter: blur(4px);
-    }
-    .card-ecom:hover{ transform: translateY(-6px); box-shadow: 0 18px 40px rgba(139,92,246,0.12); }
-    .avatar{ width:64px;height:64px;border-radius:14px; display:flex;align-items:center;justify-content:center; color:white;font-weight:900;font-size:22px; flex-shrink:0; }
-    .avatar.neon{ background: linear-gradient(135deg,#8b5cf6,#ec4899); box-shadow: 0 6px 18px rgba(139,92,246,0.12); }
-    .card-title{font-weight:900;font-size:15px;margin-bottom:4px;color:#fff;}
-    .card-meta{font-size:12px;color:#cfcfe0;margin-bottom:6px;}
-    .card-prices{display:flex;gap:10px;margin-bottom:6px;align-items:baseline;}
-    .card-price{color:#a78bfa;font-weight:900;}
-    .card-cost{color:#bdbdbd;font-weight:700;font-size:13px;}
-    .badge{padding:4px 8px;border-radius:8px;font-size:12px;margin-right:6px;display:inline-block;}
-    .low{background:rgba(255,69,96,0.12);color:#ffb4b4;border:1px solid rgba(255,69,96,0.06);}
-    .hot{background:rgba(139,92,246,0.12);color:#e9d5ff;border:1px solid rgba(139,92,246,0.06);}
-    .zero{background:rgba(255,255,255,0.04);color:#fff;border:1px solid rgba(255,255,255,0.03);}
-    .small-muted { font-size:11px; color: #bdbdbd; margin-top:4px; }
-
-    .controls { display:flex; gap:8px; align-items:center; flex-wrap:wrap; }
-    .muted { color:#cfcfe0; font-size:13px; }
-
-    </style>
-    """, unsafe_allow_html=True)
-
-    st.markdown("<div class='glass-card'>", unsafe_allow_html=True)
-    col_a, col_b = st.columns([3,2])
-    with col_a:
-        termo = st.text_input("🔎 Buscar produto", value="", placeholder="Digite o nome do produto...")
-    with col_b:
-        # modern controls row
-        cols = st.columns([1,1,1,1])
-        with cols[0]:
-            itens_pagina = st.selectbox("Itens/pg", [6,9,12,24,36,48,60,100,200], index=2)
-        with cols[1]:
-            ordenar = st.selectbox("Ordenar por", [
-                "Nome A–Z","Nome Z–A","Menor preço","Maior preço",
-                "Mais vendidos","Maior estoque","Última compra (recente)","Última compra (antiga)"
-            ], index=0)
-        with cols[2]:
-            grid_cols = st.selectbox("Colunas", [2,3,4], index=1)
-        with cols[3]:
-            ver_tudo = st.checkbox("Ver tudo (sem paginação)", value=False)
-    st.markdown("</div>", unsafe_allow_html=True)
-
-    # filtros avançados
-    filtro_baixo = st.checkbox("⚠️ Baixo estoque (≤3)", value=False)
-    filtro_alto = st.checkbox("📦 Alto estoque (≥20)", value=False)
-    filtro_vendidos = st.checkbox("🔥 Com vendas", value=False)
-    filtro_sem_venda = st.checkbox("❄️ Sem vendas", value=False)
-
-    # build df copy
-    df = estoque_df.copy()
-    vendas_df = dfs.get("VENDAS", pd.DataFrame()).copy()
-    if not vendas_df.empty and "QTD" in vendas_df.columns:
-        vend = vendas_df.groupby("PRODUTO")["QTD"].sum().reset_index().rename(columns={"QTD":"TOTAL_QTD"})
-        df = df.merge(vend,how="left",on="PRODUTO").fillna({"TOTAL_QTD":0})
-    else:
-        df["TOTAL_QTD"]=0
-
-    # ultima compra map
-    compras_df = dfs.get("COMPRAS", pd.DataFrame()).copy()
-    ultima_compra = {}
-    if not compras_df.empty and "DATA" in compras_df.columns and "PRODUTO" in compras_df.columns:
-        compras_df = compras_df.dropna(subset=["PRODUTO"])
-        compras_df["DATA"] = pd.to_datetime(compras_df["DATA"], errors="coerce")
-        tmp = compras_df.groupby("PRODUTO")["DATA"].max().reset_index()
-        ultima_compra = dict(zip(tmp["PRODUTO"], tmp["DATA"].dt.strftime("%d/%m/%Y")))
-
-    # apply search & filters
-    if termo and termo.strip():
-        df = df[df["PRODUTO"].str.contains(termo, case=False, na=False)]
-    if filtro_baixo:
-        df = df[df["EM ESTOQUE"]<=3]
-    if filtro_alto:
-        df = df[df["EM ESTOQUE"]>=20]
-    if filtro_vendidos:
-        df = df[df["TOTAL_QTD"]>0]
-    if filtro_sem_venda:
-        df = df[df["TOTAL_QTD"]==0]
-
-    # formatting
-    df["CUSTO_FMT"] = df.get("Media C. UNITARIO", 0).map(formatar_reais_com_centavos)
-    df["VENDA_FMT"] = df.get("Valor Venda Sugerido", 0).map(formatar_reais_com_centavos)
-
-    # sorting
-    if ordenar == "Nome A–Z":
-        df = df.sort_values("PRODUTO", ascending=True)
-    elif ordenar == "Nome Z–A":
-        df = df.sort_values("PRODUTO", ascending=False)
-    elif ordenar == "Menor preço":
-        df = df.sort_values("Valor Venda Sugerido", ascending=True)
-    elif ordenar == "Maior preço":
-        df = df.sort_values("Valor Venda Sugerido", ascending=False)
-    elif ordenar == "Mais vendidos":
-        if "TOTAL_QTD" in df.columns:
-            df = df.sort_values("TOTAL_QTD", ascending=False)
-    elif ordenar == "Maior estoque":
-        df = df.sort_values("EM ESTOQUE", ascending=False)
-    elif ordenar == "Última compra (recente)":
-        # ensure we have compras dataframe parsed
-        if not compras_df.empty:
-            tmp2 = compras_df.groupby("PRODUTO")["DATA"].max().reset_index()
-            tmp2.columns = ["PRODUTO","ULT_COMPRA_RAW"]
-            df = df.merge(tmp2, how="left", on="PRODUTO")
-            df["ULT_COMPRA_RAW"] = pd.to_datetime(df["ULT_COMPRA_RAW"], errors="coerce")
-            df = df.sort_values("ULT_COMPRA_RAW", ascending=False).drop(columns=["ULT_COMPRA_RAW"])
-    elif ordenar == "Última compra (antiga)":
-        if not compras_df.empty:
-            tmp2 = compras_df.groupby("PRODUTO")["DATA"].max().reset_index()
-            tmp2.columns = ["PRODUTO","ULT_COMPRA_RAW"]
-            df = df.merge(tmp2, how="left", on="PRODUTO")
-            df["ULT_COMPRA_RAW"] = pd.to_datetime(df["ULT_COMPRA_RAW"], errors="coerce")
-            df = df.sort_values("ULT_COMPRA_RAW", ascending=True).drop(columns=["ULT_COMPRA_RAW"])
-
-    total = len(df)
-
-    # pagination
-    if ver_tudo:
-        itens_pagina = total if total>0 else 1
+    # ⚡ no navegador: catálogo enviado uma vez por versão; busca/filtros/ordenação/rolagem não voltam ao servidor
+    no_navegador = st.toggle("⚡ Busca no navegador (sem recarregar a cada clique)", value=VITRINE_PADRAO, key="vitrine")
+    if no_navegador:
+        versao_vitrine = (tuple(carga["hashes"].get(aba) for aba in ("ESTOQUE", "VENDAS", "COMPRAS")),
+                          datetime.now().strftime("%Y-%m-%d"), versao_imagens())
+        st.iframe(
+            vitrine_cache(versao_vitrine, art, tuple(_top5_list_global), tuple(_enc_list_global),
+                          not st.get_option("server.enableStaticServing")),
+            height=ALTURA_VITRINE + 16,
+        )
     else:
-        itens_pagina = int(itens_pagina)
-
-    total_paginas = max(1, (total + itens_pagina - 1)//itens_pagina)
-
-    if "pagina" not in st.session_state:
-        st.session_state["pagina"] = 1
-    # clamp page
-    st.session_state["pagina"] = max(1, min(st.session_state["pagina"], total_paginas))
-
-    coln1, coln2, coln3 = st.columns([1,2,1])
-    with coln1:
-        if st.button("⬅️ Voltar"):
-            st.session_state["pagina"] = max(1, st.session_state["pagina"]-1)
-    with coln2:
-        st.markdown(f"**Página {st.session_state['pagina']} de {total_paginas} — {total} resultados**")
-    with coln3:
-        if st.button("Avançar ➡️"):
-            st.session_state["pagina"] = min(total_paginas, st.session_state["pagina"]+1)
-
-    pagina = st.session_state["pagina"]
-    inicio = (pagina-1)*itens_pagina
-    fim = inicio + itens_pagina
-    df_page = df.iloc[inicio:fim].reset_index(drop=True)
-
-    # render grid with selected columns layout
-    # inject dynamic grid style
-    st.markdown(f"<style>.card-grid-ecom{{grid-template-columns: repeat({grid_cols},1fr);}}</style>", unsafe_allow_html=True)
-    st.markdown("<div class='card-grid-ecom'>", unsafe_allow_html=True)
-
-    for _, r in df_page.iterrows():
-        nome = r.get("PRODUTO","")
-        estoque = int(r.get("EM ESTOQUE",0)) if pd.notna(r.get("EM ESTOQUE",0)) else 0
-        venda = r.get("VENDA_FMT","R$ 0")
-        custo = r.get("CUSTO_FMT","R$ 0")
-        vendidos = int(r.get("TOTAL_QTD",0)) if pd.notna(r.get("TOTAL_QTD",0)) else 0
-
-        iniciais = "".join([p[0].upper() for p in str(nome).split()[:2] if p]) or "—"
-
-        badges = []
-        if estoque<=3: badges.append(f"<span class='badge low'>⚠️ Baixo</span>")
-        if vendidos>=15: badges.append(f"<span class='badge hot'>🔥 Saindo</span>")
-        if nome in ultima_compra and vendidos==0:
-            vendas_produto = vendas_df[vendas_df['PRODUTO']==nome] if not vendas_df.empty else pd.DataFrame()
-            if vendas_produto.empty: badges.append("<span class='badge slow'>❄️ Sem vendas</span>")
-        try:
-            if nome in _enc_list_global:
-                badges.append("<span class='badge zero'>🐌 Encalhado</span>")
-        except Exception:
-            pass
-        try:
-            if nome in _top5_list_global:
-                badges.append("<span class='badge hot'>🥇 Campeão</span>")
-        except Exception:
-            pass
+        # ===== Modernized E-commerce Search / Grid ===== (estilo dos cards vem do estilo.css)
+
+        st.markdown("<div class='glass-card'>", unsafe_allow_html=True)
+        col_a, col_b = st.columns([3,2])
+        with col_a:
+            termo = st.text_input("🔎 Buscar produto", value="", placeholder="Digite o nome do produto...", key="pesq_busca")
+        with col_b:
+            # modern controls row
+            cols = st.columns([1,1,1,1])
+            with cols[0]:
+                itens_pagina = st.selectbox("Itens/pg", [6,9,12,24,36,48,60,100,200], index=2, key="pesq_itens")
+            with cols[1]:
+                ordenar = st.selectbox("Ordenar por", ORDENACOES, index=0, key="pesq_ordenar")
+            with cols[2]:
+                grid_cols = st.selectbox("Colunas", [2,3,4], index=1, key="pesq_colunas")
+            with cols[3]:
+                ver_tudo = st.checkbox("Ver tudo (sem paginação)", value=False, key="pesq_tudo")
+        st.markdown("</div>", unsafe_allow_html=True)
+
+        # filtros avançados
+        filtro_baixo = st.checkbox("⚠️ Baixo estoque (≤3)", value=False, key="pesq_baixo")
+        filtro_alto = st.checkbox("📦 Alto estoque (≥20)", value=False, key="pesq_alto")
+        filtro_vendidos = st.checkbox("🔥 Com vendas", value=False, key="pesq_vendidos")
+        filtro_sem_venda = st.checkbox("❄️ Sem vendas", value=False, key="pesq_sem_venda")
+
+        # ultima compra map
+        ult = art["ultima_compra"]
+        ultima_compra = dict(zip(ult["PRODUTO"], ult["ULT_COMPRA"].dt.strftime("%d/%m/%Y")))
+
+        # busca/filtros/ordenação -> posições do catálogo, num LRU por (versão dos dados, termo, filtros, ordenação);
+        # voltar a uma consulta já feita é só um acerto no cache + fatia da página
+        catalogo_df = art["catalogo"]
+        filtros_busca = (filtro_baixo, filtro_alto, filtro_vendidos, filtro_sem_venda)
+        versao_busca = tuple(carga["hashes"].get(aba) for aba in ("ESTOQUE", "VENDAS", "COMPRAS"))
+        ids_busca = obter_cache_busca().obter(
+            chave_consulta(versao_busca, termo, filtros_busca, ordenar),
+            lambda: filtrar_ordenar(catalogo_df, art["indice_busca"], termo, filtros_busca, ordenar),
+        )
 
-        badges_html = " ".join(badges)
-        ultima = ultima_compra.get(nome,"—")
+        total = len(ids_busca)
 
-        enc_style = ""
-        try:
-            if nome in _enc_list_global:
-                enc_style="style='border-left:6px solid #ef4444; animation:pulseRed 2s infinite;'"
-            elif nome in _top5_list_global:
-                enc_style="style='border-left:6px solid #22c55e;'"
-        except Exception:
-            pass
+        ult_compra_raw = ult.set_index("PRODUTO")["ULT_COMPRA"]
+        # o frame completo do resultado só é montado no clique de exportar
+        botoes_exportacao(
+            lambda: catalogo_df.iloc[ids_busca], "pesquisa", "exp_pesquisa", linhas=total,
+            colunas=["PRODUTO","EM ESTOQUE","Media C. UNITARIO","Valor Venda Sugerido","TOTAL_QTD","ULTIMA COMPRA"],
+            renomear={"Media C. UNITARIO":"CUSTO UNITÁRIO","Valor Venda Sugerido":"VENDA SUGERIDA","TOTAL_QTD":"VENDIDOS"},
+            derivar=lambda p: p.assign(**{"ULTIMA COMPRA": p["PRODUTO"].map(ult_compra_raw)}),
+        )
 
-        dias_sem_venda = ""
-        try:
-            vendas_prod = vendas_df[vendas_df["PRODUTO"]==nome] if not vendas_df.empty else pd.DataFrame()
-            if not vendas_prod.empty:
-                last = vendas_prod["DATA"].max()
-                if pd.notna(last) and estoque>0:
-                    delta = (pd.Timestamp.now() - last).days
-                    if delta>=60:
-                        cor="#ef4444"; icone="⛔"; pulse="pulseRed"
-                    elif delta>=30:
-                        cor="#f59e0b"; icone="⚠️"; pulse="pulseOrange"
-                    elif delta>=7:
-                        cor="#a78bfa"; icone="🕒"; pulse="pulsePurple"
-                    else:
-                        cor="#22c55e"; icone="✅"; pulse="pulseGreen"
-                    dias_sem_venda = f"<div style='font-size:11px;margin-top:2px;color:{cor};animation:{pulse} 2s infinite;'>{icone} Dias sem vender: <b>{delta}</b></div>"
-        except Exception:
-            pass
+        # pagination
+        if ver_tudo:
+            itens_pagina = total if total>0 else 1
+        else:
+            itens_pagina = int(itens_pagina)
+
+        total_paginas = max(1, (total + itens_pagina - 1)//itens_pagina)
+
+        if "pagina" not in st.session_state:
+            st.session_state["pagina"] = 1
+        # clamp page
+        st.session_state["pagina"] = max(1, min(st.session_state["pagina"], total_paginas))
+
+        coln1, coln2, coln3 = st.columns([1,2,1])
+        with coln1:
+            if st.button("⬅️ Voltar", key="pesq_voltar"):
+                st.session_state["pagina"] = max(1, st.session_state["pagina"]-1)
+        with coln2:
+            st.markdown(f"**Página {st.session_state['pagina']} de {total_paginas} — {total} resultados**")
+        with coln3:
+            if st.button("Avançar ➡️", key="pesq_avancar"):
+                st.session_state["pagina"] = min(total_paginas, st.session_state["pagina"]+1)
+
+        pagina = st.session_state["pagina"]
+        inicio = (pagina-1)*itens_pagina
+        fim = inicio + itens_pagina
+        df_page = catalogo_df.iloc[ids_busca[inicio:fim]].reset_index(drop=True)
+        # formatação só das linhas da página
+        df_page["CUSTO_FMT"] = formatar_reais_serie(df_page.get("Media C. UNITARIO", 0))
+        df_page["VENDA_FMT"] = formatar_reais_serie(df_page.get("Valor Venda Sugerido", 0))
+
+        # render grid with selected columns layout
+        # inject dynamic grid style
+        st.markdown(f"<style>.card-grid-ecom{{grid-template-columns: repeat({grid_cols},1fr);}}</style>", unsafe_allow_html=True)
+        st.markdown("<div class='card-grid-ecom'>", unsafe_allow_html=True)
+
+        giro_map = art["giro"].set_index("PRODUTO")
+
+        # regras de alerta já avaliadas por linha do catálogo: mesma posição da grade
+        alertas_pagina = art["alertas"]["mascaras"].iloc[ids_busca[inicio:fim]].reset_index(drop=True)
+        regras_badge = [rg for rg in REGRAS if "badge" in rg]
+        regras_faixa = [rg for rg in REGRAS if "faixa" in rg]
+
+        # fotos (pasta imagens/): miniaturas só dos produtos da página; sem static serving vão embutidas
+        fotos = miniaturas(df_page["PRODUTO"].astype(str)) if "PRODUTO" in df_page.columns else {}
+        fotos_embutidas = bool(fotos) and not st.get_option("server.enableStaticServing")
+
+        # sparkline de 30 dias da página inteira: um bloco da matriz produto × dia (nada de filtrar VENDAS por card)
+        matriz = art["matriz_vendas"]
+        nomes_pagina = df_page["PRODUTO"] if "PRODUTO" in df_page.columns else [None] * len(df_page)
+        serie_pagina = matriz.bloco(matriz.linhas(nomes_pagina), *matriz.periodo(pd.Timestamp.now(), DIAS_SPARKLINE))
+
+        for i, r in df_page.iterrows():
+            nome = r.get("PRODUTO","")
+            disparadas = alertas_pagina.iloc[i]
+            estoque = int(r.get("EM ESTOQUE",0)) if pd.notna(r.get("EM ESTOQUE",0)) else 0
+            venda = r.get("VENDA_FMT","R$ 0")
+            custo = r.get("CUSTO_FMT","R$ 0")
+            vendidos = int(r.get("TOTAL_QTD",0)) if pd.notna(r.get("TOTAL_QTD",0)) else 0
+
+            iniciais = "".join([p[0].upper() for p in str(nome).split()[:2] if p]) or "—"
+
+            badges = [f"<span class='badge {rg['badge'][0]}'>{rg['badge'][1]}</span>" for rg in regras_badge if disparadas[rg["id"]]]
+            g = giro_map.loc[nome] if nome in giro_map.index else None
+            try:
+                if nome in _enc_list_global:
+                    badges.append("<span class='badge zero'>🐌 Encalhado</span>")
+            except Exception:
+                pass
+            try:
+                if nome in _top5_list_global:
+                    badges.append("<span class='badge hot'>🥇 Campeão</span>")
+            except Exception:
+                pass
 
-        avatar_html = f"<div class='avatar neon'>{iniciais}</div>"
-        card_html = (
-            f"<div class='card-ecom' {enc_style}>"
-            f"{avatar_html}"
-            f"<div style='flex:1;'>"
-            f"<div class='card-title'>{nome}</div>"
-            f"<div class='card-meta'>Estoque: <b>{estoque}</b> • Vendidos: <b>{vendidos}</b></div>"
-            f"<div class='card-prices'><div class='card-price'>{venda}</div><div class='card-cost'>{custo}</div></div>"
-            f"<div style='font-size:11px;color:#9ca3af;margin-top:4px;'>🕒 Última compra: <b>{ultima}</b></div>"
-            f"{dias_sem_venda}"
-            f"<div style='margin-top:6px;'>{badges_html}</div>"
-            f"</div>"
-            f"</div>"
-        )
-        st.markdown(card_html, unsafe_allow_html=True)
+            badges_html = " ".join(badges)
+            ultima = ultima_compra.get(nome,"—")
+
+            enc_style = ""
+            try:
+                if nome in _enc_list_global:
+                    enc_style="style='border-left:6px solid #ef4444; animation:pulseRed 2s infinite;'"
+                elif nome in _top5_list_global:
+                    enc_style="style='border-left:6px solid #22c55e;'"
+            except Exception:
+                pass
+
+            dias_sem_venda = ""
+            giro_html = ""
+            try:
+                if g is not None and pd.notna(g["DIAS_SEM_VENDER"]) and estoque>0:
+                    delta = int(g["DIAS_SEM_VENDER"])
+                    cor, icone, pulse = next((rg["faixa"] for rg in regras_faixa if disparadas[rg["id"]]), FAIXA_OK)
+                    dias_sem_venda = f"<div style='font-size:11px;margin-top:2px;color:{cor};animation:{pulse} 2s infinite;'>{icone} Dias sem vender: <b>{delta}</b></div>"
+                if g is not None and g["VEL_DIA"]>0:
+                    cobertura = f"{g['COBERTURA_DIAS']:.0f} dias"
+                    repor = " • <b style='color:#f59e0b;'>repor</b>" if g["REPOR"] else ""
+                    giro_html = f"<div style='font-size:11px;color:#9ca3af;margin-top:2px;'>📈 Giro: <b>{g['VEL_DIA']:.2f}/dia</b> • Cobertura: <b>{cobertura}</b>{repor}</div>"
+            except Exception:
+                pass
+            spark_html = (f"<div class='spark'>{sparkline_svg(serie_pagina[i])}"
+                          f"<span>{DIAS_SPARKLINE}d: <b>{serie_pagina[i].sum():.0f}</b> un</span></div>")
+
+            if nome in fotos:
+                src = src_miniatura(fotos[nome], fotos_embutidas)
+                avatar_html = f"<img class='avatar foto' src='{src}' loading='lazy' decoding='async' width='64' height='64' alt=''>"
+            else:
+                avatar_html = f"<div class='avatar neon'>{iniciais}</div>"
+            card_html = (
+                f"<div class='card-ecom' {enc_style}>"
+                f"{avatar_html}"
+                f"<div style='flex:1;'>"
+                f"<div class='card-title'>{nome}</div>"
+                f"<div class='card-meta'>Estoque: <b>{estoque}</b> • Vendidos: <b>{vendidos}</b></div>"
+                f"<div class='card-prices'><div class='card-price'>{venda}</div><div class='card-cost'>{custo}</div></div>"
+                f"<div style='font-size:11px;color:#9ca3af;margin-top:4px;'>🕒 Última compra: <b>{ultima}</b></div>"
+                f"{dias_sem_venda}"
+                f"{giro_html}"
+                f"{spark_html}"
+                f"<div style='margin-top:6px;'>{badges_html}</div>"
+                f"</div>"
+                f"</div>"
+            )
+            st.markdown(card_html, unsafe_allow_html=True)
+
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    # ===== Produto em detalhe: sparkline 30/90 dias + calendário, fatias da matriz produto × dia =====
+    st.markdown("#### 🔍 Produto em detalhe")
+    matriz = art["matriz_vendas"]
+    col_det, col_per = st.columns([3, 1])
+    with col_det:
+        produtos_det = art["catalogo"]["PRODUTO"].dropna().astype(str).unique().tolist() if "PRODUTO" in art["catalogo"].columns else []
+        produto_det = st.selectbox("Produto", produtos_det, index=None, placeholder="Escolha um produto...", key="detalhe_produto")
+    with col_per:
+        dias_det = st.radio("Período", [30, 90], format_func=lambda d: f"{d} dias", horizontal=True, key="detalhe_dias")
+    if produto_det:
+        hoje_det = pd.Timestamp.now().normalize()
+        ini_det, fim_det = matriz.periodo(hoje_det, dias_det)
+        qtd_det = matriz.linha(produto_det, ini_det, fim_det)
+        valor_det = matriz.linha(produto_det, ini_det, fim_det, "VALOR TOTAL")
+        # posição no período entre todos os produtos: soma da janela de uma vez (somas acumuladas da matriz)
+        somas_det = matriz.somas(ini_det, fim_det)
+        linha_det = matriz.linhas([produto_det])[0]
+        vendeu = linha_det >= 0 and somas_det[linha_det] > 0
+        d1, d2, d3, d4 = st.columns(4)
+        d1.metric(f"Unidades ({dias_det} dias)", f"{qtd_det.sum():.0f}")
+        d2.metric("Faturamento", formatar_reais_sem_centavos(valor_det.sum()))
+        d3.metric("Dias com venda", f"{int((qtd_det > 0).sum())} de {dias_det}")
+        d4.metric("Posição no período", f"#{int((somas_det > somas_det[linha_det]).sum()) + 1} de {int((somas_det > 0).sum())}" if vendeu else "—")
+        st.markdown(f"<div class='spark'>{sparkline_svg(qtd_det, largura=720, altura=72)}</div>", unsafe_allow_html=True)
+        st.caption(f"Unidades por dia, {(hoje_det - pd.Timedelta(days=dias_det - 1)):%d/%m} a {hoje_det:%d/%m}")
+        ini_cal, fim_cal = matriz.periodo(hoje_det, SEMANAS_CALENDARIO * 7)
+        st.markdown(calendario_svg(matriz.linha(produto_det, ini_cal, fim_cal), hoje_det), unsafe_allow_html=True)
+        st.caption(f"Atividade nas últimas {SEMANAS_CALENDARIO} semanas (colunas = semanas, seg → dom; mais escuro = sem venda)")
 
-    st.markdown("</div>", unsafe_allow_html=True)
+# =============================
+# Diagnóstico (cache de artefatos)
+# =============================
+with st.expander("⚙️ Diagnóstico", expanded=False):
+    recalc = carga["recalculados"]
+    st.caption("Artefatos recalculados nesta atualização: " + (", ".join(recalc) if recalc else "nenhum (tudo em cache)"))
+    st.caption("Hash das abas: " + " • ".join(f"{k} {v[:10]}" for k, v in carga["hashes"].items()))
+    voo = obter_voo()
+    st.caption(f"Carga {'compartilhada com outra sessão' if carga_compartilhada else 'feita por esta sessão'} • {voo.execucoes} cargas, {voo.compartilhadas} esperas coalescidas desde o início")
+    st.caption("Armazém: " + (("abas gravadas nesta atualização: " + ", ".join(abas_gravadas)) if abas_gravadas else "sem mudanças para gravar") + f" • {armazem.ARQUIVO_DB}")
+    cache_busca = obter_cache_busca().resumo()
+    st.caption(f"Cache da busca: {cache_busca['hits']} acertos / {cache_busca['misses']} faltas ({cache_busca['taxa']:.0%}) • {cache_busca['entradas']}/{cache_busca['capacidade']} consultas guardadas")
+    hist = armazem.resumo_historico()
+    st.caption(f"Custo das vendas: {NOMES_CUSTEIO[CUSTEIO]} (LOJA_CUSTEIO=medio|fifo|planilha)")
+    st.caption(f"Histórico de estoque: {hist['fotos']} fotos ({hist['chaves']} completas) • {hist['linhas']} linhas gravadas")
 
+# =============================
+# Perfil do rerun (opcional)
+# =============================
+if _perfil is not None:
+    arquivo_perfil = _perfil.parar()
+    st.session_state.pop("_perfil", None)
+    with st.expander(f"🔬 Perfil deste rerun ({_perfil.modo})", expanded=True):
+        st.caption(f"{_perfil.duracao*1000:.0f} ms • arquivo: {arquivo_perfil}" + (" (abre em speedscope.app / flamegraph.pl)" if _perfil.modo == "amostra" else " (snakeviz / pstats)"))
+        st.dataframe(_perfil.top(25), use_container_width=True)
+        linhas_perfil = _perfil.linhas_quentes(15)
+        if not linhas_perfil.empty:
+            st.markdown("**Linhas do app.py com mais tempo acumulado**")
+            st.dataframe(linhas_perfil, use_container_width=True)
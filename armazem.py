@@ -0,0 +1,410 @@
+# armazem.py — Armazém local (SQLite) com histórico de VENDAS/COMPRAS e consultas agregadas em SQL
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+
+from custo import CUSTEIO, COLUNA_CUSTO
+from planilha import PASTA_CACHE
+
+ARQUIVO_DB = os.environ.get("LOJA_DB", os.path.join(PASTA_CACHE, "loja.sqlite"))
+
+TABELAS = {"ESTOQUE": "estoque", "VENDAS": "vendas", "COMPRAS": "compras"}
+# abas com histórico: o que sai da planilha (datas antes da janela atual) continua no armazém
+COM_HISTORICO = ("VENDAS", "COMPRAS")
+# histórico de estoque: a cada N fotos grava um quadro completo; entre eles só as diferenças por SKU
+INTERVALO_CHAVE = 50
+# datas gravadas como texto ISO; a volta usa o mesmo formato explícito (sem inferência por linha)
+FORMATO_DATA = "%Y-%m-%d %H:%M:%S"
+
+
+# =============================
+# Conexão / estrutura
+# =============================
+def conectar(caminho=None):
+    caminho = caminho or ARQUIVO_DB
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    con = sqlite3.connect(caminho, timeout=30, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    return con
+
+def datas(*colunas, formato=FORMATO_DATA):
+    return {c: {"format": formato} for c in colunas}
+
+def q(nome):
+    return '"' + str(nome).replace('"', '""') + '"'
+
+def tipo_sql(serie):
+    if pd.api.types.is_datetime64_any_dtype(serie): return "TIMESTAMP"
+    if pd.api.types.is_bool_dtype(serie): return "INTEGER"
+    if pd.api.types.is_integer_dtype(serie): return "INTEGER"
+    if pd.api.types.is_float_dtype(serie): return "REAL"
+    return "TEXT"
+
+def colunas_tabela(con, tabela):
+    return [r[1] for r in con.execute(f"PRAGMA table_info({q(tabela)})")]
+
+def garantir_tabela(con, tabela, df):
+    existentes = colunas_tabela(con, tabela)
+    if not existentes:
+        cols = ", ".join(f"{q(c)} {tipo_sql(df[c])}" for c in df.columns)
+        con.execute(f"CREATE TABLE {q(tabela)} ({cols})")
+    else:
+        # planilha ganhou coluna nova: acrescenta sem perder o histórico
+        for c in df.columns:
+            if c not in existentes:
+                con.execute(f"ALTER TABLE {q(tabela)} ADD COLUMN {q(c)} {tipo_sql(df[c])}")
+    if tabela in ("vendas", "compras") and "DATA" in df.columns:
+        con.execute(f"CREATE INDEX IF NOT EXISTS ix_{tabela}_data ON {q(tabela)}(DATA)")
+        if "PRODUTO" in df.columns:
+            con.execute(f"CREATE INDEX IF NOT EXISTS ix_{tabela}_produto_data ON {q(tabela)}(PRODUTO, DATA)")
+    if tabela == "estoque" and "PRODUTO" in df.columns:
+        con.execute("CREATE INDEX IF NOT EXISTS ix_estoque_produto ON estoque(PRODUTO)")
+
+def garantir_meta(con):
+    con.execute("CREATE TABLE IF NOT EXISTS meta (aba TEXT PRIMARY KEY, hash TEXT, atualizado TEXT)")
+
+def para_sql(df):
+    # datas como texto ISO (ordenável), NaN/NA como NULL
+    out = df.copy()
+    for c in out.columns:
+        if pd.api.types.is_datetime64_any_dtype(out[c]):
+            out[c] = out[c].dt.strftime(FORMATO_DATA)
+    return out.astype(object).where(out.notna(), None)
+
+
+# =============================
+# Escrita (chamada pelo carregador)
+# =============================
+def em_dia(con, aba, hash_aba):
+    atual = con.execute("SELECT hash FROM meta WHERE aba=?", (aba,)).fetchone()
+    if not atual or atual[0] != hash_aba:
+        return False
+    if aba == "ESTOQUE":
+        # armazém anterior ao histórico: grava a primeira foto mesmo sem mudança
+        garantir_historico(con)
+        return con.execute("SELECT 1 FROM estoque_snap LIMIT 1").fetchone() is not None
+    return True
+
+def gravar(dfs, hashes, caminho=None):
+    gravadas = []
+    with closing(conectar(caminho)) as con:
+        garantir_meta(con)
+        for aba, tabela in TABELAS.items():
+            df = dfs.get(aba)
+            if df is None or aba not in hashes:
+                continue
+            if em_dia(con, aba, hashes[aba]):
+                continue
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                # outra sessão pode ter gravado enquanto esperávamos o lock
+                if em_dia(con, aba, hashes[aba]):
+                    con.execute("COMMIT")
+                    continue
+                garantir_tabela(con, tabela, df)
+                if aba in COM_HISTORICO and "DATA" in df.columns and df["DATA"].notna().any():
+                    # substitui só a janela coberta pela planilha; o que é mais antigo vira histórico
+                    inicio = df["DATA"].min().strftime(FORMATO_DATA)
+                    con.execute(f"DELETE FROM {q(tabela)} WHERE DATA >= ? OR DATA IS NULL", (inicio,))
+                else:
+                    con.execute(f"DELETE FROM {q(tabela)}")
+                if not df.empty:
+                    cols = list(df.columns)
+                    sql = f"INSERT INTO {q(tabela)} ({', '.join(q(c) for c in cols)}) VALUES ({', '.join('?' * len(cols))})"
+                    con.executemany(sql, para_sql(df).itertuples(index=False, name=None))
+                if aba == "ESTOQUE":
+                    registrar_estoque(con, df)
+                con.execute(
+                    "INSERT OR REPLACE INTO meta (aba, hash, atualizado) VALUES (?, ?, ?)",
+                    (aba, hashes[aba], datetime.now().isoformat(timespec="seconds")),
+                )
+                con.execute("COMMIT")
+                gravadas.append(aba)
+            except Exception:
+                con.execute("ROLLBACK")
+                raise
+    return gravadas
+
+
+# =============================
+# Histórico de estoque (fotos em delta + quadros-chave)
+# =============================
+def garantir_historico(con):
+    # chave=1: quadro completo (qtd absoluta); chave=0: só SKUs que mudaram (qtd = diferença)
+    con.execute("CREATE TABLE IF NOT EXISTS estoque_snap (id INTEGER PRIMARY KEY, quando TEXT NOT NULL, chave INTEGER NOT NULL)")
+    con.execute("CREATE INDEX IF NOT EXISTS ix_estoque_snap_quando ON estoque_snap(quando)")
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS estoque_delta (produto TEXT NOT NULL, snap INTEGER NOT NULL, qtd INTEGER NOT NULL,"
+        " PRIMARY KEY (produto, snap)) WITHOUT ROWID"
+    )
+
+def foto_ate(con, quando=None):
+    # (id da foto vigente em `quando`, id do quadro-chave anterior a ela)
+    if quando is None:
+        r = con.execute("SELECT MAX(id) FROM estoque_snap").fetchone()
+    else:
+        r = con.execute("SELECT MAX(id) FROM estoque_snap WHERE quando <= ?", (quando,)).fetchone()
+    snap = r[0]
+    if snap is None:
+        return None, None
+    chave = con.execute("SELECT MAX(id) FROM estoque_snap WHERE chave = 1 AND id <= ?", (snap,)).fetchone()[0]
+    return snap, chave
+
+def estado_estoque(con, quando=None):
+    # quadro-chave + soma das diferenças até a foto -> quantidade por SKU (ausente = 0)
+    snap, chave = foto_ate(con, quando)
+    if snap is None:
+        return pd.Series(dtype="int64")
+    rows = con.execute(
+        "SELECT produto, SUM(qtd) FROM estoque_delta WHERE snap BETWEEN ? AND ? GROUP BY produto",
+        (chave or 0, snap),
+    ).fetchall()
+    return pd.Series(dict(rows), dtype="int64")
+
+def quantidades_estoque(df):
+    if df is None or df.empty or not {"PRODUTO", "EM ESTOQUE"} <= set(df.columns):
+        return pd.Series(dtype="int64")
+    qtd = pd.to_numeric(df["EM ESTOQUE"], errors="coerce").fillna(0).round().astype("int64")
+    return qtd.groupby(df["PRODUTO"].astype(str)).sum()
+
+def registrar_estoque(con, df, quando=None):
+    # roda dentro da transação de gravar(); devolve o tipo de foto gravada (ou None se nada mudou)
+    garantir_historico(con)
+    quando = quando or datetime.now().strftime(FORMATO_DATA)
+    atual = quantidades_estoque(df)
+    ultima_chave = con.execute("SELECT MAX(id) FROM estoque_snap WHERE chave = 1").fetchone()[0]
+    desde_chave = con.execute("SELECT COUNT(*) FROM estoque_snap WHERE id > ?", (ultima_chave or 0,)).fetchone()[0]
+    if ultima_chave is None or desde_chave + 1 >= INTERVALO_CHAVE:
+        linhas, chave = atual[atual != 0], 1
+    else:
+        diff = atual.sub(estado_estoque(con), fill_value=0).astype("int64")
+        linhas, chave = diff[diff != 0], 0
+        if linhas.empty:
+            return None   # mudou preço/outra coluna, mas não quantidade
+    snap = con.execute("INSERT INTO estoque_snap (quando, chave) VALUES (?, ?)", (quando, chave)).lastrowid
+    con.executemany(
+        "INSERT INTO estoque_delta (produto, snap, qtd) VALUES (?, ?, ?)",
+        ((p, snap, int(v)) for p, v in linhas.items()),
+    )
+    return "chave" if chave else "delta"
+
+def serie_estoque(produto, caminho=None):
+    # uma linha por foto em que o SKU mudou; quadro-chave reinicia a soma
+    with closing(conectar(caminho)) as con:
+        garantir_historico(con)
+        df = pd.read_sql_query(
+            "SELECT s.id AS snap, s.quando AS DATA, s.chave, d.qtd FROM estoque_delta d JOIN estoque_snap s ON s.id = d.snap"
+            " WHERE d.produto = ? ORDER BY d.snap",
+            con, params=(produto,), parse_dates=datas("DATA"),
+        )
+        # quadros-chave em que o SKU não aparece: estava zerado
+        chaves = pd.read_sql_query(
+            "SELECT s.id AS snap, s.quando AS DATA FROM estoque_snap s WHERE s.chave = 1"
+            " AND NOT EXISTS (SELECT 1 FROM estoque_delta d WHERE d.snap = s.id AND d.produto = ?)"
+            " AND s.id > (SELECT COALESCE(MIN(snap), 0) FROM estoque_delta WHERE produto = ?)",
+            con, params=(produto, produto), parse_dates=datas("DATA"),
+        )
+    if df.empty:
+        return pd.DataFrame(columns=["DATA", "EM ESTOQUE"])
+    if not chaves.empty:
+        chaves["chave"], chaves["qtd"] = 1, 0
+        # ordem de aplicação = id da foto (duas fotos podem ter o mesmo horário)
+        df = pd.concat([df, chaves], ignore_index=True).sort_values("snap", kind="stable")
+    segmento = df["chave"].cumsum()
+    df["EM ESTOQUE"] = df["qtd"].groupby(segmento).cumsum().astype("int64")
+    return df[["DATA", "EM ESTOQUE"]].reset_index(drop=True)
+
+def resumo_historico(caminho=None):
+    with closing(conectar(caminho)) as con:
+        garantir_historico(con)
+        fotos, chaves = con.execute("SELECT COUNT(*), COALESCE(SUM(chave), 0) FROM estoque_snap").fetchone()
+        linhas = con.execute("SELECT COUNT(*) FROM estoque_delta").fetchone()[0]
+    return {"fotos": fotos, "chaves": chaves, "linhas": linhas}
+
+
+# =============================
+# Alertas ativos (dedupe entre cargas e reinícios)
+# =============================
+def garantir_alertas(con):
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS alertas (chave TEXT PRIMARY KEY, regra TEXT, nivel TEXT, produto TEXT,"
+        " mensagem TEXT, desde TEXT) WITHOUT ROWID"
+    )
+
+def registrar_alertas(lista, quando=None, caminho=None):
+    # devolve só os alertas que não estavam ativos; os que pararam de disparar saem da tabela
+    quando = (quando or datetime.now()).strftime(FORMATO_DATA)
+    with closing(conectar(caminho)) as con:
+        garantir_alertas(con)
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            ativos = {r[0] for r in con.execute("SELECT chave FROM alertas")}
+            atuais = set(lista["chave"])
+            con.executemany("DELETE FROM alertas WHERE chave = ?", [(c,) for c in ativos - atuais])
+            novos = lista[~lista["chave"].isin(ativos)]
+            con.executemany(
+                "INSERT INTO alertas (chave, regra, nivel, produto, mensagem, desde) VALUES (?, ?, ?, ?, ?, ?)",
+                [(a.chave, a.regra, a.nivel, a.PRODUTO, a.mensagem, quando) for a in novos.itertuples(index=False)],
+            )
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+    return novos.reset_index(drop=True)
+
+
+# =============================
+# Consultas
+# =============================
+def intervalo_mes(mes):
+    # "YYYY-MM" -> [início, início do mês seguinte) — usa o índice de DATA
+    ini = pd.Period(mes, freq="M")
+    return ini.start_time.strftime("%Y-%m-%d"), (ini + 1).start_time.strftime("%Y-%m-%d")
+
+def filtro_mes(mes):
+    if not mes or mes == "Todos":
+        return "", ()
+    return " WHERE DATA >= ? AND DATA < ?", intervalo_mes(mes)
+
+def versao(caminho=None):
+    # hash de conteúdo de cada aba gravada -> chave de cache por versão dos dados
+    with closing(conectar(caminho)) as con:
+        garantir_meta(con)
+        dados = dict(con.execute("SELECT aba, hash FROM meta").fetchall())
+    return {aba: dados.get(aba, "") for aba in TABELAS}
+
+def existe(con, tabela):
+    return bool(colunas_tabela(con, tabela))
+
+def meses(caminho=None):
+    with closing(conectar(caminho)) as con:
+        if not existe(con, "vendas"):
+            return []
+        rows = con.execute("SELECT DISTINCT substr(DATA, 1, 7) FROM vendas WHERE DATA IS NOT NULL ORDER BY 1 DESC").fetchall()
+    return [r[0] for r in rows]
+
+def expr_lucro(cols_v, metodo=CUSTEIO):
+    # lucro pelo custo vigente na data da venda (custo.py); linhas antigas sem custo caem no da planilha
+    coluna = COLUNA_CUSTO[metodo]
+    if {"VALOR VENDA", "QTD", coluna} <= set(cols_v):
+        reserva = ', "MEDIA CUSTO UNITARIO"' if "MEDIA CUSTO UNITARIO" in cols_v and coluna != "MEDIA CUSTO UNITARIO" else ""
+        return f'(COALESCE("VALOR VENDA",0) - COALESCE({q(coluna)}{reserva},0))*COALESCE(QTD,0)'
+    if {"LUCRO UNITARIO", "QTD"} <= set(cols_v):
+        return 'COALESCE("LUCRO UNITARIO",0)*COALESCE(QTD,0)'
+    return "0"
+
+def kpis(mes="Todos", caminho=None):
+    where, args = filtro_mes(mes)
+    out = {"total_vendido": 0.0, "total_lucro": 0.0, "total_compras": 0.0,
+           "valor_custo_estoque": 0.0, "valor_venda_estoque": 0.0, "quantidade_total_itens": 0}
+    with closing(conectar(caminho)) as con:
+        cols_v = colunas_tabela(con, "vendas")
+        if cols_v:
+            lucro = expr_lucro(cols_v)
+            total = 'COALESCE("VALOR TOTAL",0)' if "VALOR TOTAL" in cols_v else "0"
+            r = con.execute(f"SELECT COALESCE(SUM({total}),0), COALESCE(SUM({lucro}),0) FROM vendas{where}", args).fetchone()
+            out["total_vendido"], out["total_lucro"] = r
+        if "CUSTO TOTAL (RECALC)" in colunas_tabela(con, "compras"):
+            r = con.execute(f'SELECT COALESCE(SUM("CUSTO TOTAL (RECALC)"),0) FROM compras{where}', args).fetchone()
+            out["total_compras"] = r[0]
+        if {"Media C. UNITARIO", "Valor Venda Sugerido", "EM ESTOQUE"} <= set(colunas_tabela(con, "estoque")):
+            r = con.execute(
+                'SELECT COALESCE(SUM(COALESCE("Media C. UNITARIO",0)*"EM ESTOQUE"),0),'
+                ' COALESCE(SUM(COALESCE("Valor Venda Sugerido",0)*"EM ESTOQUE"),0),'
+                ' COALESCE(SUM("EM ESTOQUE"),0) FROM estoque'
+            ).fetchone()
+            out["valor_custo_estoque"], out["valor_venda_estoque"], out["quantidade_total_itens"] = r[0], r[1], int(r[2])
+    return out
+
+def top5(limite=5, caminho=None):
+    with closing(conectar(caminho)) as con:
+        if not {"PRODUTO", "QTD"} <= set(colunas_tabela(con, "vendas")):
+            return pd.DataFrame(columns=["PRODUTO", "QTD"])
+        return pd.read_sql_query(
+            "SELECT PRODUTO, SUM(QTD) AS QTD FROM vendas WHERE PRODUTO IS NOT NULL"
+            " GROUP BY PRODUTO ORDER BY QTD DESC, PRODUTO LIMIT ?",
+            con, params=(limite,),
+        )
+
+def encalhados(hoje=None, limite=10, caminho=None):
+    hoje = pd.Timestamp(hoje or pd.Timestamp.now()).normalize().strftime("%Y-%m-%d")
+    with closing(conectar(caminho)) as con:
+        if not existe(con, "estoque"):
+            return pd.DataFrame()
+        ult_venda = "SELECT PRODUTO, MAX(DATA) AS ULT_VENDA FROM vendas GROUP BY PRODUTO" if existe(con, "vendas") else "SELECT NULL AS PRODUTO, NULL AS ULT_VENDA"
+        ult_compra = "SELECT PRODUTO, MAX(DATA) AS ULT_COMPRA FROM compras GROUP BY PRODUTO" if existe(con, "compras") else "SELECT NULL AS PRODUTO, NULL AS ULT_COMPRA"
+        df = pd.read_sql_query(
+            f"""
+            SELECT e.*, v.ULT_VENDA, c.ULT_COMPRA,
+                   CAST(COALESCE(julianday(:hoje) - julianday(v.ULT_VENDA),
+                                 julianday(:hoje) - julianday(c.ULT_COMPRA),
+                                 9999) AS INTEGER) AS DIAS_PARADO
+            FROM estoque e
+            LEFT JOIN ({ult_venda}) v ON v.PRODUTO = e.PRODUTO
+            LEFT JOIN ({ult_compra}) c ON c.PRODUTO = e.PRODUTO
+            WHERE e."EM ESTOQUE" > 0
+            ORDER BY DIAS_PARADO DESC
+            LIMIT :limite
+            """,
+            con, params={"hoje": hoje, "limite": limite}, parse_dates=datas("ULT_VENDA", "ULT_COMPRA"),
+        )
+    return df
+
+def vendas_periodo(mes="Todos", caminho=None):
+    where, args = filtro_mes(mes)
+    with closing(conectar(caminho)) as con:
+        if not existe(con, "vendas"):
+            return pd.DataFrame()
+        df = pd.read_sql_query(f"SELECT * FROM vendas{where} ORDER BY DATA DESC", con, params=args, parse_dates=datas("DATA"))
+    # colunas só do histórico antigo (sumiram da planilha) e vazias no período não entram na tela
+    return df.loc[:, df.notna().any() | df.columns.isin(["DATA", "PRODUTO", "QTD", "VALOR TOTAL"])]
+
+def vendas_diarias(produto=None, caminho=None):
+    # agregado por dia direto no SQL (índice PRODUTO, DATA quando filtra produto)
+    with closing(conectar(caminho)) as con:
+        cols = set(colunas_tabela(con, "vendas"))
+        if "DATA" not in cols:
+            return pd.DataFrame(columns=["DATA", "VALOR TOTAL", "QTD"])
+        total = 'COALESCE("VALOR TOTAL",0)' if "VALOR TOTAL" in cols else "0"
+        qtd = "COALESCE(QTD,0)" if "QTD" in cols else "0"
+        where, args = " WHERE DATA IS NOT NULL", ()
+        if produto:
+            where, args = " WHERE PRODUTO = ? AND DATA IS NOT NULL", (produto,)
+        df = pd.read_sql_query(
+            f'SELECT substr(DATA, 1, 10) AS DATA, SUM({total}) AS "VALOR TOTAL", SUM({qtd}) AS QTD'
+            f" FROM vendas{where} GROUP BY 1 ORDER BY 1",
+            con, params=args, parse_dates=datas("DATA", formato="%Y-%m-%d"),
+        )
+    df["QTD"] = df["QTD"].astype("int64")
+    return df
+
+def base_catalogo(caminho=None):
+    # mesmas entradas do catálogo do dashboard (artefatos), lidas do armazém: foto atual do estoque,
+    # QTD vendida por produto e última compra
+    vazio_v = pd.DataFrame({"PRODUTO": pd.Series(dtype=object), "TOTAL_QTD": pd.Series(dtype="float64")})
+    vazio_c = pd.DataFrame({"PRODUTO": pd.Series(dtype=object), "ULT_COMPRA": pd.Series(dtype="datetime64[ns]")})
+    with closing(conectar(caminho)) as con:
+        if not existe(con, "estoque"):
+            return pd.DataFrame(), vazio_v, vazio_c
+        estoque = pd.read_sql_query("SELECT * FROM estoque", con)
+        vend, ult = vazio_v, vazio_c
+        if {"PRODUTO", "QTD"} <= set(colunas_tabela(con, "vendas")):
+            vend = pd.read_sql_query(
+                "SELECT PRODUTO, SUM(QTD) AS TOTAL_QTD FROM vendas WHERE PRODUTO IS NOT NULL GROUP BY PRODUTO", con
+            )
+        if {"PRODUTO", "DATA"} <= set(colunas_tabela(con, "compras")):
+            ult = pd.read_sql_query(
+                "SELECT PRODUTO, MAX(DATA) AS ULT_COMPRA FROM compras WHERE PRODUTO IS NOT NULL GROUP BY PRODUTO",
+                con, parse_dates=datas("ULT_COMPRA"),
+            )
+    return estoque, vend, ult
+
+def produtos_vendidos(caminho=None):
+    with closing(conectar(caminho)) as con:
+        if "PRODUTO" not in colunas_tabela(con, "vendas"):
+            return []
+        return [r[0] for r in con.execute("SELECT DISTINCT PRODUTO FROM vendas WHERE PRODUTO IS NOT NULL ORDER BY 1")]
@@ -0,0 +1,143 @@
+# artefatos.py — Grafo de artefatos derivados, memoizados pelo hash das abas que cada um usa
+import hashlib
+import threading
+
+import pandas as pd
+
+from alertas import calcular_alertas
+from busca import indice_busca
+from custo import custear_vendas
+from giro import calcular_giro
+from matriz import matriz_vendas
+
+
+# =============================
+# Hash de conteúdo
+# =============================
+def hash_df(df):
+    h = hashlib.sha1()
+    if df is None:
+        return "none"
+    h.update(repr([str(c) for c in df.columns]).encode())
+    try:
+        valores = pd.util.hash_pandas_object(df, index=False)
+    except TypeError:
+        valores = pd.util.hash_pandas_object(df.astype(str), index=False)
+    h.update(valores.to_numpy().tobytes())
+    return h.hexdigest()
+
+def hash_valor(v):
+    if isinstance(v, pd.DataFrame):
+        return hash_df(v)
+    return hashlib.sha1(repr(v).encode()).hexdigest()
+
+
+# =============================
+# Grafo
+# =============================
+class GrafoArtefatos:
+    def __init__(self):
+        self.nos = {}            # nome -> (deps, func)
+        self.cache = {}          # nome -> (chave, valor)
+        self.hashes = {}         # hashes das entradas na última atualização
+        self.recalculados = []   # nós recalculados na última atualização
+        self.chaves = {}         # nó -> chave na última atualização
+        self._lock = threading.Lock()
+
+    def no(self, nome, deps, func):
+        # deps = entradas (abas, "HOJE") ou nós já registrados -> ordem de registro já é topológica
+        self.nos[nome] = (list(deps), func)
+        return self
+
+    def atualizar(self, entradas):
+        with self._lock:
+            hashes = {k: hash_valor(v) for k, v in entradas.items()}
+            valores = dict(entradas)
+            recalc = []
+            for nome, (deps, func) in self.nos.items():
+                chave = hashlib.sha1("|".join(f"{d}={hashes[d]}" for d in deps).encode()).hexdigest()
+                anterior = self.cache.get(nome)
+                if anterior is not None and anterior[0] == chave:
+                    valor = anterior[1]
+                else:
+                    valor = func(*[valores[d] for d in deps])
+                    self.cache[nome] = (chave, valor)
+                    recalc.append(nome)
+                valores[nome] = valor
+                hashes[nome] = chave
+            self.hashes = {k: hashes[k] for k in entradas}
+            self.recalculados = recalc
+            self.chaves = {nome: hashes[nome] for nome in self.nos}
+            return {nome: valores[nome] for nome in self.nos}
+
+    def semear(self, valores):
+        # nome -> (chave, valor) vindo de fora (foto compartilhada): a próxima atualização com as
+        # mesmas entradas reaproveita em vez de recalcular
+        with self._lock:
+            for nome, (chave, valor) in valores.items():
+                if nome in self.nos:
+                    self.cache[nome] = (chave, valor)
+
+
+# =============================
+# Artefatos
+# =============================
+def estoque_tipado(estoque):
+    estoque_df = estoque.copy()
+    if not estoque_df.empty:
+        estoque_df["Media C. UNITARIO"] = estoque_df.get("Media C. UNITARIO", 0).fillna(0).astype(float)
+        estoque_df["Valor Venda Sugerido"] = estoque_df.get("Valor Venda Sugerido", 0).fillna(0).astype(float)
+        estoque_df["EM ESTOQUE"] = estoque_df.get("EM ESTOQUE", 0).fillna(0).astype(int)
+    return estoque_df
+
+def vendas_por_produto(vendas):
+    if vendas.empty or "PRODUTO" not in vendas.columns or "QTD" not in vendas.columns:
+        return pd.DataFrame(columns=["PRODUTO", "TOTAL_QTD"])
+    return vendas.groupby("PRODUTO")["QTD"].sum().reset_index().rename(columns={"QTD": "TOTAL_QTD"})
+
+def ultima_data(df, coluna):
+    if df.empty or "PRODUTO" not in df.columns or "DATA" not in df.columns:
+        return pd.DataFrame({"PRODUTO": pd.Series(dtype=object), coluna: pd.Series(dtype="datetime64[ns]")})
+    return df.dropna(subset=["PRODUTO"]).groupby("PRODUTO")["DATA"].max().reset_index().rename(columns={"DATA": coluna})
+
+def vendas_semanais(vendas):
+    # faturamento por semana ISO (o recorte do mês já vem aplicado em `vendas`)
+    if vendas.empty or "DATA" not in vendas.columns:
+        return pd.DataFrame(columns=["ANO", "SEMANA", "VALOR TOTAL"])
+    iso = vendas["DATA"].dt.isocalendar()
+    d = pd.DataFrame({
+        "ANO": vendas["DATA"].dt.year,
+        "SEMANA": iso.week,
+        "VALOR TOTAL": vendas.get("VALOR TOTAL", pd.Series(0.0, index=vendas.index)),
+    })
+    return d.groupby(["ANO", "SEMANA"], dropna=False)["VALOR TOTAL"].sum().reset_index()
+
+def catalogo(estoque_df, vend):
+    df = estoque_df.copy()
+    if not vend.empty:
+        df = df.merge(vend, how="left", on="PRODUTO").fillna({"TOTAL_QTD": 0})
+    else:
+        df["TOTAL_QTD"] = 0
+    return df
+
+
+def montar_grafo():
+    g = GrafoArtefatos()
+    g.no("estoque_tipado", ["ESTOQUE"], estoque_tipado)
+    g.no("vendas_por_produto", ["VENDAS"], vendas_por_produto)
+    g.no("ultima_compra", ["COMPRAS"], lambda c: ultima_data(c, "ULT_COMPRA"))
+    g.no("catalogo", ["estoque_tipado", "vendas_por_produto"], catalogo)
+    g.no("giro", ["estoque_tipado", "VENDAS", "HOJE"], calcular_giro)
+    g.no("indice_busca", ["catalogo", "ultima_compra"], indice_busca)
+    g.no("alertas", ["catalogo", "giro", "ultima_compra"], calcular_alertas)
+    g.no("vendas_custeadas", ["VENDAS", "COMPRAS"], custear_vendas)
+    g.no("matriz_vendas", ["VENDAS"], matriz_vendas)
+    return g
+
+def entradas_grafo(dfs, hoje=None):
+    return {
+        "ESTOQUE": dfs.get("ESTOQUE", pd.DataFrame()),
+        "VENDAS": dfs.get("VENDAS", pd.DataFrame()),
+        "COMPRAS": dfs.get("COMPRAS", pd.DataFrame()),
+        "HOJE": (hoje or pd.Timestamp.now()).normalize().strftime("%Y-%m-%d"),
+    }
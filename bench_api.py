@@ -0,0 +1,133 @@
+# bench_api.py — Teste de carga da API (api.py): clientes simultâneos com keep-alive, latência por rota
+#
+#   python bench_api.py                              # sobe a API neste processo sobre LOJA_DB; níveis 1, 4, 16
+#   python bench_api.py --url http://127.0.0.1:8502 --niveis 8,32 --requisicoes 500
+#
+# Cada cliente mistura consultas de produto por nome, buscas, KPIs por mês, Top 5 e encalhados;
+# metade repete o ETag recebido (If-None-Match), como o PDV faz. Saída: p50/p95/p99 e req/s.
+# Com a API no mesmo processo, clientes e servidor dividem o GIL: o número é pessimista.
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import quote, urlencode, urlsplit
+
+import numpy as np
+
+from api import criar_servidor
+
+
+def pedir(con, caminho, etag=None):
+    cabecalhos = {"If-None-Match": etag} if etag else {}
+    con.request("GET", caminho, headers=cabecalhos)
+    r = con.getresponse()
+    corpo = r.read()
+    return r.status, r.getheader("ETag"), corpo
+
+def roteiro(nomes, meses, rnd):
+    # rota -> caminho sorteado
+    termos = ["fone", "cabo", "kit", "carregador", "x", ""]
+    escolhas = [
+        ("produto", lambda: "/produtos/" + quote(rnd.choice(nomes), safe="")),
+        ("busca", lambda: "/produtos?" + urlencode({"q": rnd.choice(termos), "ordenar": "Mais vendidos", "limite": 20})),
+        ("kpis", lambda: "/kpis?" + urlencode({"mes": rnd.choice(meses)})),
+        ("top5", lambda: "/top5"),
+        ("encalhados", lambda: "/encalhados"),
+    ]
+    pesos = [5, 3, 1, 0.5, 0.5]
+    while True:
+        yield rnd.choices(escolhas, pesos)[0]
+
+def cliente(indice, base, n, nomes, meses, latencias, erros, barreira):
+    rnd = random.Random(indice)
+    con = http.client.HTTPConnection(base.hostname, base.port, timeout=30)
+    etags = {}
+    barreira.wait()
+    passos = roteiro(nomes, meses, rnd)
+    for _ in range(n):
+        rota, montar = next(passos)
+        caminho = montar()
+        etag = etags.get(caminho) if rnd.random() < 0.5 else None
+        t = time.perf_counter()
+        status, novo, _ = pedir(con, caminho, etag)
+        latencias.append((rota, time.perf_counter() - t))
+        if status not in (200, 304):
+            erros.append(f"{status} {caminho}")
+        elif novo:
+            etags[caminho] = novo
+    con.close()
+
+def medir_nivel(base, clientes, requisicoes, nomes, meses):
+    latencias, erros = [], []
+    barreira = threading.Barrier(clientes)
+    threads = [
+        threading.Thread(target=cliente, args=(i, base, requisicoes, nomes, meses, latencias, erros, barreira), daemon=True)
+        for i in range(clientes)
+    ]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracao = time.perf_counter() - inicio
+    ms = np.array([s for _, s in latencias]) * 1000
+    return {
+        "clientes": clientes,
+        "req": len(ms),
+        "p50": float(np.percentile(ms, 50)),
+        "p95": float(np.percentile(ms, 95)),
+        "p99": float(np.percentile(ms, 99)),
+        "req_s": len(ms) / duracao if duracao else 0.0,
+        "erros": erros,
+        "p95_rota": {
+            rota: float(np.percentile([s * 1000 for r, s in latencias if r == rota], 95))
+            for rota in dict.fromkeys(r for r, _ in latencias)
+        },
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Teste de carga da API JSON da loja.")
+    ap.add_argument("--url", default=None, help="API já rodando (padrão: sobe uma neste processo)")
+    ap.add_argument("--niveis", default="1,4,16", help="clientes simultâneos por nível, separados por vírgula")
+    ap.add_argument("--requisicoes", type=int, default=300, help="requisições por cliente")
+    args = ap.parse_args()
+
+    servidor = None
+    if args.url is None:
+        servidor = criar_servidor(porta=0)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        args.url = f"http://127.0.0.1:{servidor.server_address[1]}"
+    base = urlsplit(args.url)
+
+    con = http.client.HTTPConnection(base.hostname, base.port, timeout=60)
+    _, _, corpo = pedir(con, "/produtos?limite=200&ordenar=Mais+vendidos")
+    nomes = [p["PRODUTO"] for p in json.loads(corpo)["itens"] if p.get("PRODUTO")] or ["?"]
+    _, _, corpo = pedir(con, "/meses")
+    meses = ["Todos"] + json.loads(corpo)["meses"]
+    con.close()
+    print(f"API: {args.url} • {len(nomes)} produtos, {len(meses) - 1} meses\n")
+
+    print(f"{'clientes':>9} {'req':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'erros':>6}")
+    resultados = []
+    try:
+        for n in [int(x) for x in args.niveis.split(",") if x.strip()]:
+            r = medir_nivel(base, n, args.requisicoes, nomes, meses)
+            resultados.append(r)
+            print(f"{r['clientes']:>9} {r['req']:>7} {r['p50']:>8.2f} {r['p95']:>8.2f} {r['p99']:>8.2f} {r['req_s']:>8.0f} {len(r['erros']):>6}")
+    finally:
+        if servidor is not None:
+            servidor.shutdown()
+    print()
+    print("p95 por rota (ms):")
+    for r in resultados:
+        print(f"  {r['clientes']:>3} clientes: " + ", ".join(f"{k} {v:.2f}" for k, v in r["p95_rota"].items()))
+    for r in resultados:
+        for e in dict.fromkeys(r["erros"]):
+            print(f"  [{r['clientes']} clientes] erro: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# bench_moeda.py — Formatação "R$": .map(formatar_reais_*) por valor x formatar_reais_serie vetorizada
+#
+#   python bench_moeda.py                       # 10k, 100k e 1M linhas
+#   python bench_moeda.py --linhas 50000 --repeticoes 7
+#
+# Dois perfis de coluna: preços de tabela (poucos valores distintos, como VALOR VENDA / custo
+# médio) e totais quase todos distintos (VALOR TOTAL, LUCRO TOTAL). Confere que a saída é idêntica.
+import argparse
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from moeda import formatar_reais_com_centavos, formatar_reais_sem_centavos, formatar_reais_serie
+
+
+def colunas(n, rnd):
+    precos = np.round(rnd.choice(rnd.uniform(5, 900, 400), n), 2)
+    totais = np.round(rnd.lognormal(5, 1.5, n), 2)
+    totais[rnd.random(n) < 0.01] = np.nan   # buracos da planilha
+    return {"preços (400 distintos)": pd.Series(precos), "totais (distintos)": pd.Series(totais)}
+
+def extremos():
+    # bordas da tabela de grupos (5 grupos = parte inteira < 10**15) e do float exato
+    base = [0.0, -0.0, 0.005, 999.995, 999_999_999_999_999.0, 1e15, 1e15 - 0.4, 2e15, 4.5e15, 2**52, 1e18, 1e300]
+    return pd.Series(base + [-v for v in base] + [np.nan, np.inf, -np.inf])
+
+def cronometrar(func, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        t = time.perf_counter()
+        func()
+        tempos.append(time.perf_counter() - t)
+    return statistics.median(tempos) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark do formatador de moeda (por valor x vetorizado).")
+    ap.add_argument("--linhas", default="10000,100000,1000000", help="tamanhos, separados por vírgula")
+    ap.add_argument("--repeticoes", type=int, default=5)
+    args = ap.parse_args()
+
+    for centavos, escalar in ((True, formatar_reais_com_centavos), (False, formatar_reais_sem_centavos)):
+        if not extremos().map(escalar).equals(formatar_reais_serie(extremos(), centavos)):
+            raise SystemExit(f"saída diferente: extremos, centavos={centavos}")
+
+    rnd = np.random.default_rng(42)
+    print(f"{'linhas':>9}  {'coluna':<24} {'formato':<14} {'.map ms':>9} {'vetor ms':>9} {'ganho':>7}")
+    for n in [int(x) for x in args.linhas.split(",") if x.strip()]:
+        for nome, serie in colunas(n, rnd).items():
+            for centavos, escalar in ((True, formatar_reais_com_centavos), (False, formatar_reais_sem_centavos)):
+                if not serie.map(escalar).equals(formatar_reais_serie(serie, centavos)):
+                    raise SystemExit(f"saída diferente: {nome}, centavos={centavos}")
+                t_map = cronometrar(lambda: serie.map(escalar), args.repeticoes)
+                t_vet = cronometrar(lambda: formatar_reais_serie(serie, centavos), args.repeticoes)
+                rotulo = "R$ 1.234,56" if centavos else "R$ 1.235"
+                print(f"{n:>9}  {nome:<24} {rotulo:<14} {t_map:>9.1f} {t_vet:>9.1f} {t_map / t_vet:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
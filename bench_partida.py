@@ -0,0 +1,135 @@
+# bench_partida.py — Partida a frio: custo de import por módulo e tempo até o primeiro KPI / página completa
+#
+#   python bench_partida.py                  # 5 partidas, download local sem atraso
+#   python bench_partida.py --atraso 1.5     # simula o export do Google demorando 1,5 s
+#
+# Cada partida roda num interpretador novo (= servidor reiniciado) com o armazém já populado
+# (snapshot quente dos dados). O tempo conta a partir do primeiro rerun do app.py.
+import argparse
+import functools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+AQUI = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(AQUI, "app.py")
+MODULOS = ["streamlit", "pandas", "numpy", "plotly.express", "requests", "pyarrow",
+           "planilha", "armazem", "artefatos", "exportacao", "perfil", "moeda"]
+
+
+# =============================
+# Planilha local (com atraso opcional)
+# =============================
+def servir_planilha(caminho, atraso=0.0):
+    pasta, nome = os.path.split(os.path.abspath(caminho))
+
+    class Handler(SimpleHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(atraso)
+            super().do_GET()
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Handler, directory=pasta))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}/" + nome.replace(" ", "%20")
+
+
+# =============================
+# Custo de import (interpretador novo por módulo)
+# =============================
+def custo_import(modulo, repeticoes=3):
+    codigo = f"import time; t = time.perf_counter(); import {modulo}; print(time.perf_counter() - t)"
+    tempos = []
+    for _ in range(repeticoes):
+        r = subprocess.run([sys.executable, "-c", codigo], cwd=AQUI, capture_output=True, text=True)
+        if r.returncode != 0:
+            return None
+        tempos.append(float(r.stdout.strip().splitlines()[-1]))
+    return statistics.median(tempos) * 1000
+
+
+# =============================
+# Filho: uma partida a frio medida por dentro
+# =============================
+def filho():
+    import streamlit as st
+    from streamlit.delta_generator import DeltaGenerator
+    from streamlit.testing.v1 import AppTest
+
+    marcas = {}
+    original = DeltaGenerator.markdown
+
+    def markdown(self, body, *args, **kw):
+        if 'class="kpi-row"' in str(body) and "kpi" not in marcas:
+            marcas["kpi"] = time.perf_counter()
+        return original(self, body, *args, **kw)
+
+    DeltaGenerator.markdown = markdown
+    st.markdown = functools.partial(markdown, st._main)
+
+    at = AppTest.from_file(APP, default_timeout=300)
+    inicio = time.perf_counter()
+    at.run()
+    fim = time.perf_counter()
+    print(json.dumps({
+        "kpi": (marcas["kpi"] - inicio) * 1000 if "kpi" in marcas else None,
+        "pagina": (fim - inicio) * 1000,
+        "erros": [str(e.value) for e in at.exception],
+    }))
+
+def partida(ambiente):
+    r = subprocess.run([sys.executable, os.path.abspath(__file__), "--filho"], cwd=AQUI, env=ambiente,
+                       capture_output=True, text=True)
+    for linha in reversed(r.stdout.strip().splitlines()):
+        if linha.startswith("{"):
+            return json.loads(linha)
+    raise RuntimeError(r.stderr[-2000:])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark de partida a frio do dashboard.")
+    ap.add_argument("--partidas", type=int, default=5)
+    ap.add_argument("--atraso", type=float, default=0.0, help="atraso do download da planilha (s)")
+    ap.add_argument("--planilha", default=os.path.join(AQUI, "LOJA IMPORTADOS.xlsx"))
+    ap.add_argument("--sem-imports", action="store_true", help="pula a tabela de custo de import")
+    ap.add_argument("--filho", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.filho:
+        return filho()
+
+    if not args.sem_imports:
+        print("import (interpretador novo, mediana de 3, inclui dependências):")
+        for m in MODULOS:
+            ms = custo_import(m)
+            print(f"  {m:<16} " + (f"{ms:>7.0f} ms" if ms is not None else "   indisponível"))
+        print()
+
+    servidor, url = servir_planilha(args.planilha, args.atraso)
+    ambiente = dict(os.environ, LOJA_URL_PLANILHA=url,
+                    LOJA_DB=os.path.join(tempfile.mkdtemp(prefix="bench_partida_"), "loja.sqlite"))
+    try:
+        partida(ambiente)   # popula o armazém (snapshot quente); não entra na conta
+        resultados = [partida(ambiente) for _ in range(args.partidas)]
+    finally:
+        servidor.shutdown()
+
+    kpi = [r["kpi"] for r in resultados if r["kpi"] is not None]
+    pagina = [r["pagina"] for r in resultados]
+    print(f"partidas a frio: {len(resultados)} (atraso do download {args.atraso:.1f} s)")
+    if kpi:
+        print(f"  primeiro KPI    mediana {statistics.median(kpi):>7.0f} ms   máx {max(kpi):>7.0f} ms")
+    print(f"  página completa mediana {statistics.median(pagina):>7.0f} ms   máx {max(pagina):>7.0f} ms")
+    for e in dict.fromkeys(e for r in resultados for e in r["erros"]):
+        print(f"  erro: {e}")
+
+
+if __name__ == "__main__":
+    main()
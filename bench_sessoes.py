@@ -0,0 +1,279 @@
+# bench_sessoes.py — Teste de carga: N sessões simultâneas do app.py (AppTest) contra uma planilha servida localmente
+#
+#   python bench_sessoes.py                      # níveis 1, 2, 4, 8
+#   python bench_sessoes.py --niveis 1,4,16 --rodadas 3 --planilha "LOJA IMPORTADOS.xlsx"
+#
+# Cada sessão é um processo próprio (como abas de navegador em workers diferentes; AppTest em threads do
+# mesmo interpretador disputa o compilador e o registro de widgets) e roda um roteiro de interações
+# (mês, busca, paginação, filtros, ordenação). Só rerun válido (sem exceção, KPIs e widgets na tela) entra
+# na latência; os demais contam em erros e o script sai com código 1.
+# Saída: p50/p95/p99 de latência, reruns/s e pico de RSS (soma das sessões) por nível.
+import argparse
+import functools
+import multiprocessing
+import os
+import queue
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+AQUI = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(AQUI, "app.py")
+
+
+# =============================
+# Planilha local (substitui o export do Google)
+# =============================
+class Silencioso(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+def servir_planilha(caminho):
+    pasta, nome = os.path.split(os.path.abspath(caminho))
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Silencioso, directory=pasta))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_address[1]}/" + nome.replace(" ", "%20")
+    return servidor, url
+
+
+# =============================
+# Memória
+# =============================
+def rss_mb(pid="self"):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for linha in f:
+                if linha.startswith("VmRSS:"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def rss_sessoes(pids):
+    # soma das sessões vivas; fora do Linux: pico do maior processo filho (não volta a cair entre níveis)
+    medidas = [rss_mb(pid) for pid in pids]
+    if any(m is not None for m in medidas):
+        return sum(m for m in medidas if m is not None)
+    pico = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+class Amostrador:
+    def __init__(self, pids, intervalo=0.05):
+        self.pids = pids
+        self.intervalo = intervalo
+        self.pico = 0.0
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._rodar, daemon=True)
+
+    def _rodar(self):
+        while not self._parar.is_set():
+            self.pico = max(self.pico, rss_sessoes(self.pids()))
+            self._parar.wait(self.intervalo)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._thread.join()
+
+
+# =============================
+# Roteiro de uma sessão
+# =============================
+class WidgetAusente(RuntimeError):
+    pass
+
+def por_chave(widgets, chave):
+    # widget que o roteiro espera; sumiu (chave mudou, modo navegador…) = benchmark inválido, não passo pulado.
+    # Por chave, não por rótulo: "Ordenar por" também é o rótulo das tabelas da aba VENDAS
+    for w in widgets:
+        if w.key == chave:
+            return w
+    raise WidgetAusente(f"widget não encontrado: {chave!r}")
+
+def por_rotulo(widgets, rotulo):
+    # só o filtro de mês, que não tem chave (a identidade vem das opções)
+    for w in widgets:
+        if w.label == rotulo:
+            return w
+    raise WidgetAusente(f"widget não encontrado: {rotulo!r}")
+
+def modo_servidor(at):
+    # com a vitrine ligada o PESQUISAR é um iframe e o roteiro não tem o que clicar
+    vitrine = [t for t in at.toggle if t.key == "vitrine"]
+    if vitrine and vitrine[0].value:
+        vitrine[0].set_value(False)
+        at.run()
+
+def roteiro(at, rnd):
+    # cada passo muda um widget; o rerun é o que se mede
+    meses = por_rotulo(at.selectbox, "Filtrar por mês (YYYY-MM):")
+    if len(meses.options) > 1:
+        yield "mês", lambda: meses.select(rnd.choice(meses.options[1:]))
+    busca = por_chave(at.text_input, "pesq_busca")
+    yield "busca", lambda: busca.input(rnd.choice(["FONE", "CABO", "KIT", "CARREGADOR", "X"]))
+    avancar = por_chave(at.button, "pesq_avancar")
+    yield "página", lambda: avancar.click()
+    for chave in ("pesq_vendidos", "pesq_baixo"):
+        caixa = por_chave(at.checkbox, chave)
+        yield "filtro", lambda caixa=caixa: caixa.set_value(not caixa.value)
+    ordenar = por_chave(at.selectbox, "pesq_ordenar")
+    yield "ordenar", lambda: ordenar.select(rnd.choice(ordenar.options))
+    repor = [c for c in at.checkbox if c.key == "so_repor"]
+    if repor:
+        yield "repor", lambda: repor[0].set_value(not repor[0].value)
+    yield "limpar busca", lambda: busca.input("")
+
+def problemas(at):
+    # rerun que não executou de verdade (erro de compilação, exceção, tela sem KPIs) não é amostra de latência
+    saida = [f"{type(e).__name__}: {getattr(e, 'value', e)}" for e in list(at.exception) + list(at.error)]
+    if not any("Total Vendido" in m.value for m in at.markdown):
+        saida.append("KPIs ausentes")
+    return saida
+
+def sessao(indice, rodadas, timeout, barreira, fila):
+    # processo de uma sessão: devolve {"latencias", "erros", "inicio", "fim"} pela fila
+    resultado = {"indice": indice, "latencias": [], "erros": [], "inicio": None, "fim": None}
+    try:
+        _sessao(indice, rodadas, timeout, barreira, resultado)
+    except threading.BrokenBarrierError:
+        resultado["erros"].append("outra sessão falhou antes de abrir")
+    except Exception as e:
+        resultado["erros"].append(f"roteiro interrompido: {type(e).__name__}: {e}")
+        barreira.abort()   # quem ainda espera na barreira não fica preso
+    resultado["fim"] = time.time()
+    fila.put(resultado)
+
+def _sessao(indice, rodadas, timeout, barreira, resultado):
+    from streamlit.testing.v1 import AppTest
+    rnd = random.Random(indice)
+    at = AppTest.from_file(APP, default_timeout=timeout)
+
+    def rerun(nome):
+        t = time.perf_counter()
+        at.run()
+        duracao = time.perf_counter() - t
+        erros = problemas(at)
+        if erros:
+            resultado["erros"].extend(f"{nome}: {e}" for e in erros)
+        else:
+            resultado["latencias"].append((nome, duracao))
+        return not erros
+
+    barreira.wait()   # todas as sessões abrem juntas (pior caso: vários usuários no 🔄)
+    resultado["inicio"] = time.time()
+    if not rerun("abrir"):
+        return
+    modo_servidor(at)
+    for _ in range(rodadas):
+        for nome, acao in list(roteiro(at, rnd)):
+            acao()
+            if not rerun(nome):
+                return   # a tela do rerun falho não serve de base para o próximo passo
+
+
+# =============================
+# Nível de concorrência
+# =============================
+def medir_nivel(n, rodadas, timeout):
+    ctx = multiprocessing.get_context("spawn")   # processo limpo, sem herdar threads do servidor da planilha
+    barreira, fila = ctx.Barrier(n), ctx.Queue()
+    processos = [ctx.Process(target=sessao, args=(i, rodadas, timeout, barreira, fila), daemon=True) for i in range(n)]
+    vivos = lambda: [p.pid for p in processos if p.pid is not None and p.is_alive()]
+    resultados = {}
+    with Amostrador(vivos) as memoria:
+        for p in processos:
+            p.start()
+        while len(resultados) < n and any(p.is_alive() for p in processos):
+            try:
+                r = fila.get(timeout=0.5)
+                resultados[r["indice"]] = r
+            except queue.Empty:
+                pass   # confere de novo se algum processo morreu sem responder
+        while len(resultados) < n and not fila.empty():
+            r = fila.get()
+            resultados[r["indice"]] = r
+        for p in processos:
+            p.join()
+    latencias, erros = [], []
+    for i, p in enumerate(processos):
+        r = resultados.get(i)
+        if r is None:
+            erros.append(f"sessão {i}: processo terminou sem resultado (código {p.exitcode})")
+            continue
+        latencias.extend(r["latencias"])
+        erros.extend(f"sessão {i}: {e}" for e in r["erros"])
+    inicios = [r["inicio"] for r in resultados.values() if r["inicio"] is not None]
+    duracao = max(r["fim"] for r in resultados.values()) - min(inicios) if inicios else 0.0
+    ms = np.array([s for _, s in latencias]) * 1000
+    return {
+        "sessoes": n,
+        "reruns": len(ms),
+        "p50": float(np.percentile(ms, 50)) if len(ms) else float("nan"),
+        "p95": float(np.percentile(ms, 95)) if len(ms) else float("nan"),
+        "p99": float(np.percentile(ms, 99)) if len(ms) else float("nan"),
+        "max": float(ms.max()) if len(ms) else float("nan"),
+        "reruns_s": len(ms) / duracao if duracao else 0.0,
+        "rss_mb": memoria.pico,
+        "erros": erros,
+        "por_passo": {
+            nome: float(np.percentile([s * 1000 for p, s in latencias if p == nome], 50))
+            for nome in dict.fromkeys(p for p, _ in latencias)
+        },
+    }
+
+def imprimir(resultados):
+    print(f"{'sessões':>8} {'reruns':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'máx ms':>9} {'reruns/s':>9} {'RSS MB':>8} {'erros':>6}")
+    for r in resultados:
+        print(
+            f"{r['sessoes']:>8} {r['reruns']:>7} {r['p50']:>9.0f} {r['p95']:>9.0f} {r['p99']:>9.0f}"
+            f" {r['max']:>9.0f} {r['reruns_s']:>9.2f} {r['rss_mb']:>8.0f} {len(r['erros']):>6}"
+        )
+    print()
+    print("p50 por passo (ms):")
+    for r in resultados:
+        print(f"  {r['sessoes']:>3} sessões: " + ", ".join(f"{k} {v:.0f}" for k, v in r["por_passo"].items()))
+    for r in resultados:
+        for e in dict.fromkeys(r["erros"]):
+            print(f"  [{r['sessoes']} sessões] erro: {e}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Teste de carga do dashboard com sessões simultâneas (AppTest).")
+    ap.add_argument("--niveis", default="1,2,4,8", help="sessões simultâneas por nível, separadas por vírgula")
+    ap.add_argument("--rodadas", type=int, default=2, help="quantas vezes cada sessão repete o roteiro")
+    ap.add_argument("--planilha", default=os.path.join(AQUI, "LOJA IMPORTADOS.xlsx"), help="xlsx servido no lugar do export")
+    ap.add_argument("--timeout", type=float, default=300, help="timeout de cada rerun (s)")
+    args = ap.parse_args()
+
+    servidor, url = servir_planilha(args.planilha)
+    os.environ["LOJA_URL_PLANILHA"] = url
+    # armazém descartável: o teste não mexe no histórico real
+    os.environ["LOJA_DB"] = os.path.join(tempfile.mkdtemp(prefix="bench_sessoes_"), "loja.sqlite")
+    # o roteiro mexe nos widgets do PESQUISAR do servidor (no modo navegador os cliques não geram rerun);
+    # a sessão ainda desliga o toggle se ele abrir ligado
+    os.environ["LOJA_VITRINE"] = "0"
+    print(f"planilha local: {url}")
+    print(f"armazém: {os.environ['LOJA_DB']}\n")
+
+    resultados = []
+    try:
+        for n in [int(x) for x in args.niveis.split(",") if x.strip()]:
+            resultados.append(medir_nivel(n, args.rodadas, args.timeout))
+    finally:
+        servidor.shutdown()
+    imprimir(resultados)
+    if any(r["erros"] for r in resultados):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
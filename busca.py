@@ -0,0 +1,109 @@
+# busca.py — PESQUISAR: filtro/ordenação do catálogo em posições de linha + cache LRU por consulta
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+CAPACIDADE_BUSCA = 256   # consultas distintas guardadas (cada uma é só um array de posições)
+ESTOQUE_BAIXO = 3        # filtros "Baixo estoque (≤3)" / "Alto estoque (≥20)" (servidor e vitrine.py)
+ESTOQUE_ALTO = 20
+
+
+# =============================
+# Cache LRU (compartilhado entre sessões)
+# =============================
+class CacheLRU:
+    def __init__(self, capacidade=CAPACIDADE_BUSCA):
+        self.capacidade = capacidade
+        self.itens = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def obter(self, chave, calcular):
+        with self._lock:
+            if chave in self.itens:
+                self.itens.move_to_end(chave)
+                self.hits += 1
+                return self.itens[chave]
+            self.misses += 1
+        valor = calcular()
+        with self._lock:
+            self.itens[chave] = valor
+            self.itens.move_to_end(chave)
+            while len(self.itens) > self.capacidade:
+                self.itens.popitem(last=False)
+        return valor
+
+    def resumo(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "entradas": len(self.itens),
+                    "capacidade": self.capacidade, "taxa": self.hits / total if total else 0.0}
+
+
+# =============================
+# Índice por versão dos dados: uma permutação por ordenação + nomes já em casefold
+# =============================
+# ordenação -> (coluna, crescente); empates ficam na ordem do catálogo (sort estável)
+CHAVES_ORDENACAO = {
+    "Nome A–Z": ("PRODUTO", True),
+    "Nome Z–A": ("PRODUTO", False),
+    "Menor preço": ("Valor Venda Sugerido", True),
+    "Maior preço": ("Valor Venda Sugerido", False),
+    "Mais vendidos": ("TOTAL_QTD", False),
+    "Maior estoque": ("EM ESTOQUE", False),
+    "Última compra (recente)": ("ULT_COMPRA", False),
+    "Última compra (antiga)": ("ULT_COMPRA", True),
+}
+ORDENACOES = list(CHAVES_ORDENACAO)
+
+def indice_busca(catalogo, ultima_compra):
+    base = catalogo.reset_index(drop=True)
+    if not ultima_compra.empty and "PRODUTO" in base.columns:
+        base = base.assign(ULT_COMPRA=base["PRODUTO"].map(ultima_compra.set_index("PRODUTO")["ULT_COMPRA"]))
+    ordens = {}
+    for ordenar, (coluna, crescente) in CHAVES_ORDENACAO.items():
+        if coluna in base.columns:
+            ordem = base[coluna].sort_values(ascending=crescente, kind="stable", na_position="last").index
+            ordens[ordenar] = ordem.to_numpy(dtype=np.int32)
+        else:
+            ordens[ordenar] = np.arange(len(base), dtype=np.int32)
+    nomes = base["PRODUTO"].astype(str).str.casefold() if "PRODUTO" in base.columns else pd.Series([""] * len(base))
+    return {"ordens": ordens, "nomes": nomes}
+
+
+# =============================
+# Consulta -> posições de linha do catálogo (máscara ∩ permutação, sem sort)
+# =============================
+def normalizar_termo(termo):
+    return " ".join((termo or "").split()).casefold()
+
+def chave_consulta(versao, termo, filtros, ordenar):
+    return (versao, normalizar_termo(termo), tuple(bool(f) for f in filtros), ordenar)
+
+def mascara(catalogo, indice, termo, filtros):
+    filtro_baixo, filtro_alto, filtro_vendidos, filtro_sem_venda = filtros
+    m = np.ones(len(catalogo), dtype=bool)
+    termo = normalizar_termo(termo)
+    if termo:
+        m &= indice["nomes"].str.contains(termo, regex=False).to_numpy()
+    estoque = catalogo["EM ESTOQUE"].to_numpy() if "EM ESTOQUE" in catalogo.columns else None
+    vendidos = catalogo["TOTAL_QTD"].to_numpy() if "TOTAL_QTD" in catalogo.columns else None
+    if filtro_baixo and estoque is not None:
+        m &= estoque <= ESTOQUE_BAIXO
+    if filtro_alto and estoque is not None:
+        m &= estoque >= ESTOQUE_ALTO
+    if filtro_vendidos and vendidos is not None:
+        m &= vendidos > 0
+    if filtro_sem_venda and vendidos is not None:
+        m &= vendidos == 0
+    return m
+
+def filtrar_ordenar(catalogo, indice, termo, filtros, ordenar):
+    # devolve as posições (iloc) do catálogo já filtradas e na ordem pedida
+    ordem = indice["ordens"].get(ordenar)
+    if ordem is None:
+        ordem = np.arange(len(catalogo), dtype=np.int32)
+    return ordem[mascara(catalogo, indice, termo, filtros)[ordem]]
@@ -0,0 +1,227 @@
+# compartilhado.py — Foto dos dados compartilhada entre processos: abas limpas + artefatos em Arrow mapeado
+#
+#   .cache/compartilhado/<fonte>.json          ponteiro da versão atual (trocado com os.replace)
+#   .cache/compartilhado/<versão>/<nome>.arrow  uma tabela por arquivo (Arrow IPC, sem compressão)
+#
+# Quem carrega a planilha publica a versão (nome = hash das abas/artefatos) e passa a usar os frames
+# mapeados; os outros processos do Streamlit mapeiam os mesmos arquivos. Colunas numéricas e de data
+# viram views somente leitura sobre o mmap e texto fica em "str" (Arrow), então as páginas são do
+# cache do sistema: uma cópia por máquina, não por processo/sessão.
+#
+# LOJA_COMPARTILHADO_VALIDADE=N (s): processo que acha uma versão publicada há menos de N s mapeia em vez
+# de baixar; a carga passa a ser um processo por vez (trava em arquivo). 0 = cada processo baixa (padrão).
+import contextlib
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+DISPONIVEL = importlib.util.find_spec("pyarrow") is not None
+
+AQUI = os.path.dirname(os.path.abspath(__file__))
+# LOJA_COMPARTILHADO=0 desliga (cada processo fica com os próprios frames)
+PASTA = os.environ.get("LOJA_COMPARTILHADO", os.path.join(AQUI, ".cache", "compartilhado"))
+ATIVO = DISPONIVEL and PASTA != "0"
+VALIDADE = float(os.environ.get("LOJA_COMPARTILHADO_VALIDADE", "0"))
+MANTER = 3   # versões guardadas (sessões antigas ainda com a anterior mapeada)
+# artefatos do grafo que vão para a foto (os demais são pequenos ou não são tabela)
+ARTEFATOS = ("estoque_tipado", "vendas_por_produto", "ultima_compra", "catalogo", "giro", "vendas_custeadas")
+
+TEXTO = pd.StringDtype("pyarrow", na_value=np.nan)   # NaN como faltante, igual à coluna object lida do xlsx
+DATA = b"datetime64[ns]"   # metadado do campo: int64 que volta como data (view, sem cópia)
+
+
+# =============================
+# DataFrame <-> tabela Arrow (sem nulos do Arrow onde dá: NaN/NaT ficam no próprio valor)
+# =============================
+def coluna_arrow(serie):
+    import pyarrow as pa
+    tipo = serie.dtype
+    if isinstance(tipo, np.dtype) and tipo.kind == "M":
+        return pa.array(serie.to_numpy().astype("datetime64[ns]").view("int64")), {b"loja": DATA}
+    if isinstance(tipo, np.dtype) and tipo.kind in "fiub":
+        return pa.array(serie.to_numpy()), None
+    if tipo == object or isinstance(tipo, pd.StringDtype):
+        # object só com str/NaN; object misto levanta e a tabela fica de fora
+        return pa.array(serie, type=pa.large_string(), from_pandas=True), None
+    return pa.array(serie, from_pandas=True), None   # Int64, category…: voltam com cópia
+
+def tabela_arrow(df):
+    import pyarrow as pa
+    colunas, campos = [], []
+    for nome in df.columns:
+        if not isinstance(nome, str):
+            raise TypeError(f"coluna não-texto: {nome!r}")
+        arr, meta = coluna_arrow(df[nome])
+        colunas.append(arr)
+        campos.append(pa.field(nome, arr.type, metadata=meta))
+    # índice só quando não é o 0..n-1 (vendas filtradas/custeadas podem ter buracos)
+    meta = {}
+    if not df.index.equals(pd.RangeIndex(len(df))):
+        if df.index.dtype.kind not in "iu":
+            raise TypeError("índice não inteiro")
+        meta[b"loja_indice"] = b"1"
+        colunas.append(pa.array(df.index.to_numpy()))
+        campos.append(pa.field("__indice__", colunas[-1].type))
+    return pa.Table.from_arrays(colunas, schema=pa.schema(campos, metadata=meta))
+
+def frame_pandas(tabela):
+    import pyarrow as pa
+    dados, indice = {}, None
+    for campo, coluna in zip(tabela.schema, tabela.columns):
+        if campo.name == "__indice__":
+            indice = coluna.to_numpy()
+        elif pa.types.is_large_string(campo.type) or pa.types.is_string(campo.type):
+            dados[campo.name] = pd.array(coluna, dtype=TEXTO)   # embrulha o ChunkedArray, sem cópia
+        elif (campo.metadata or {}).get(b"loja") == DATA:
+            dados[campo.name] = coluna.to_numpy().view("datetime64[ns]")
+        elif coluna.null_count == 0 and (pa.types.is_floating(campo.type) or pa.types.is_integer(campo.type)):
+            # sem nulos do Arrow: view somente leitura sobre o mmap
+            dados[campo.name] = coluna.to_numpy()
+        else:
+            dados[campo.name] = coluna.to_pandas().to_numpy()   # bool (bits), Int64 com faltantes…: cópia
+    # copy=False: um bloco por coluna, sem consolidar (consolidar = copiar tudo)
+    return pd.DataFrame(dados, index=indice if indice is not None else pd.RangeIndex(tabela.num_rows), copy=False)
+
+
+# =============================
+# Publicação (versão em pasta própria; ponteiro atômico)
+# =============================
+def chave_fonte(fonte):
+    return hashlib.sha1(json.dumps(fonte, default=str).encode()).hexdigest()[:16]
+
+def arquivo_ponteiro(fonte):
+    return os.path.join(PASTA, chave_fonte(fonte) + ".json")
+
+def gravar_tabela(df, destino):
+    import pyarrow as pa
+    tabela = tabela_arrow(df)
+    with pa.OSFile(destino, "wb") as f, pa.ipc.new_file(f, tabela.schema) as w:
+        w.write_table(tabela)
+
+def publicar(fonte, abas, artefatos, chaves):
+    # devolve o ponteiro (dict) da versão publicada; None se nada pôde ser publicado
+    if not ATIVO:
+        return None
+    import pyarrow as pa
+    tabelas = {**abas, **artefatos}
+    versao = hashlib.sha1(json.dumps([chave_fonte(fonte), sorted((n, chaves.get(n)) for n in tabelas)]).encode()).hexdigest()[:20]
+    pasta = os.path.join(PASTA, versao)
+    meta_arquivo = os.path.join(pasta, "meta.json")
+    if not os.path.exists(meta_arquivo):
+        os.makedirs(PASTA, exist_ok=True)
+        tmp = f"{pasta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(tmp, exist_ok=True)
+        publicadas = []
+        for nome, df in tabelas.items():
+            if not isinstance(df, pd.DataFrame):
+                continue
+            try:
+                gravar_tabela(df, os.path.join(tmp, nome + ".arrow"))
+                publicadas.append(nome)
+            except (TypeError, ValueError, pa.ArrowException):
+                pass   # coluna object mista etc.: essa tabela fica só no processo
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"versao": versao,
+                       "abas": [n for n in abas if n in publicadas],
+                       "artefatos": [n for n in artefatos if n in publicadas],
+                       "privadas": [n for n in abas if n not in publicadas],
+                       "chaves": {n: chaves.get(n) for n in publicadas}}, f)
+        try:
+            os.rename(tmp, pasta)   # pasta inteira aparece de uma vez
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)   # outro processo publicou a mesma versão antes
+        limpar()
+    with open(meta_arquivo, encoding="utf-8") as f:
+        meta = json.load(f)
+    meta["publicado"] = time.time()
+    ponteiro = arquivo_ponteiro(fonte)
+    tmp = f"{ponteiro}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, ponteiro)   # quem lê o ponteiro vê a versão antiga ou a nova, nunca metade
+    return meta
+
+def limpar():
+    # versões mais antigas saem do disco; no Linux quem ainda mapeia continua lendo até soltar
+    try:
+        versoes = sorted((e for e in os.scandir(PASTA) if e.is_dir() and not e.name.endswith(".tmp")),
+                         key=lambda e: e.stat().st_mtime, reverse=True)
+    except OSError:
+        return
+    em_uso = set()
+    for e in os.scandir(PASTA):
+        if e.name.endswith(".json"):
+            with contextlib.suppress(OSError, ValueError):
+                with open(e.path, encoding="utf-8") as f:
+                    em_uso.add(json.load(f).get("versao"))
+    for e in versoes[MANTER:]:
+        if e.name not in em_uso:
+            shutil.rmtree(e.path, ignore_errors=True)
+
+def atual(fonte):
+    try:
+        with open(arquivo_ponteiro(fonte), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def recente(fonte, validade=None):
+    # versão publicada por qualquer processo há menos de `validade` s (e ainda no disco)
+    validade = VALIDADE if validade is None else validade
+    if not ATIVO or validade <= 0:
+        return None
+    meta = atual(fonte)
+    if meta is None or time.time() - meta.get("publicado", 0) >= validade:
+        return None
+    if meta.get("privadas"):
+        return None   # alguma aba não coube no Arrow: esse processo precisa ler a planilha
+    if not os.path.isdir(os.path.join(PASTA, meta["versao"])):
+        return None
+    return meta
+
+@contextlib.contextmanager
+def trava(fonte):
+    # carga um processo por vez (só com validade: os outros esperam e mapeiam o que foi publicado)
+    if not ATIVO or VALIDADE <= 0 or importlib.util.find_spec("fcntl") is None:
+        yield
+        return
+    import fcntl
+    os.makedirs(PASTA, exist_ok=True)
+    with open(os.path.join(PASTA, chave_fonte(fonte) + ".trava"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# =============================
+# Mapeamento (uma vez por versão em cada processo)
+# =============================
+_abertas = {}   # versão -> (abas, artefatos); só as últimas, as antigas soltam o mmap quando ninguém mais usa
+_lock = threading.Lock()
+
+def abrir(meta):
+    import pyarrow as pa
+    versao = meta["versao"]
+    with _lock:
+        if versao in _abertas:
+            return _abertas[versao]
+        pasta = os.path.join(PASTA, versao)
+        frames = {}
+        for nome in meta["abas"] + meta["artefatos"]:
+            # o mmap fica aberto enquanto algum buffer (coluna) apontar para ele
+            mm = pa.memory_map(os.path.join(pasta, nome + ".arrow"), "r")
+            frames[nome] = frame_pandas(pa.ipc.open_file(mm).read_all())
+        aberta = ({n: frames[n] for n in meta["abas"]}, {n: frames[n] for n in meta["artefatos"]})
+        _abertas[versao] = aberta
+        for antiga in list(_abertas)[:-2]:
+            del _abertas[antiga]
+        return aberta
@@ -0,0 +1,130 @@
+# custo.py — Custo de cada venda a partir do histórico de COMPRAS: média ponderada móvel e camadas FIFO
+import os
+
+import numpy as np
+import pandas as pd
+
+# "medio": média ponderada das compras até a data da venda • "fifo": camadas mais antigas primeiro
+# "planilha": MEDIA CUSTO UNITARIO da própria linha (custo médio de hoje, comportamento antigo)
+METODOS = ("medio", "fifo", "planilha")
+CUSTEIO = os.environ.get("LOJA_CUSTEIO", "medio").strip().lower()
+if CUSTEIO not in METODOS:
+    CUSTEIO = "medio"
+COLUNA_CUSTO = {"medio": "CUSTO MEDIO DATA", "fifo": "CUSTO FIFO", "planilha": "MEDIA CUSTO UNITARIO"}
+NOMES_CUSTEIO = {"medio": "média ponderada na data", "fifo": "FIFO (camadas de compra)", "planilha": "custo médio da planilha"}
+
+
+# =============================
+# Compras válidas, em ordem de chegada por produto
+# =============================
+def compras_ordenadas(compras):
+    if compras is None or compras.empty or not {"DATA", "PRODUTO", "QUANTIDADE", "CUSTO UNITÁRIO"} <= set(compras.columns):
+        return pd.DataFrame({"PRODUTO": pd.Series(dtype=object), "DATA": pd.Series(dtype="datetime64[ns]"),
+                             "QUANTIDADE": pd.Series(dtype="float64"), "CUSTO UNITÁRIO": pd.Series(dtype="float64")})
+    c = compras[["PRODUTO", "DATA", "QUANTIDADE", "CUSTO UNITÁRIO"]]
+    c = c[c["PRODUTO"].notna() & c["DATA"].notna() & (c["QUANTIDADE"] > 0) & c["CUSTO UNITÁRIO"].notna()]
+    c = c.astype({"QUANTIDADE": "float64", "CUSTO UNITÁRIO": "float64"})
+    # a aba vem do mais recente para o mais antigo: inverte antes do sort estável (mesmo dia = ordem de lançamento)
+    return c.iloc[::-1].sort_values(["PRODUTO", "DATA"], kind="stable").reset_index(drop=True)
+
+
+# =============================
+# Média ponderada móvel (somas acumuladas por produto) + junção as-of com as vendas
+# =============================
+def custo_medio_movel(compras):
+    # uma linha por (produto, dia de compra): média de tudo o que foi comprado até aquele dia
+    c = compras_ordenadas(compras)
+    valor = c["QUANTIDADE"] * c["CUSTO UNITÁRIO"]
+    por_produto = c["PRODUTO"]
+    medio = valor.groupby(por_produto).cumsum() / c["QUANTIDADE"].groupby(por_produto).cumsum()
+    out = pd.DataFrame({"PRODUTO": c["PRODUTO"], "DATA": c["DATA"], "CUSTO_MEDIO": medio})
+    # várias compras no mesmo dia: vale a última (já soma todas)
+    return out.drop_duplicates(["PRODUTO", "DATA"], keep="last").reset_index(drop=True)
+
+def custo_na_data(vendas, tabela):
+    # custo médio vigente na DATA de cada venda (última compra no mesmo dia ou antes); NaN antes da 1ª compra
+    out = np.full(len(vendas), np.nan)
+    if tabela.empty or vendas.empty:
+        return out
+    produtos = pd.Index(pd.unique(pd.concat([tabela["PRODUTO"], vendas["PRODUTO"]], ignore_index=True).dropna()))
+    v = pd.DataFrame({"P": produtos.get_indexer(vendas["PRODUTO"]), "DATA": vendas["DATA"].to_numpy(), "i": np.arange(len(vendas))})
+    v = v[(v["P"] >= 0) & v["DATA"].notna()].sort_values("DATA", kind="stable")
+    t = pd.DataFrame({"P": produtos.get_indexer(tabela["PRODUTO"]), "DATA": tabela["DATA"].to_numpy(),
+                      "CUSTO_MEDIO": tabela["CUSTO_MEDIO"].to_numpy()}).sort_values("DATA", kind="stable")
+    m = pd.merge_asof(v, t, on="DATA", by="P", direction="backward")
+    out[m["i"].to_numpy()] = m["CUSTO_MEDIO"].to_numpy()
+    return out
+
+
+# =============================
+# FIFO: posição acumulada das unidades vendidas sobre a curva de custo acumulado das compras
+# =============================
+def custo_fifo(vendas, compras, reserva):
+    # custo unitário FIFO de cada venda; só as camadas compradas até a DATA da venda (mesmo dia conta).
+    # Unidades vendidas sem camada disponível (estoque anterior ao histórico, compra ainda não lançada)
+    # saem pelo custo `reserva` da linha e não consomem as camadas que chegam depois.
+    out = np.full(len(vendas), np.nan)
+    c = compras_ordenadas(compras)
+    if c.empty or vendas.empty:
+        return out
+    produtos = pd.Index(pd.unique(c["PRODUTO"]))
+    # curva global: produtos em sequência, unidades em ordem de chegada -> custo das primeiras u unidades
+    qtd = c["QUANTIDADE"].to_numpy()
+    unidades = np.concatenate([[0.0], np.cumsum(qtd)])
+    custo_acum = np.concatenate([[0.0], np.cumsum(qtd * c["CUSTO UNITÁRIO"].to_numpy())])
+    codigo_c = produtos.get_indexer(c["PRODUTO"])
+    inicio = np.zeros(len(produtos))
+    primeiro = np.flatnonzero(np.r_[True, codigo_c[1:] != codigo_c[:-1]])
+    inicio[codigo_c[primeiro]] = unidades[primeiro]
+    # unidades do produto compradas até cada dia de compra (último lançamento do dia já soma todos)
+    comprado = pd.DataFrame({"P": codigo_c, "DATA": c["DATA"].to_numpy(), "COMPRADO": unidades[1:] - inicio[codigo_c]})
+    comprado = comprado.drop_duplicates(["P", "DATA"], keep="last").sort_values("DATA", kind="stable")
+
+    p = produtos.get_indexer(vendas["PRODUTO"])
+    q = np.clip(pd.to_numeric(vendas.get("QTD", 0), errors="coerce").fillna(0).to_numpy(dtype="float64"), 0, None)
+    v = pd.DataFrame({"P": p, "DATA": vendas["DATA"].to_numpy(), "Q": q, "i": np.arange(len(vendas))})
+    v = v[(v["P"] >= 0) & v["DATA"].notna() & (v["Q"] > 0)]
+    # vendas também do mais antigo para o mais recente
+    v = v.iloc[::-1].sort_values(["P", "DATA"], kind="stable")
+    v["ORDEM"] = np.arange(len(v))
+    v = pd.merge_asof(v.sort_values("DATA", kind="stable"), comprado, on="DATA", by="P", direction="backward")
+    v = v.sort_values("ORDEM").reset_index(drop=True)
+    disponivel = v["COMPRADO"].fillna(0.0).to_numpy()
+    # consumido_k = min(consumido_{k-1} + Q_k, disponível_k), aberto: S_k + min(0, min_{j<=k}(disp_j - S_j))
+    vendido_ate = v.groupby("P")["Q"].cumsum().to_numpy()
+    folga = pd.Series(np.minimum(disponivel - vendido_ate, 0.0)).groupby(v["P"].to_numpy()).cummin().to_numpy()
+    P, Q = v["P"].to_numpy(), v["Q"].to_numpy()
+    b = vendido_ate + folga
+    a = np.r_[0.0, b[:-1]]
+    a[np.r_[True, P[1:] != P[:-1]]] = 0.0
+    coberto = np.interp(inicio[P] + b, unidades, custo_acum) - np.interp(inicio[P] + a, unidades, custo_acum)
+    i = v["i"].to_numpy()
+    resto = Q - (b - a)
+    reserva_i = reserva[i]
+    out[i] = (coberto + np.where(resto > 1e-9, resto * reserva_i, 0.0)) / Q
+    # parte sem camada e sem custo de reserva: desconhecido
+    out[i[(resto > 1e-9) & np.isnan(reserva_i)]] = np.nan
+    return out
+
+
+# =============================
+# VENDAS custeadas
+# =============================
+def custear_vendas(vendas, compras):
+    # acrescenta CUSTO MEDIO DATA e CUSTO FIFO (unitários); sem compra anterior vale o custo da planilha
+    if vendas is None or vendas.empty or not {"DATA", "PRODUTO"} <= set(vendas.columns):
+        return vendas
+    planilha = pd.to_numeric(vendas.get("MEDIA CUSTO UNITARIO", pd.Series(np.nan, index=vendas.index)), errors="coerce").to_numpy(dtype="float64")
+    medio = custo_na_data(vendas, custo_medio_movel(compras))
+    medio = np.where(np.isnan(medio), planilha, medio)
+    fifo = custo_fifo(vendas, compras, reserva=medio)
+    fifo = np.where(np.isnan(fifo), medio, fifo)
+    return vendas.assign(**{"CUSTO MEDIO DATA": medio, "CUSTO FIFO": fifo})
+
+def custo_vigente(vendas, metodo=CUSTEIO):
+    # custo unitário por linha no método escolhido, com a planilha como reserva
+    planilha = pd.to_numeric(vendas.get("MEDIA CUSTO UNITARIO", pd.Series(np.nan, index=vendas.index)), errors="coerce")
+    coluna = COLUNA_CUSTO[metodo]
+    if coluna not in vendas.columns:
+        return planilha
+    return pd.to_numeric(vendas[coluna], errors="coerce").fillna(planilha)
@@ -0,0 +1,102 @@
+# exportacao.py — Exportação em blocos (CSV BR ";" / Parquet) direto dos frames tipados
+import importlib.util
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# parquet é opcional; CSV sempre funciona. pyarrow só é importado quando alguém exporta parquet
+PARQUET_DISPONIVEL = importlib.util.find_spec("pyarrow") is not None
+
+TAMANHO_BLOCO = 50_000
+LIMITE_MEMORIA = 32 * 1024 * 1024   # acima disso o arquivo temporário vai para o disco
+
+
+def projetar(parte, colunas=None, renomear=None, derivar=None):
+    if derivar is not None:
+        parte = derivar(parte)
+    if colunas is not None:
+        parte = parte[[c for c in colunas if c in parte.columns]]
+    if renomear:
+        parte = parte.rename(columns=renomear)
+    return parte
+
+
+def blocos(df, tamanho=TAMANHO_BLOCO, **kw):
+    # cada bloco é projetado/derivado sozinho -> memória extra limitada ao tamanho do bloco
+    if len(df) == 0:
+        yield projetar(df.iloc[:0], **kw)
+        return
+    for ini in range(0, len(df), tamanho):
+        yield projetar(df.iloc[ini:ini + tamanho], **kw)
+
+
+# colunas em R$ (nomes já renomeados como saem no arquivo): só elas vão com 2 casas
+COLUNAS_MOEDA = {
+    "VALOR VENDA", "VALOR TOTAL", "MEDIA CUSTO UNITARIO", "LUCRO UNITARIO", "CUSTO MEDIO DATA", "CUSTO FIFO",
+    "CUSTO UNITÁRIO", "VENDA SUGERIDA", "VALOR TOTAL CUSTO", "VALOR TOTAL VENDA",
+}
+
+
+def formatar_csv(parte):
+    # moeda -> "1234,56"; contagem que virou float (merge/fillna) volta a inteiro; demais floats com
+    # precisão total (VEL_DIA, COBERTURA…); data sem hora fica dd/mm/aaaa, com hora mantém a hora
+    saida = {}
+    for c in parte.columns:
+        col = parte[c]
+        if pd.api.types.is_datetime64_any_dtype(col):
+            saida[c] = col.dt.strftime("%d/%m/%Y %H:%M:%S").str.replace(" 00:00:00", "", regex=False)
+        elif pd.api.types.is_float_dtype(col) and c in COLUNAS_MOEDA:
+            saida[c] = col.map(lambda v: "" if pd.isna(v) else f"{v:.2f}".replace(".", ","))
+        elif pd.api.types.is_float_dtype(col):
+            finitos = col[np.isfinite(col)]
+            if len(finitos) == col.notna().sum() and (finitos == np.round(finitos)).all() and (finitos.abs() < 2**53).all():
+                saida[c] = col.astype("Int64")
+    return parte.assign(**saida) if saida else parte
+
+
+def gravar_csv(df, destino, **kw):
+    primeiro = True
+    for parte in blocos(df, **kw):
+        texto = formatar_csv(parte).to_csv(sep=";", decimal=",", index=False, header=primeiro)
+        # BOM no início para o Excel abrir acentos corretamente
+        destino.write(("﻿" + texto if primeiro else texto).encode("utf-8"))
+        primeiro = False
+
+
+def gravar_parquet(df, destino, **kw):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    writer = None
+    try:
+        for parte in blocos(df, **kw):
+            # colunas texto/mistas viram string: o schema não depende de qual bloco veio primeiro
+            objetos = parte.select_dtypes(include="object").columns
+            if len(objetos):
+                parte = parte.astype({c: "string" for c in objetos})
+            if writer is None:
+                tabela = pa.Table.from_pandas(parte, preserve_index=False)
+                writer = pq.ParquetWriter(destino, tabela.schema, compression="zstd")
+            else:
+                tabela = pa.Table.from_pandas(parte, schema=writer.schema, preserve_index=False)
+            writer.write_table(tabela)   # um row group por bloco
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def gerar_arquivo(df, formato, **kw):
+    if callable(df):
+        df = df()   # frame montado só na hora de exportar
+    destino = tempfile.SpooledTemporaryFile(max_size=LIMITE_MEMORIA)
+    if formato == "parquet":
+        gravar_parquet(df, destino, **kw)
+    else:
+        gravar_csv(df, destino, **kw)
+    destino.seek(0)
+    return destino
+
+
+def exportador(df, formato, **kw):
+    # callable para st.download_button: só gera quando o usuário clica (em outra thread)
+    return lambda: gerar_arquivo(df, formato, **kw)
@@ -0,0 +1,61 @@
+# giro.py — Giro de vendas por SKU: unidades 7/30/90 dias, velocidade, cobertura e ponto de reposição
+import numpy as np
+import pandas as pd
+
+JANELAS = (7, 30, 90)
+LEAD_TIME_DIAS = 15      # prazo médio de chegada de um pedido de importação
+DIAS_SEGURANCA = 7       # estoque de segurança, em dias de venda
+
+COLUNAS_GIRO = ["PRODUTO"] + [f"QTD_{j}D" for j in JANELAS] + [
+    "VEL_DIA", "COBERTURA_DIAS", "PONTO_REPOSICAO", "REPOR", "ULT_VENDA", "DIAS_SEM_VENDER",
+]
+
+
+def calcular_giro(estoque_df, vendas, hoje, lead_time=LEAD_TIME_DIAS, seguranca=DIAS_SEGURANCA):
+    if estoque_df is None or estoque_df.empty or "PRODUTO" not in estoque_df.columns:
+        return pd.DataFrame(columns=COLUNAS_GIRO)
+    hoje = pd.Timestamp(hoje).normalize()
+    produtos = pd.Index(estoque_df["PRODUTO"].dropna().unique())
+    n = len(produtos)
+    janelas = np.asarray(JANELAS)
+
+    soma = np.zeros((n, len(janelas)))
+    ult = np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]")
+    if vendas is not None and not vendas.empty and {"PRODUTO", "DATA"} <= set(vendas.columns):
+        codigos = produtos.get_indexer(vendas["PRODUTO"])
+        datas = vendas["DATA"].to_numpy(dtype="datetime64[ns]")
+        qtd = pd.to_numeric(vendas["QTD"], errors="coerce").fillna(0).to_numpy("float64") if "QTD" in vendas.columns else np.ones(len(vendas))
+        ok = (codigos >= 0) & ~np.isnat(datas)
+        codigos, datas, qtd = codigos[ok], datas[ok], qtd[ok]
+
+        # última venda por SKU
+        if len(codigos):
+            ult_serie = pd.Series(datas).groupby(codigos).max()
+            ult[ult_serie.index.to_numpy()] = ult_serie.to_numpy()
+
+        # uma passada: cada venda cai no balde da menor janela que a contém; depois soma acumulada
+        idade = (np.datetime64(hoje, "ns") - datas).astype("timedelta64[D]").astype(np.int64)
+        balde = np.searchsorted(janelas, idade, side="right")
+        dentro = (idade >= 0) & (balde < len(janelas))
+        chaves = codigos[dentro] * len(janelas) + balde[dentro]
+        soma = np.bincount(chaves, weights=qtd[dentro], minlength=n * len(janelas)).reshape(n, len(janelas)).cumsum(axis=1)
+
+    giro = pd.DataFrame({"PRODUTO": produtos})
+    for i, j in enumerate(JANELAS):
+        giro[f"QTD_{j}D"] = soma[:, i].astype(np.int64)
+
+    # velocidade diária: janela de 30 dias; sem venda no mês, cai para a média de 90 dias
+    q30, q90 = soma[:, JANELAS.index(30)], soma[:, JANELAS.index(90)]
+    vel = np.where(q30 > 0, q30 / 30.0, q90 / 90.0)
+    giro["VEL_DIA"] = vel
+
+    em_estoque = estoque_df.drop_duplicates("PRODUTO").set_index("PRODUTO")["EM ESTOQUE"].reindex(produtos).fillna(0).to_numpy("float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        giro["COBERTURA_DIAS"] = np.where(vel > 0, em_estoque / vel, np.nan)
+    giro["PONTO_REPOSICAO"] = np.ceil(vel * (lead_time + seguranca)).astype(np.int64)
+    giro["REPOR"] = (vel > 0) & (em_estoque <= giro["PONTO_REPOSICAO"].to_numpy())
+
+    giro["ULT_VENDA"] = ult
+    giro["DIAS_SEM_VENDER"] = (np.datetime64(hoje, "ns") - ult).astype("timedelta64[D]").astype("float64")
+    giro.loc[np.isnat(ult), "DIAS_SEM_VENDER"] = np.nan
+    return giro
@@ -0,0 +1,106 @@
+# matriz.py — VENDAS como matriz esparsa produto × dia (CSR em numpy), montada uma vez por versão da aba
+#
+#   linha i = produto, coluna d = dias desde o primeiro dia com venda; só os dias com venda ocupam espaço
+#   indptr[i]:indptr[i+1] -> dias/qtd/valor do produto i, em ordem de dia
+#
+# As chaves (produto * ndias + dia) ficam ordenadas, então uma busca binária acha o começo/fim de qualquer
+# período em qualquer linha: fatia de um produto = O(vendas dele no período) e a soma de uma janela para
+# todos os produtos sai das somas acumuladas (sparklines da página inteira num bloco só).
+import numpy as np
+import pandas as pd
+
+MEDIDAS = ("QTD", "VALOR TOTAL")
+
+
+class MatrizVendas:
+    def __init__(self, produtos, dia0, ndias, indptr, dias, dados):
+        self.produtos = produtos          # pd.Index (linha -> PRODUTO)
+        self.dia0 = dia0                  # np.datetime64 [D] da coluna 0
+        self.ndias = ndias
+        self.indptr = indptr
+        self.dias = dias
+        self.dados = dados                # medida -> valores (mesma ordem de dias)
+        linha = np.repeat(np.arange(len(produtos), dtype=np.int64), np.diff(indptr))
+        self.chaves = linha * max(ndias, 1) + dias
+        self.acumulados = {m: np.concatenate([[0.0], np.cumsum(v)]) for m, v in dados.items()}
+
+    @property
+    def nnz(self):
+        return len(self.dias)
+
+    def coluna(self, dia):
+        # dia (Timestamp/str) -> índice de coluna; fora do histórico fica fora de [0, ndias)
+        if not self.ndias:
+            return 0
+        return int((np.datetime64(pd.Timestamp(dia).normalize(), "D") - self.dia0).astype(np.int64))
+
+    def periodo(self, hoje, dias):
+        # colunas [inicio, fim) dos últimos `dias` dias até hoje (inclusive)
+        fim = self.coluna(hoje) + 1
+        return fim - dias, fim
+
+    def linhas(self, nomes):
+        # PRODUTO -> linha (-1 = nunca vendeu)
+        return self.produtos.get_indexer(pd.Index(nomes))
+
+    def _limites(self, linhas, inicio, fim):
+        base = np.asarray(linhas, dtype=np.int64) * max(self.ndias, 1)
+        a = np.searchsorted(self.chaves, base + min(max(inicio, 0), self.ndias))
+        b = np.searchsorted(self.chaves, base + min(max(fim, 0), self.ndias))
+        return a, b
+
+    def somas(self, inicio, fim, medida="QTD"):
+        # soma de [inicio, fim) para todos os produtos (na ordem de self.produtos)
+        if inicio >= fim or not len(self.produtos):
+            return np.zeros(len(self.produtos))
+        a, b = self._limites(np.arange(len(self.produtos)), inicio, fim)
+        acum = self.acumulados[medida]
+        return acum[b] - acum[a]
+
+    def bloco(self, linhas, inicio, fim, medida="QTD"):
+        # matriz densa (len(linhas) × (fim - inicio)) só com as linhas pedidas; linha -1 = zeros
+        linhas = np.asarray(linhas, dtype=np.int64)
+        saida = np.zeros((len(linhas), max(fim - inicio, 0)))
+        validas = np.flatnonzero(linhas >= 0)
+        if not len(validas) or inicio >= fim:
+            return saida
+        a, b = self._limites(linhas[validas], inicio, fim)
+        cont = b - a
+        total = int(cont.sum())
+        if total:
+            # posições a[k]..b[k]-1 de todas as linhas num vetor só (sem laço por produto)
+            deslocamento = np.repeat(a - np.concatenate([[0], np.cumsum(cont)[:-1]]), cont)
+            pos = deslocamento + np.arange(total)
+            saida[np.repeat(validas, cont), self.dias[pos] - inicio] = self.dados[medida][pos]
+        return saida
+
+    def linha(self, nome, inicio, fim, medida="QTD"):
+        return self.bloco(self.linhas([nome]), inicio, fim, medida)[0]
+
+
+def matriz_vendas(vendas):
+    vazia = MatrizVendas(pd.Index([], dtype=object), np.datetime64("NaT", "D"), 0, np.zeros(1, dtype=np.int64),
+                         np.zeros(0, dtype=np.int64), {m: np.zeros(0) for m in MEDIDAS})
+    if vendas is None or vendas.empty or not {"PRODUTO", "DATA"} <= set(vendas.columns):
+        return vazia
+    datas = vendas["DATA"].to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+    ok = ~np.isnat(datas) & vendas["PRODUTO"].notna().to_numpy()
+    if not ok.any():
+        return vazia
+    codigos, produtos = pd.factorize(vendas["PRODUTO"].to_numpy()[ok], sort=True)
+    datas = datas[ok]
+    dia0 = datas.min()
+    ndias = int((datas.max() - dia0).astype(np.int64)) + 1
+    dias = (datas - dia0).astype(np.int64)
+    # vendas do mesmo produto no mesmo dia somam numa célula só
+    chaves, celula = np.unique(codigos.astype(np.int64) * ndias + dias, return_inverse=True)
+    dados = {}
+    for m in MEDIDAS:
+        if m in vendas.columns:
+            v = pd.to_numeric(vendas[m], errors="coerce").fillna(0).to_numpy("float64")[ok]
+        else:
+            v = np.full(len(codigos), 1.0 if m == "QTD" else 0.0)   # sem QTD: cada linha é uma unidade (como no giro)
+        dados[m] = np.bincount(celula, weights=v, minlength=len(chaves))
+    linha = chaves // ndias
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(linha, minlength=len(produtos)))])
+    return MatrizVendas(pd.Index(produtos), dia0, ndias, indptr, chaves - linha * ndias, dados)
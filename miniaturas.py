@@ -0,0 +1,133 @@
+# miniaturas.py — Fotos dos produtos (pasta local, arquivo com o nome do PRODUTO) -> miniaturas do tamanho do card
+#
+#   imagens/FONE M25 BLACK.jpg  ->  static/miniaturas/<sha1 do conteúdo>.webp  (128 px, ~3–6 KB)
+#
+# A miniatura é gerada uma vez por conteúdo (nome = hash dos bytes + parâmetros) e servida pelo
+# Streamlit em app/static/ com <img loading="lazy">: o navegador só baixa o que aparece na tela e
+# guarda em cache (o nome muda quando a foto muda). Sem static serving, vai embutida em data URI.
+import base64
+import hashlib
+import importlib.util
+import os
+import re
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+# Pillow é opcional (vem com o Streamlit); sem ele os cards ficam com o avatar de iniciais
+IMAGENS_DISPONIVEL = importlib.util.find_spec("PIL") is not None
+
+AQUI = os.path.dirname(os.path.abspath(__file__))
+PASTA_IMAGENS = os.environ.get("LOJA_IMAGENS", os.path.join(AQUI, "imagens"))
+# static/ ao lado do app.py = app/static/ com server.enableStaticServing (.streamlit/config.toml)
+PASTA_MINIATURAS = os.path.join(AQUI, "static", "miniaturas")
+URL_MINIATURAS = "app/static/miniaturas"
+EXTENSOES = (".webp", ".jpg", ".jpeg", ".png", ".gif", ".bmp")
+LADO = 128          # 2x o avatar de 64 px (telas de alta densidade)
+QUALIDADE = 70
+THREADS = 4         # Pillow solta o GIL no decode/resize/encode
+
+
+# =============================
+# PRODUTO -> arquivo da pasta
+# =============================
+def chave_nome(nome):
+    # sem acento, sem caixa, só letras/números: "Fone M25 (Black)" == "FONE-M25-BLACK.jpg"
+    s = unicodedata.normalize("NFKD", str(nome)).encode("ascii", "ignore").decode().casefold()
+    return re.sub(r"[^a-z0-9]+", "-", s).strip("-")
+
+_mapa = {"pasta": None, "mtime": None, "arquivos": {}}
+_lock = threading.Lock()
+
+def versao_imagens(pasta=PASTA_IMAGENS):
+    # muda quando entra/sai/renomeia foto: entra na chave de quem guarda URLs de miniatura
+    try:
+        return os.stat(pasta).st_mtime_ns
+    except OSError:
+        return None
+
+def mapa_imagens(pasta=PASTA_IMAGENS):
+    # relido só quando a pasta muda (arquivo novo/renomeado/removido)
+    mtime = versao_imagens(pasta)
+    if mtime is None:
+        return {}
+    with _lock:
+        if _mapa["pasta"] != pasta or _mapa["mtime"] != mtime:
+            arquivos = {}
+            for e in os.scandir(pasta):
+                base, ext = os.path.splitext(e.name)
+                if e.is_file() and ext.lower() in EXTENSOES:
+                    arquivos.setdefault(chave_nome(base), e.path)
+            _mapa.update(pasta=pasta, mtime=mtime, arquivos=arquivos)
+        return _mapa["arquivos"]
+
+
+# =============================
+# Miniatura (cache em disco por hash de conteúdo)
+# =============================
+_gerados = {}   # (caminho, mtime, tamanho) -> nome da miniatura (ou None se a foto não abre)
+
+def gerar(origem, destino):
+    from PIL import Image, ImageOps
+    with Image.open(origem) as img:
+        img.draft("RGB", (LADO * 2, LADO * 2))   # JPEG grande: decodifica já reduzido
+        img = ImageOps.exif_transpose(img)
+        img = img.convert("RGBA" if "A" in img.getbands() or img.mode == "P" else "RGB")
+        img.thumbnail((LADO, LADO), Image.LANCZOS)
+        tmp = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            img.save(tmp, "WEBP", quality=QUALIDADE, method=4)
+            os.replace(tmp, destino)   # outra sessão nunca vê arquivo pela metade
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+def chave_arquivo(origem):
+    try:
+        st = os.stat(origem)
+    except OSError:
+        return None
+    return (origem, st.st_mtime_ns, st.st_size)
+
+def miniatura(origem):
+    chave = chave_arquivo(origem)
+    if chave is None:
+        return None
+    if chave in _gerados:
+        return _gerados[chave]
+    with open(origem, "rb") as f:
+        h = hashlib.sha1(f.read())
+    h.update(f"{LADO}:{QUALIDADE}".encode())
+    nome = h.hexdigest()[:20] + ".webp"
+    destino = os.path.join(PASTA_MINIATURAS, nome)
+    if not os.path.exists(destino):
+        os.makedirs(PASTA_MINIATURAS, exist_ok=True)
+        try:
+            gerar(origem, destino)
+        except Exception:
+            nome = None   # arquivo corrompido/formato estranho: fica o avatar
+    _gerados[chave] = nome
+    return nome
+
+def miniaturas(produtos, pasta=PASTA_IMAGENS):
+    # PRODUTO -> nome da miniatura, só para os produtos que têm foto (as que faltam, em paralelo)
+    if not IMAGENS_DISPONIVEL:
+        return {}
+    arquivos = mapa_imagens(pasta)
+    if not arquivos:
+        return {}
+    origens = {p: arquivos.get(chave_nome(p)) for p in produtos}
+    origens = {p: o for p, o in origens.items() if o}
+    # já vistas (mesmo arquivo, mesmo mtime/tamanho) não passam nem pelo hash
+    pendentes = [o for o in set(origens.values()) if chave_arquivo(o) not in _gerados]
+    if len(pendentes) > 1:
+        with ThreadPoolExecutor(min(THREADS, len(pendentes))) as ex:
+            list(ex.map(miniatura, pendentes))
+    nomes = {p: miniatura(o) for p, o in origens.items()}
+    return {p: n for p, n in nomes.items() if n}
+
+def src_miniatura(nome, embutida=False):
+    if not embutida:
+        return f"{URL_MINIATURAS}/{nome}"
+    with open(os.path.join(PASTA_MINIATURAS, nome), "rb") as f:
+        return "data:image/webp;base64," + base64.b64encode(f.read()).decode()
@@ -0,0 +1,114 @@
+# moeda.py — Formatação "R$ 1.234,56": versão por valor (KPIs) e vetorizada por Series (tabelas, cards, rótulos)
+# sem pandas/numpy no topo: os KPIs usam a versão por valor antes dos imports pesados
+
+
+def formatar_reais_sem_centavos(v):
+    try: v=float(v)
+    except: return "R$ 0"
+    return f"R$ {f'{v:,.0f}'.replace(',', '.')}"
+
+def formatar_reais_com_centavos(v):
+    try: v=float(v)
+    except: return "R$ 0,00"
+    s = f"{v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return f"R$ {s}"
+
+def _float_ou_none(v):
+    try: return float(v)
+    except: return None
+
+
+# =============================
+# Vetorizada: mesma saída das funções acima, Series inteira de uma vez
+# =============================
+_tabelas = None
+
+def tabelas_moeda():
+    # pedaços prontos por grupo de 3 dígitos: cada valor vira 1–2 concatenações em vez de format + 3 replaces
+    global _tabelas
+    if _tabelas is None:
+        import numpy as np
+        grupos = np.array([str(h) for h in range(1000)], dtype=object)
+        cabeca = np.concatenate([np.add("R$ ", grupos), np.add("R$ -", grupos)])        # grupo da esquerda (+1000 = negativo)
+        meio = np.array([f".{g:03d}" for g in range(1000)], dtype=object)                  # grupos do meio
+        cent = np.array([f",{c:02d}" for c in range(100)], dtype=object)
+        cauda = np.add.outer(meio, cent).ravel()                                           # último grupo + centavos: g*100 + c
+        _tabelas = cabeca, meio, cent, cauda
+    return _tabelas
+
+def montar_reais(negativo, inteiro, cents=None):
+    # negativo: 0/1; inteiro: parte inteira (int64, < 10**15); cents: 0–99 ou None (sem centavos)
+    import numpy as np
+    cabeca, meio, cent, cauda = tabelas_moeda()
+    texto = np.empty(len(inteiro), dtype=object)
+    grupos = np.ones(len(inteiro), dtype=np.int64)
+    for k in range(1, 5):
+        grupos += inteiro >= 1000 ** k
+    for k in range(1, 6):
+        sel = np.flatnonzero(grupos == k)
+        if not len(sel):
+            continue
+        i = inteiro[sel]
+        t = cabeca[i // 1000 ** (k - 1) + 1000 * negativo[sel]]
+        for j in range(k - 2, 0, -1):
+            t = t + meio[(i // 1000 ** j) % 1000]
+        if k == 1:
+            if cents is not None:
+                t = t + cent[cents[sel]]
+        elif cents is not None:
+            t = t + cauda[(i % 1000) * 100 + cents[sel]]
+        else:
+            t = t + meio[i % 1000]
+        texto[sel] = t
+    return texto
+
+def formatar_reais_serie(valores, centavos=True):
+    import numpy as np
+    import pandas as pd
+
+    escalar = formatar_reais_com_centavos if centavos else formatar_reais_sem_centavos
+    if not pd.api.types.is_list_like(valores):
+        return escalar(valores)
+    serie = valores if isinstance(valores, pd.Series) else pd.Series(valores)
+    if serie.empty:
+        return pd.Series([], index=serie.index, dtype=object)
+
+    # cada valor distinto uma vez (preço unitário se repete muito)
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    unicos = pd.Series(unicos)
+    numerico = pd.api.types.is_numeric_dtype(unicos.dtype)
+    if numerico:
+        # NA de Int64/Float64 vira NaN, como no .map
+        num = unicos.to_numpy(dtype="float64", na_value=np.nan)
+        invalido = np.zeros(len(num), dtype=bool)
+    else:
+        # object/extensão: mesmas regras do float() da versão por valor
+        convertidos = [_float_ou_none(v) for v in unicos]
+        invalido = np.array([c is None for c in convertidos], dtype=bool)
+        num = np.array([np.nan if c is None else c for c in convertidos], dtype="float64")
+
+    escala = 100 if centavos else 1
+    with np.errstate(invalid="ignore", over="ignore"):
+        a = np.abs(num) * escala
+        r = np.rint(a)
+        # perto do meio centavo, grande demais para float exato ou parte inteira (já arredondada) >= 10**15
+        # (montar_reais só vai até 5 grupos): quem decide é o format() da versão por valor
+        exato = (np.isfinite(a) & (a < 2**52) & (r < 10**15 * escala)
+                 & (np.abs(a - np.floor(a) - 0.5) > 1e-6) & ~invalido)
+    r = np.where(exato, r, 0).astype("int64")
+    texto = montar_reais(np.signbit(num).astype("int64"), r // escala, r % escala if centavos else None)
+
+    resto = np.flatnonzero(~exato)
+    if len(resto):
+        texto[resto] = [escalar(None if invalido[i] else num[i]) for i in resto]
+    saida = texto[codigos]
+    # o factorize junta -0.0 com 0.0 e None com NaN; a versão por valor não
+    if numerico:
+        originais = serie.to_numpy(dtype="float64", na_value=np.nan)
+        pos = np.flatnonzero((originais == 0) & (np.signbit(originais) != np.signbit(num[codigos])))
+    else:
+        originais = serie.to_numpy(dtype=object)
+        pos = np.flatnonzero(serie.isna().to_numpy() | (num[codigos] == 0))
+    if len(pos):
+        saida[pos] = [escalar(originais[i]) for i in pos]
+    return pd.Series(saida, index=serie.index, dtype=object)
@@ -0,0 +1,65 @@
+# paginacao.py — Tabelas grandes paginadas no servidor: filtro por coluna e ordenação no frame tipado,
+# só a janela visível é formatada e vai para o navegador
+import re
+
+import numpy as np
+import pandas as pd
+
+POR_PAGINA = [25, 50, 100, 200, 500]
+
+# "> 10", "<= 2025-11-01", "!= 0" … (colunas numéricas e de data); texto puro = contém (sem caixa)
+EXPRESSAO = re.compile(r"^\s*(>=|<=|!=|=|>|<)\s*(.+?)\s*$")
+COMPARAR = {">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal,
+            "=": np.equal, "!=": np.not_equal}
+
+
+# =============================
+# Filtro de uma coluna
+# =============================
+def valor_filtro(serie, texto):
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        # 01/11/2025 (como aparece na tabela) ou 2025-11-01
+        iso = re.match(r"^\d{4}-\d{1,2}-\d{1,2}", texto)
+        return pd.Timestamp(pd.to_datetime(texto, dayfirst=not iso)).to_datetime64()
+    return float(texto.replace(".", "").replace(",", ".") if "," in texto else texto)
+
+def mascara_coluna(serie, texto):
+    # ValueError: expressão que não serve para o tipo da coluna (a tela avisa e ignora o filtro)
+    texto = (texto or "").strip()
+    if not texto:
+        return np.ones(len(serie), dtype=bool)
+    numerica = pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie)
+    data = pd.api.types.is_datetime64_any_dtype(serie)
+    if numerica or data:
+        m = EXPRESSAO.match(texto)
+        op, valor = (m.group(1), m.group(2)) if m else ("=", texto)
+        alvo = valor_filtro(serie, valor)
+        if data and op in ("=", "!=") and not re.search(r"\d{1,2}:\d{2}", valor):
+            # data sem hora: o dia inteiro
+            dia = serie.dt.normalize().to_numpy()
+            return (dia == alvo) if op == "=" else (dia != alvo)
+        valores = serie.to_numpy(dtype="datetime64[ns]") if data else serie.to_numpy(dtype="float64", na_value=np.nan)
+        with np.errstate(invalid="ignore"):
+            return COMPARAR[op](valores, alvo)
+    termo = " ".join(texto.split()).casefold()
+    return serie.astype(str).str.casefold().str.contains(termo, regex=False).to_numpy()
+
+
+# =============================
+# Posições (filtro ∩ ordenação) e janela
+# =============================
+def posicoes(df, coluna_filtro=None, texto="", ordenar_por=None, crescente=True):
+    # posições (iloc) do frame na ordem pedida; empates mantêm a ordem original, vazios no fim
+    m = mascara_coluna(df[coluna_filtro], texto) if coluna_filtro in df.columns else np.ones(len(df), dtype=bool)
+    pos = np.flatnonzero(m)
+    if ordenar_por in df.columns and len(pos):
+        serie = df[ordenar_por].iloc[pos].reset_index(drop=True)
+        ordem = serie.sort_values(ascending=crescente, kind="stable", na_position="last").index.to_numpy()
+        pos = pos[ordem]
+    return pos
+
+def janela(total, pagina, por_pagina):
+    paginas = max(1, -(-total // por_pagina))
+    pagina = max(1, min(int(pagina), paginas))
+    inicio = (pagina - 1) * por_pagina
+    return pagina, paginas, inicio, min(inicio + por_pagina, total)
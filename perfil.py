@@ -0,0 +1,163 @@
+# perfil.py — Perfil opcional de um rerun: amostragem de pilha (flamegraph/speedscope) ou cProfile (.prof)
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+
+from planilha import PASTA_CACHE
+
+PASTA_PERFIS = os.environ.get("LOJA_PASTA_PERFIS", os.path.join(PASTA_CACHE, "perfis"))
+MODOS = ("amostra", "cprofile")
+INTERVALO_AMOSTRA = 0.005   # 5 ms entre amostras
+MANTER_PERFIS = 50          # arquivos mais antigos em PASTA_PERFIS são apagados
+
+
+def modo_perfil(parametro=None):
+    # ?perfil=amostra|cprofile na URL ou LOJA_PERFIL no ambiente; "1"/"sim" = amostragem
+    valor = (parametro or os.environ.get("LOJA_PERFIL") or "").strip().lower()
+    if valor in MODOS:
+        return valor
+    if valor in ("1", "true", "sim", "on"):
+        return "amostra"
+    return None
+
+def rotulo(codigo, linha=None):
+    nome = os.path.basename(codigo.co_filename)
+    return f"{codigo.co_name} ({nome}:{linha if linha is not None else codigo.co_firstlineno})"
+
+
+def limpar_perfis(manter=MANTER_PERFIS):
+    arquivos = sorted((e for e in os.scandir(PASTA_PERFIS) if e.name.startswith("perfil-")),
+                      key=lambda e: e.name, reverse=True)
+    for e in arquivos[manter:]:
+        try:
+            os.remove(e.path)
+        except OSError:
+            pass
+
+
+class Perfil:
+    def __init__(self, modo, raiz=None, intervalo=INTERVALO_AMOSTRA):
+        self.modo = modo
+        self.raiz = os.path.abspath(raiz) if raiz else None   # arquivo do script: pilhas começam nele
+        self.intervalo = intervalo
+        self.pilhas = Counter()      # tupla de (código, linha) -> amostras
+        self.inicio = self.duracao = None
+        self.arquivo = None
+        self._prof = None
+        self._parar = threading.Event()
+        self._thread = None
+        self._alvo = None
+
+    @classmethod
+    def iniciar_se(cls, modo, **kw):
+        if modo is None:
+            return None
+        perfil = cls(modo, **kw)
+        perfil.iniciar()
+        return perfil
+
+    # ---------- coleta ----------
+    def iniciar(self):
+        self.inicio = time.perf_counter()
+        if self.modo == "cprofile":
+            self._prof = cProfile.Profile()
+            self._prof.enable()
+        else:
+            self._alvo = threading.get_ident()
+            self._thread = threading.Thread(target=self._amostrar, daemon=True)
+            self._thread.start()
+        return self
+
+    def _amostrar(self):
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self._alvo)
+            if frame is None:
+                break   # thread do script acabou (st.stop/exceção sem parar()): não fica amostrando à toa
+            pilha = []
+            while frame is not None:
+                pilha.append((frame.f_code, frame.f_lineno))
+                frame = frame.f_back
+            pilha.reverse()
+            if self.raiz:
+                # corta o runner do Streamlit: a pilha começa no <module> do script
+                for i, (codigo, _) in enumerate(pilha):
+                    if os.path.abspath(codigo.co_filename) == self.raiz:
+                        pilha = pilha[i:]
+                        break
+            if pilha:
+                self.pilhas[tuple(pilha)] += 1
+
+    def parar(self):
+        # idempotente: o rerun seguinte também chama (quando este foi interrompido antes do fim)
+        if self.duracao is not None:
+            return self.arquivo
+        if self.modo == "cprofile":
+            self._prof.disable()
+        else:
+            self._parar.set()
+            self._thread.join()
+        self.duracao = time.perf_counter() - self.inicio
+        self.arquivo = self.gravar()
+        return self.arquivo
+
+    # ---------- saída ----------
+    def gravar(self):
+        os.makedirs(PASTA_PERFIS, exist_ok=True)
+        base = os.path.join(PASTA_PERFIS, "perfil-" + datetime.now().strftime("%Y%m%d-%H%M%S-%f"))
+        if self.modo == "cprofile":
+            # .prof: snakeviz, flameprof, gprof2dot, pstats
+            caminho = base + ".prof"
+            self._prof.dump_stats(caminho)
+        else:
+            # pilhas colapsadas (Brendan Gregg): speedscope.app e flamegraph.pl abrem direto
+            caminho = base + ".txt"
+            with open(caminho, "w", encoding="utf-8") as f:
+                for pilha, n in self.pilhas.most_common():
+                    f.write(";".join(rotulo(c, l).replace(";", ",") for c, l in pilha) + f" {n}\n")
+        limpar_perfis()
+        return caminho
+
+    def top(self, n=25):
+        if self.modo == "cprofile":
+            stats = pstats.Stats(self._prof).stats
+            linhas = [
+                {"função": f"{nome} ({os.path.basename(arq)}:{linha})", "chamadas": nc,
+                 "cumulativo ms": ct * 1000, "próprio ms": tt * 1000}
+                for (arq, linha, nome), (cc, nc, tt, ct, _) in stats.items()
+            ]
+            df = pd.DataFrame(linhas, columns=["função", "chamadas", "cumulativo ms", "próprio ms"])
+        else:
+            cumulativo, proprio = Counter(), Counter()
+            for pilha, k in self.pilhas.items():
+                # recursão conta uma vez por amostra no cumulativo
+                for codigo in {c for c, _ in pilha}:
+                    cumulativo[codigo] += k
+                proprio[pilha[-1][0]] += k
+            ms = self.intervalo * 1000
+            df = pd.DataFrame(
+                [{"função": rotulo(c), "amostras": k, "cumulativo ms": k * ms, "próprio ms": proprio[c] * ms}
+                 for c, k in cumulativo.items()],
+                columns=["função", "amostras", "cumulativo ms", "próprio ms"],
+            )
+        return df.sort_values("cumulativo ms", ascending=False).head(n).round(1).reset_index(drop=True)
+
+    def linhas_quentes(self, n=15):
+        # só na amostragem: linhas do próprio script (loop dos cards etc.) com mais tempo acumulado
+        if self.modo == "cprofile" or not self.raiz:
+            return pd.DataFrame(columns=["linha", "amostras", "ms"])
+        por_linha = Counter()
+        for pilha, k in self.pilhas.items():
+            for linha in {l for c, l in pilha if os.path.abspath(c.co_filename) == self.raiz}:
+                por_linha[linha] += k
+        df = pd.DataFrame(
+            [{"linha": l, "amostras": k, "ms": k * self.intervalo * 1000} for l, k in por_linha.items()],
+            columns=["linha", "amostras", "ms"],
+        )
+        return df.sort_values("ms", ascending=False).head(n).round(1).reset_index(drop=True)
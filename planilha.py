@@ -0,0 +1,528 @@
+# planilha.py — Leitura, limpeza e normalização das abas (ESTOQUE / VENDAS / COMPRAS)
+import json
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+ABAS = ["ESTOQUE", "VENDAS", "COMPRAS"]
+PASTA_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+ARQUIVO_ESQUEMA = os.path.join(PASTA_CACHE, "esquema.json")
+TAMANHO_BLOCO_CSV = 100_000   # linhas por bloco na leitura em fluxo do CSV
+LINHAS_AMOSTRA_CSV = 12       # mesmo alcance de detectar_linha_cabecalho
+# abas lidas em processos separados (openpyxl é CPU + GIL); LOJA_PROCESSOS=1 desliga.
+# Paralelismo por aba: no máximo len(ABAS) processos, e a carga nunca fica mais rápida que a maior aba
+# (VENDAS) lida sozinha. Dividir a aba por faixa de linhas não ajuda: o openpyxl percorre o XML desde
+# o início mesmo com skiprows, então a segunda metade custa quase a aba inteira.
+PROCESSOS = int(os.environ.get("LOJA_PROCESSOS") or min(len(ABAS), os.cpu_count() or 1))
+LIMIAR_PARALELO = 2 * 1024 * 1024   # xlsx menor que isso: subir processos custa mais do que rende
+
+# =============================
+# Parsers
+# =============================
+def parse_money_value(x):
+    try:
+        if pd.isna(x): return float("nan")
+    except: pass
+    s=str(x).strip()
+    if s in ("","nan","none","-"): return float("nan")
+    s=re.sub(r"[^\d\.,\-]","",s)
+    if "." in s and "," in s: s=s.replace(".","").replace(",",".")
+    else:
+        if "," in s and "." not in s: s=s.replace(",",".")
+        if s.count(".")>1: s=s.replace(".","")
+    s=re.sub(r"[^\d\.\-]","",s)
+    try: return float(s)
+    except: return float("nan")
+
+def parse_money_series(serie):
+    return serie.astype(str).map(parse_money_value).astype("float64") if serie is not None else pd.Series(dtype="float64")
+
+def parse_int_series(serie):
+    def to_int(x):
+        try:
+            if pd.isna(x): return pd.NA
+        except: pass
+        s=re.sub(r"[^\d\-]","",str(x))
+        if s in ("","-","nan"): return pd.NA
+        try: return int(float(s))
+        except: return pd.NA
+    return serie.map(to_int).astype("Int64")
+
+# Versões "tipo conhecido": célula numérica do xlsx passa direto, só o resto cai no parser de texto
+def parse_money_typed(serie):
+    num = pd.to_numeric(serie, errors="coerce").astype("float64")
+    resto = num.isna() & serie.notna()
+    if resto.any():
+        num[resto] = parse_money_series(serie[resto])
+    return num
+
+def parse_int_typed(serie):
+    num = pd.to_numeric(serie, errors="coerce").astype("float64")
+    resto = num.isna() & serie.notna()
+    out = num.apply(np.trunc).astype("Int64")
+    if resto.any():
+        out[resto] = parse_int_series(serie[resto])
+    return out
+
+# Versões vetorizadas para texto (CSV): mesmas regras de parse_money_value, sem loop em Python
+def por_unicos(serie, func):
+    # preços/datas se repetem muito: converte cada valor distinto uma vez e espalha pelos códigos
+    codigos, unicos = pd.factorize(serie)
+    if len(unicos) == 0:
+        return func(serie)
+    valores = func(pd.Series(unicos, dtype=object)).to_numpy()
+    return pd.Series(valores.take(codigos), index=serie.index).mask(codigos < 0)
+
+def parse_money_texto(serie):
+    return por_unicos(serie, _parse_money_texto)
+
+def _parse_money_texto(serie):
+    s = serie.astype("string").str.replace(r"[^\d\.,\-]", "", regex=True)
+    ambos = s.str.contains(".", regex=False) & s.str.contains(",", regex=False)
+    s = s.mask(ambos, s.str.replace(".", "", regex=False))
+    s = s.str.replace(",", ".", regex=False)
+    s = s.mask(~ambos & (s.str.count(r"\.") > 1), s.str.replace(".", "", regex=False))
+    return pd.to_numeric(s, errors="coerce").astype("float64")
+
+def parse_data_texto(serie):
+    return por_unicos(serie, _parse_data_texto)
+
+def _parse_data_texto(serie):
+    # CSV do PDV vem em dd/mm/aaaa; o que não bater cai no parser genérico (dia primeiro)
+    d = pd.to_datetime(serie, format="%d/%m/%Y", errors="coerce")
+    resto = d.isna() & serie.notna()
+    if resto.any():
+        d[resto] = pd.to_datetime(serie[resto], format="mixed", dayfirst=True, errors="coerce")
+    return d
+
+# DATA convertida uma única vez, na normalização; dali para frente a coluna é sempre datetime64
+ORIGEM_EXCEL = pd.Timestamp("1899-12-30")   # dia 0 do serial de datas do Excel (Windows)
+
+def parse_data_typed(serie):
+    # célula datetime do xlsx passa direto; número = serial do Excel; texto = dd/mm/aaaa (fallback dia primeiro)
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    if pd.api.types.is_numeric_dtype(serie):
+        return data_serial_excel(serie)
+    return por_unicos(serie, _parse_data_typed)
+
+# o deslocamento é contado a partir de 1970 (Timedelta só vai a ~292 anos); serial válido: 1 (01/01/1900) até
+# antes de 11/04/2262, último dia de datetime64[ns] (o Excel vai a 2958465, 31/12/9999)
+EPOCA = pd.Timestamp("1970-01-01")
+SERIAL_EPOCA = (EPOCA - ORIGEM_EXCEL).days
+SERIAL_MAXIMO = SERIAL_EPOCA + (pd.Timestamp.max.normalize() - EPOCA).days   # exclusivo
+
+def data_serial_excel(serie):
+    # fora da faixa (yyyymmdd digitado como número, 1e9…) vira NaT, como no coerce, em vez de levantar
+    num = pd.to_numeric(serie, errors="coerce").astype("float64")
+    num = num.where((num >= 1) & (num < SERIAL_MAXIMO))
+    return EPOCA + pd.to_timedelta((num - SERIAL_EPOCA).round(6), unit="D")
+
+def _parse_data_typed(unicos):
+    # coluna mista (object): separa por tipo, cada grupo no caminho certo
+    texto = unicos.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+    numero = unicos.map(lambda v: isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool)).to_numpy(dtype=bool)
+    d = pd.Series(pd.NaT, index=unicos.index, dtype="datetime64[ns]")
+    if texto.any():
+        d[texto] = _parse_data_texto(unicos[texto])
+    if numero.any():
+        d[numero] = data_serial_excel(unicos[numero])
+    objetos = ~texto & ~numero
+    if objetos.any():
+        # datetime/date/Timestamp: conversão de tipo, sem parse de texto
+        d[objetos] = pd.to_datetime(unicos[objetos], errors="coerce")
+    return d
+
+def mes_ano(datas):
+    # "YYYY-MM" formatado por mês distinto, não por linha
+    meses = datas.to_numpy(dtype="datetime64[ns]").astype("datetime64[M]")
+    unicos, inverso = np.unique(meses, return_inverse=True)
+    textos = np.datetime_as_string(unicos, unit="M").astype(object)
+    textos[np.isnat(unicos)] = np.nan
+    return pd.Series(textos[inverso.reshape(-1)], index=datas.index)
+
+# =============================
+# Download / cabeçalho
+# =============================
+def carregar_xlsx_from_url(url):
+    import requests   # só quem baixa paga o import
+    r=requests.get(url,timeout=25)
+    r.raise_for_status()
+    return pd.ExcelFile(BytesIO(r.content))
+
+def detectar_linha_cabecalho(df_raw,keywords):
+    for i in range(min(len(df_raw),12)):
+        linha=" ".join(df_raw.iloc[i].astype(str).str.upper().tolist())
+        if any(kw.upper() in linha for kw in keywords): return i
+    return None
+
+# palavras que marcam a linha do cabeçalho de cada aba
+CABECALHOS = {"ESTOQUE": ["PRODUTO", "EM ESTOQUE"], "VENDAS": ["DATA", "PRODUTO"], "COMPRAS": ["DATA", "CUSTO"]}
+
+def linha_cabecalho(df_raw, nome):
+    return detectar_linha_cabecalho(df_raw, CABECALHOS.get(nome, ["PRODUTO"]))
+
+def limpar_aba_raw(df_raw,nome,linha=None):
+    if linha is None: linha=linha_cabecalho(df_raw,nome)
+    if linha is None: return None
+    df_tmp=df_raw.copy()
+    df_tmp.columns=df_tmp.iloc[linha]
+    df=df_tmp.iloc[linha+1:].copy()
+    df.columns=[str(c).strip() for c in df.columns]
+    df=df.drop(columns=[c for c in df.columns if str(c).lower() in ("nan","none","")],errors="ignore")
+    df=df.loc[:,~df.isna().all()]
+    return df.reset_index(drop=True)
+
+# =============================
+# Esquema por aba (linha do cabeçalho + mapa de colunas canônicas)
+# =============================
+# alvo canônico -> (tipo, aliases em ordem de preferência)
+ALIASES = {
+    "ESTOQUE": {
+        "Media C. UNITARIO": ("moeda", ["Media C. UNITARIO","MEDIA C. UNITARIO","MEDIA CUSTO UNITARIO","MEDIA C. UNIT"]),
+        "Valor Venda Sugerido": ("moeda", ["Valor Venda Sugerido","VALOR VENDA SUGERIDO","VALOR VENDA","VALOR_VENDA"]),
+        "EM ESTOQUE": ("inteiro", ["EM ESTOQUE","ESTOQUE","QTD","QUANTIDADE"]),
+    },
+    "VENDAS": {
+        "VALOR VENDA": ("moeda", ["VALOR VENDA","VALOR_VENDA","VALORVENDA"]),
+        "VALOR TOTAL": ("moeda", ["VALOR TOTAL","VALOR_TOTAL","VALORTOTAL"]),
+        "MEDIA CUSTO UNITARIO": ("moeda", ["MEDIA C. UNITARIO","MEDIA CUSTO UNITARIO","MEDIA CUSTO"]),
+        "LUCRO UNITARIO": ("moeda", ["LUCRO UNITARIO","LUCRO_UNITARIO"]),
+    },
+    "COMPRAS": {},
+}
+
+def resolver_colunas(df, nome):
+    colunas = [str(c) for c in df.columns]
+    mapa = {}
+    for alvo, (tipo, aliases) in ALIASES.get(nome, {}).items():
+        for a in aliases:
+            if a in colunas:
+                mapa[alvo] = {"origem": a, "tipo": tipo}
+                break
+    if nome == "ESTOQUE" and "PRODUTO" not in colunas:
+        for c in df.columns:
+            if df[c].dtype == object and str(c) not in mapa:
+                mapa["PRODUTO"] = {"origem": str(c), "tipo": "texto"}
+                break
+    if nome == "VENDAS":
+        qtd = [c for c in colunas if c.upper() in ("QTD","QUANTIDADE","QTY")]
+        if qtd: mapa["QTD"] = {"origem": qtd[0], "tipo": "inteiro"}
+    if nome == "COMPRAS":
+        q = [c for c in colunas if "QUANT" in c.upper()]
+        if q: mapa["QUANTIDADE"] = {"origem": q[0], "tipo": "inteiro"}
+        cu = [c for c in colunas if any(k in c.upper() for k in ("CUSTO","UNIT"))]
+        if cu: mapa["CUSTO UNITÁRIO"] = {"origem": cu[0], "tipo": "moeda"}
+    if nome in ("VENDAS", "COMPRAS") and "DATA" in colunas:
+        mapa["DATA"] = {"origem": "DATA", "tipo": "data"}
+    return mapa
+
+def resolver_esquema(df_raw, nome):
+    linha = linha_cabecalho(df_raw, nome)
+    if linha is None:
+        return None, None
+    limpo = limpar_aba_raw(df_raw, nome, linha)
+    cabecalho = [str(c).strip() for c in df_raw.iloc[linha].tolist()]
+    # posições das colunas que sobreviveram à limpeza (projeção da leitura rápida)
+    posicoes = [i for i, c in enumerate(cabecalho) if c in set(limpo.columns)]
+    esquema = {
+        "linha": int(linha),
+        "cabecalho": cabecalho,
+        "usecols": posicoes,
+        "colunas": resolver_colunas(limpo, nome),
+    }
+    return esquema, limpo
+
+def chave_esquema(origem, nome):
+    return f"{origem}::{nome}"
+
+def ler_esquemas():
+    try:
+        with open(ARQUIVO_ESQUEMA, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def gravar_esquemas(esquemas):
+    try:
+        os.makedirs(PASTA_CACHE, exist_ok=True)
+        tmp = ARQUIVO_ESQUEMA + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(esquemas, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, ARQUIVO_ESQUEMA)
+    except OSError:
+        pass
+
+def esquema_valido(xls, nome, esquema):
+    # checagem barata: lê só a linha do cabeçalho e compara com a guardada
+    try:
+        linha = pd.read_excel(xls, sheet_name=nome, header=None, skiprows=esquema["linha"], nrows=1)
+    except Exception:
+        return False
+    if linha.empty:
+        return False
+    atual = [str(c).strip() for c in linha.iloc[0].tolist()]
+    return atual == esquema["cabecalho"]
+
+def ler_aba_projetada(xls, nome, esquema):
+    # com os dtypes do esquema o parser não infere tipo coluna a coluna; coluna que mudou de tipo
+    # (texto onde era número, vazio num inteiro…) levanta ValueError e quem chama relê sem eles
+    df = pd.read_excel(xls, sheet_name=nome, header=esquema["linha"], usecols=esquema["usecols"],
+                       dtype=esquema.get("dtypes"))
+    # dtypes pelo rótulo lido (antes do strip), que é a chave que o read_excel usa
+    dtypes = {c: t.name for c, t in df.dtypes.items() if isinstance(c, str)}
+    df.columns = [str(c).strip() for c in df.columns]
+    df = df.loc[:, ~df.isna().all()]
+    return df.reset_index(drop=True), dtypes
+
+# =============================
+# Normalização (usa o mapa do esquema, sem varrer aliases)
+# =============================
+def aplicar_tipo(serie, tipo):
+    if tipo == "moeda": return parse_money_typed(serie)
+    if tipo == "inteiro": return parse_int_typed(serie)
+    if tipo == "data": return parse_data_typed(serie)
+    return serie
+
+def normalizar_estoque(df_e, mapa):
+    df_e = df_e.copy()
+    for alvo in ("Media C. UNITARIO", "Valor Venda Sugerido"):
+        if alvo in mapa and mapa[alvo]["origem"] in df_e.columns:
+            df_e[alvo] = aplicar_tipo(df_e[mapa[alvo]["origem"]], "moeda").fillna(0)
+    if "EM ESTOQUE" in mapa and mapa["EM ESTOQUE"]["origem"] in df_e.columns:
+        df_e["EM ESTOQUE"] = aplicar_tipo(df_e[mapa["EM ESTOQUE"]["origem"]], "inteiro").fillna(0).astype(int)
+    if "PRODUTO" not in df_e.columns and "PRODUTO" in mapa:
+        df_e = df_e.rename(columns={mapa["PRODUTO"]["origem"]: "PRODUTO"})
+    return df_e
+
+def normalizar_vendas(df_v, mapa):
+    df_v = df_v.copy()
+    df_v.columns = [str(c).strip() for c in df_v.columns]
+    for alvo, info in mapa.items():
+        if info["tipo"] == "moeda" and info["origem"] in df_v.columns:
+            df_v[alvo] = aplicar_tipo(df_v[info["origem"]], "moeda")
+    if "QTD" in mapa and mapa["QTD"]["origem"] in df_v.columns:
+        df_v["QTD"] = aplicar_tipo(df_v[mapa["QTD"]["origem"]], "inteiro").fillna(0).astype(int)
+    if "DATA" in df_v.columns:
+        df_v["DATA"] = aplicar_tipo(df_v["DATA"], "data")
+        df_v["MES_ANO"] = mes_ano(df_v["DATA"])
+    else:
+        df_v["MES_ANO"] = pd.NA
+    if "VALOR TOTAL" not in df_v and "VALOR VENDA" in df_v:
+        df_v["VALOR TOTAL"] = df_v["VALOR VENDA"].fillna(0)*df_v.get("QTD",0).fillna(0)
+    if "LUCRO UNITARIO" not in df_v and ("VALOR VENDA" in df_v and "MEDIA CUSTO UNITARIO" in df_v):
+        df_v["LUCRO UNITARIO"] = df_v["VALOR VENDA"].fillna(0)-df_v["MEDIA CUSTO UNITARIO"].fillna(0)
+    # garantir ordenação: mais recente primeiro
+    if "DATA" in df_v.columns:
+        df_v = df_v.sort_values("DATA", ascending=False).reset_index(drop=True)
+    return df_v
+
+def normalizar_compras(df_c, mapa):
+    df_c = df_c.copy()
+    if "QUANTIDADE" in mapa:
+        df_c["QUANTIDADE"] = aplicar_tipo(df_c[mapa["QUANTIDADE"]["origem"]], "inteiro").fillna(0).astype(int)
+    if "CUSTO UNITÁRIO" in mapa:
+        df_c["CUSTO UNITÁRIO"] = aplicar_tipo(df_c[mapa["CUSTO UNITÁRIO"]["origem"]], "moeda").fillna(0)
+    df_c["CUSTO TOTAL (RECALC)"] = df_c.get("QUANTIDADE",0)*df_c.get("CUSTO UNITÁRIO",0)
+    if "DATA" in df_c.columns:
+        df_c["DATA"] = aplicar_tipo(df_c["DATA"], "data")
+        df_c["MES_ANO"] = mes_ano(df_c["DATA"])
+    return df_c
+
+NORMALIZADORES = {"ESTOQUE": normalizar_estoque, "VENDAS": normalizar_vendas, "COMPRAS": normalizar_compras}
+
+# =============================
+# CSV ";" em fluxo (exportação do PDV, pode ter vários GB)
+# =============================
+def detectar_codificacao(caminho, amostra=65536):
+    with open(caminho, "rb") as f:
+        bruto = f.read(amostra)
+    if bruto.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig"
+    try:
+        bruto.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # corte no meio de um caractere multibyte no fim da amostra não conta
+        return "utf-8" if e.start >= len(bruto) - 3 else "latin-1"
+
+def ler_csv_blocos(caminho, nome, tamanho=TAMANHO_BLOCO_CSV):
+    base = dict(sep=";", header=None, encoding=detectar_codificacao(caminho), engine="c", skip_blank_lines=False)
+    # cabeçalho/colunas detectados uma vez, numa amostra do começo do arquivo
+    amostra = pd.read_csv(caminho, nrows=LINHAS_AMOSTRA_CSV, dtype=str, **base)
+    esquema, _ = resolver_esquema(amostra, nome)
+    if esquema is None:
+        return None, iter(())
+    nomes = [esquema["cabecalho"][i] for i in esquema["usecols"]]
+    tipos = {info["origem"]: info["tipo"] for info in esquema["colunas"].values()}
+    # moeda/data/produto chegam como texto; o resto o parser C converte (decimal "," e milhar ".")
+    texto = {i for i, c in zip(esquema["usecols"], nomes) if tipos.get(c) in ("moeda", "data") or c == "PRODUTO"}
+    leitor = pd.read_csv(
+        caminho, skiprows=esquema["linha"] + 1, usecols=esquema["usecols"],
+        dtype={i: str for i in texto}, decimal=",", thousands=".", chunksize=tamanho, **base,
+    )
+
+    def blocos():
+        with leitor:
+            for parte in leitor:
+                parte.columns = nomes
+                parte = parte.dropna(how="all")   # linhas ";;;;" do fim da exportação
+                if parte.empty:
+                    continue
+                # contagens que viraram float só por causa das linhas vazias voltam a inteiro
+                for c in parte.columns:
+                    if c not in tipos and parte[c].dtype == "float64" and parte[c].notna().all() and (parte[c] % 1 == 0).all():
+                        parte[c] = parte[c].astype("int64")
+                for c, tipo in tipos.items():
+                    if c in parte.columns and tipo == "moeda":
+                        parte[c] = parse_money_texto(parte[c])
+                    elif c in parte.columns and tipo == "data":
+                        parte[c] = parse_data_texto(parte[c])
+                yield NORMALIZADORES[nome](parte.reset_index(drop=True), esquema["colunas"])
+    return esquema, blocos()
+
+def carregar_csv(caminho, nome, tamanho=TAMANHO_BLOCO_CSV):
+    esquema, partes = ler_csv_blocos(caminho, nome, tamanho)
+    if esquema is None:
+        return None
+    partes = list(partes)
+    if not partes:
+        return NORMALIZADORES[nome](pd.DataFrame(columns=[esquema["cabecalho"][i] for i in esquema["usecols"]]), esquema["colunas"])
+    df = pd.concat(partes, ignore_index=True)
+    if nome == "VENDAS" and "DATA" in df.columns:
+        # cada bloco veio ordenado; a ordem final (mais recente primeiro) é global
+        df = df.sort_values("DATA", ascending=False, kind="stable").reset_index(drop=True)
+    return df
+
+def fontes_csv():
+    # LOJA_CSV_ESTOQUE / LOJA_CSV_VENDAS / LOJA_CSV_COMPRAS apontam para exportações ";" do PDV
+    return {aba: os.environ[f"LOJA_CSV_{aba}"] for aba in ABAS if os.environ.get(f"LOJA_CSV_{aba}")}
+
+# =============================
+# Carga completa
+# =============================
+def ler_aba(xls, aba, esquema):
+    # uma aba inteira: esquema (em cache ou detectado), leitura projetada e tipos
+    # devolve (esquema novo ou None, frame tipado ou None)
+    novo = None
+    if esquema is None or not esquema_valido(xls, aba, esquema):
+        raw = pd.read_excel(xls, sheet_name=aba, header=None)
+        esquema, _ = resolver_esquema(raw, aba)
+        if esquema is None:
+            return None, None
+        novo = esquema
+    try:
+        # relê projetado mesmo logo após detectar: mesmos dtypes da leitura rápida (hash estável entre cargas)
+        limpo, dtypes = ler_aba_projetada(xls, aba, esquema)
+    except ValueError:
+        esquema = {k: v for k, v in esquema.items() if k != "dtypes"}
+        limpo, dtypes = ler_aba_projetada(xls, aba, esquema)
+    if esquema.get("dtypes") != dtypes:
+        novo = {**esquema, "dtypes": dtypes}
+    return novo, NORMALIZADORES[aba](limpo, esquema["colunas"])
+
+# ---------- processos ----------
+_pool = None
+_pool_lock = threading.Lock()
+
+def pool_processos():
+    # spawn: o servidor do Streamlit tem threads, fork herdaria locks no meio do uso
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PROCESSOS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def descartar_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def para_arrow(df):
+    # frame tipado -> Arrow IPC: volta como buffer colunar em vez de pickle coluna a coluna
+    # sem pyarrow (ou com coluna object mista) vai o próprio frame
+    if df is None:
+        return None
+    try:
+        import pyarrow as pa
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+    except Exception:
+        return df
+    saida = pa.BufferOutputStream()
+    with pa.ipc.new_stream(saida, tabela.schema) as w:
+        w.write_table(tabela)
+    return saida.getvalue()
+
+def de_arrow(dado):
+    if dado is None or isinstance(dado, pd.DataFrame):
+        return dado
+    import pyarrow as pa
+    df = pa.ipc.open_stream(dado).read_all().to_pandas()
+    # nulo do Arrow volta como None em coluna texto; a leitura direta do xlsx dá NaN
+    for c in df.columns[df.dtypes == object]:
+        if df[c].isna().any():
+            df[c] = df[c].where(df[c].notna(), np.nan)
+    return df
+
+def _ler_aba_processo(conteudo, aba, esquema):
+    # roda no processo filho, com a própria cópia dos bytes baixados
+    esquema, df = ler_aba(pd.ExcelFile(BytesIO(conteudo)), aba, esquema)
+    return esquema, para_arrow(df)
+
+def conteudo_xlsx(xls):
+    if isinstance(xls.io, BytesIO):
+        return xls.io.getvalue()
+    if isinstance(xls.io, (str, os.PathLike)) and os.path.isfile(xls.io):
+        with open(xls.io, "rb") as f:
+            return f.read()
+    return None
+
+def ler_abas_paralelo(conteudo, abas, esquemas):
+    try:
+        pool = pool_processos()
+        # VENDAS (a maior) sai primeiro: é ela que dita o tempo total (piso da carga, com qualquer nº de núcleos)
+        futuros = {aba: pool.submit(_ler_aba_processo, conteudo, aba, esquemas[aba])
+                   for aba in sorted(abas, key=lambda a: a != "VENDAS")}
+        resultados = {}
+        for aba, futuro in futuros.items():
+            esquema, dado = futuro.result()
+            resultados[aba] = (esquema, de_arrow(dado))
+        return resultados
+    except BrokenProcessPool:
+        # processo morto (OOM etc.): pool novo na próxima carga, esta segue no serial
+        descartar_pool()
+        return None
+
+def carregar_abas(xls, origem, abas=ABAS, processos=None):
+    esquemas = ler_esquemas()
+    presentes = [aba for aba in abas if aba in xls.sheet_names]
+    guardados = {aba: esquemas.get(chave_esquema(origem, aba)) for aba in presentes}
+    processos = PROCESSOS if processos is None else processos
+    resultados = None
+    if processos > 1 and len(presentes) > 1:
+        conteudo = conteudo_xlsx(xls)
+        if conteudo is not None and len(conteudo) >= LIMIAR_PARALELO:
+            resultados = ler_abas_paralelo(conteudo, presentes, guardados)
+    if resultados is None:
+        resultados = {aba: ler_aba(xls, aba, guardados[aba]) for aba in presentes}
+    mudou = False
+    dfs = {}
+    for aba in presentes:
+        esquema, df = resultados[aba]
+        if esquema is not None:
+            esquemas[chave_esquema(origem, aba)] = esquema
+            mudou = True
+        if df is not None:
+            dfs[aba] = df
+    if mudou:
+        gravar_esquemas(esquemas)
+    return dfs
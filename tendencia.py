@@ -0,0 +1,115 @@
+# tendencia.py — Série diária de vendas + redução LTTB (Largest-Triangle-Three-Buckets)
+import numpy as np
+import pandas as pd
+
+
+# =============================
+# Série diária (dias sem venda = zero)
+# =============================
+def completar_dias(diario):
+    # dias sem venda entram com zero (senão a linha "pula" os buracos)
+    if diario is None or diario.empty:
+        return pd.DataFrame(columns=["DATA", "VALOR TOTAL", "QTD"])
+    diario = diario.set_index("DATA")
+    todos_dias = pd.date_range(diario.index.min(), diario.index.max(), freq="D")
+    diario = diario.reindex(todos_dias, fill_value=0)
+    diario.index.name = "DATA"
+    return diario.reset_index()
+
+
+# =============================
+# LTTB — mantém picos e vales com N pontos
+# =============================
+def lttb(x, y, alvo):
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    n = len(x)
+    if alvo >= n or alvo < 3:
+        return np.arange(n)
+
+    idx = np.empty(alvo, dtype=np.int64)
+    idx[0] = 0
+    idx[-1] = n - 1
+
+    # bordas dos baldes internos (primeiro e último ponto ficam fixos)
+    passo = (n - 2) / (alvo - 2)
+    bordas = (np.arange(alvo - 1) * passo).astype(np.int64) + 1
+    bordas[-1] = n - 1
+
+    a = 0
+    for i in range(alvo - 2):
+        ini, fim = bordas[i], bordas[i + 1]
+        # média do próximo balde (o último balde é o ponto final)
+        if i + 2 < len(bordas):
+            prox_ini, prox_fim = bordas[i + 1], bordas[i + 2]
+        else:
+            prox_ini, prox_fim = n - 1, n
+        mx = x[prox_ini:prox_fim].mean()
+        my = y[prox_ini:prox_fim].mean()
+
+        area = np.abs((x[a] - mx) * (y[ini:fim] - y[a]) - (x[a] - x[ini:fim]) * (my - y[a]))
+        a = ini + int(area.argmax())
+        idx[i + 1] = a
+    return idx
+
+
+# o servidor não sabe a largura real do gráfico: vale a coluna cheia do layout "wide" numa tela de 1440 px
+# (1440 - ~160 px de margem). Tela menor recebe pontos a mais (o plotly sobrepõe, só custa bytes);
+# tela maior perde detalhe só abaixo de 2 px por ponto.
+LARGURA_GRAFICO = 1280
+
+def pontos_para_largura(largura_px=LARGURA_GRAFICO, px_por_ponto=2, minimo=60, maximo=1500):
+    return int(max(minimo, min(maximo, int(largura_px) // px_por_ponto)))
+
+
+def reduzir_serie(diario, coluna, alvo):
+    if diario is None or diario.empty or len(diario) <= alvo:
+        return diario
+    x = diario["DATA"].to_numpy(dtype="datetime64[ns]").astype("int64")
+    idx = lttb(x, diario[coluna].to_numpy(), alvo)
+    return diario.iloc[idx].reset_index(drop=True)
+
+
+# =============================
+# Sparkline e calendário de atividade (SVG inline: nada de plotly por card)
+# =============================
+DIAS_SPARKLINE = 30
+SEMANAS_CALENDARIO = 26
+CORES_CALENDARIO = ("#1c1c28", "#3b2f63", "#5b45a0", "#8b5cf6", "#c4b5fd")   # sem venda -> muita venda
+
+def sparkline_svg(valores, largura=140, altura=28, cor="#a78bfa"):
+    # série diária (unidades) -> linha + área; escala pelo maior dia do próprio produto
+    v = np.asarray(valores, dtype="float64")
+    n = len(v)
+    if n < 2:
+        return ""
+    topo = v.max()
+    x = 1 + np.arange(n) * ((largura - 2) / (n - 1))
+    y = (altura - 2) - (v / topo * (altura - 4) if topo > 0 else v)
+    pontos = " ".join(f"{a:.1f},{b:.1f}" for a, b in zip(x, y))
+    area = f"1,{altura - 2} {pontos} {x[-1]:.1f},{altura - 2}"
+    return (f"<svg class='sparkline' width='{largura}' height='{altura}' viewBox='0 0 {largura} {altura}'>"
+            f"<polygon points='{area}' fill='{cor}' fill-opacity='0.18'/>"
+            f"<polyline points='{pontos}' fill='none' stroke='{cor}' stroke-width='1.5' stroke-linejoin='round'/></svg>")
+
+def calendario_svg(valores, ultimo_dia, lado=12, vao=3):
+    # um quadrado por dia (colunas = semanas, linhas = seg..dom), cor pelo quartil dos dias com venda
+    v = np.asarray(valores, dtype="float64")
+    ultimo_dia = pd.Timestamp(ultimo_dia).normalize()
+    dias = pd.date_range(end=ultimo_dia, periods=len(v), freq="D")
+    if not len(v):
+        return ""
+    recuo = dias[0].weekday()   # primeira coluna começa na segunda-feira
+    posicao = recuo + np.arange(len(v))
+    colunas, linhas = posicao // 7, posicao % 7
+    com_venda = v[v > 0]
+    cortes = np.quantile(com_venda, [0.25, 0.5, 0.75]) if len(com_venda) else np.zeros(3)
+    nivel = np.where(v > 0, 1 + np.searchsorted(cortes, v, side="left").clip(0, 3), 0)
+    passo = lado + vao
+    largura, altura = int(colunas[-1] + 1) * passo, 7 * passo
+    celulas = "".join(
+        f"<rect x='{c * passo}' y='{l * passo}' width='{lado}' height='{lado}' rx='2' fill='{CORES_CALENDARIO[n]}'>"
+        f"<title>{d:%d/%m/%Y}: {q:g}</title></rect>"
+        for c, l, n, d, q in zip(colunas, linhas, nivel, dias, v)
+    )
+    return f"<svg class='calendario' width='{largura}' height='{altura}' viewBox='0 0 {largura} {altura}'>{celulas}</svg>"
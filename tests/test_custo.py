@@ -0,0 +1,71 @@
+# tests/test_custo.py — FIFO vetorizado contra a fila de camadas linha a linha (compras depois da venda não valem)
+import os
+import sys
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from custo import custear_vendas, custo_fifo  # noqa: E402
+
+
+def fifo_ingenuo(vendas, compras, reserva):
+    # abas do mais recente para o mais antigo: percorre ao contrário; compra do mesmo dia entra antes da venda
+    out = np.full(len(vendas), np.nan)
+    eventos = [(d, 0, -k, "c", k) for k, d in enumerate(compras["DATA"])]
+    eventos += [(d, 1, -k, "v", k) for k, d in enumerate(vendas["DATA"])]
+    filas = {p: deque() for p in compras["PRODUTO"]}
+    for _, _, _, tipo, k in sorted(eventos):
+        if tipo == "c":
+            linha = compras.iloc[k]
+            filas[linha["PRODUTO"]].append([float(linha["QUANTIDADE"]), float(linha["CUSTO UNITÁRIO"])])
+            continue
+        linha = vendas.iloc[k]
+        fila = filas.get(linha["PRODUTO"])
+        if fila is None:
+            continue   # produto nunca comprado: fica para a reserva do chamador
+        falta, custo = float(linha["QTD"]), 0.0
+        while falta > 0 and fila:
+            camada = fila[0]
+            usado = min(falta, camada[0])
+            custo += usado * camada[1]
+            camada[0] -= usado
+            falta -= usado
+            if camada[0] <= 0:
+                fila.popleft()
+        out[k] = (custo + falta * reserva[k]) / float(linha["QTD"])
+    return out
+
+
+def test_compra_depois_da_venda_nao_conta():
+    compras = pd.DataFrame({"PRODUTO": ["A", "A"], "DATA": pd.to_datetime(["2025-03-01", "2025-01-10"]),
+                            "QUANTIDADE": [10, 10], "CUSTO UNITÁRIO": [30.0, 10.0]})
+    vendas = pd.DataFrame({"PRODUTO": ["A", "A", "A"], "DATA": pd.to_datetime(["2025-03-01", "2025-02-01", "2025-01-01"]),
+                           "QTD": [5, 10, 1], "MEDIA CUSTO UNITARIO": [7.0, 7.0, 7.0]})
+    custo = custo_fifo(vendas, compras, reserva=np.full(3, 7.0))
+    # 01/01: nada comprado ainda -> reserva; 02/01: só a camada de 10; 01/03: camada de 30
+    assert np.allclose(custo, [30.0, 10.0, 7.0])
+    assert np.allclose(custear_vendas(vendas, compras)["CUSTO FIFO"], [30.0, 10.0, 7.0])
+
+
+def test_fifo_igual_a_fila_linha_a_linha():
+    rnd = np.random.default_rng(7)
+    dias = pd.date_range("2025-01-01", periods=60)
+    n_c, n_v = 80, 300
+    compras = pd.DataFrame({
+        "PRODUTO": rnd.choice(["A", "B", "C", "D"], n_c),
+        "DATA": rnd.choice(dias, n_c),
+        "QUANTIDADE": rnd.integers(1, 15, n_c).astype(float),
+        "CUSTO UNITÁRIO": rnd.integers(5, 50, n_c).astype(float),
+    }).sort_values("DATA", ascending=False, kind="stable").reset_index(drop=True)
+    vendas = pd.DataFrame({
+        "PRODUTO": rnd.choice(["A", "B", "C", "D", "E"], n_v),
+        "DATA": rnd.choice(dias, n_v),
+        "QTD": rnd.integers(1, 6, n_v),
+    }).sort_values("DATA", ascending=False, kind="stable").reset_index(drop=True)
+    reserva = rnd.integers(1, 9, n_v).astype(float)
+    esperado = fifo_ingenuo(vendas, compras, reserva)
+    obtido = custo_fifo(vendas, compras, reserva)
+    assert np.allclose(obtido, esperado, equal_nan=True)
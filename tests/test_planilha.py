@@ -0,0 +1,32 @@
+# tests/test_planilha.py — DATA numérica/mista: serial do Excel converte, fora da faixa vira NaT (sem derrubar a carga)
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planilha import SERIAL_MAXIMO, parse_data_typed  # noqa: E402
+
+
+def test_data_numerica_fora_da_faixa_vira_nat():
+    serie = pd.Series([45658, 45658.5, 20250102, 1e9, -5, 0, np.nan, SERIAL_MAXIMO - 1, SERIAL_MAXIMO, 2958465])
+    d = parse_data_typed(serie)
+    assert d.dtype == "datetime64[ns]"
+    assert d.iloc[0] == pd.Timestamp("2025-01-01")
+    assert d.iloc[1] == pd.Timestamp("2025-01-01 12:00")
+    assert d.iloc[2:7].isna().all()
+    assert d.iloc[8:].isna().all()
+    assert d.iloc[7] == pd.Timestamp("2262-04-10")
+
+
+def test_data_mista_object():
+    serie = pd.Series(["02/01/2025", 45658, 20250102, 1e9, datetime(2025, 3, 4), None, "lixo"], dtype=object)
+    d = parse_data_typed(serie)
+    assert d.iloc[0] == pd.Timestamp("2025-01-02")
+    assert d.iloc[1] == pd.Timestamp("2025-01-01")
+    assert d.iloc[2:4].isna().all()
+    assert d.iloc[4] == pd.Timestamp("2025-03-04")
+    assert d.iloc[5:].isna().all()
@@ -0,0 +1,147 @@
+# vitrine.py — PESQUISAR no navegador: catálogo compacto (JSON colunar) enviado uma vez por versão dos dados;
+# busca, filtros, ordenação e rolagem virtual rodam no componente (vitrine.html, em st.iframe), sem rerun do script
+#
+# O JSON vai para static/vitrine/<sha1>.json (servido pelo Streamlit em app/static/): o navegador baixa
+# uma vez e reaproveita do cache até os dados mudarem. Sem static serving, vai embutido no HTML.
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from alertas import FAIXA_OK, REGRAS
+from busca import CHAVES_ORDENACAO, ESTOQUE_ALTO, ESTOQUE_BAIXO, ORDENACOES
+from tendencia import DIAS_SPARKLINE
+
+AQUI = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_HTML = os.path.join(AQUI, "vitrine.html")
+ARQUIVO_ESTILO = os.path.join(AQUI, "estilo.css")   # mesmos cards/badges do PESQUISAR do servidor
+PASTA_VITRINE = os.path.join(AQUI, "static", "vitrine")
+URL_VITRINE = "app/static/vitrine"
+MANTER = 8   # JSONs de versões anteriores guardados (abas antigas ainda abertas)
+ALTURA = 760
+# LOJA_VITRINE=0: PESQUISAR começa no modo servidor (paginação + rerun por clique)
+VITRINE_PADRAO = os.environ.get("LOJA_VITRINE", "1") != "0"
+
+# coluna do catálogo -> chave curta no JSON (as ordenações de busca.py usam estas colunas)
+CURTAS = {"PRODUTO": "n", "EM ESTOQUE": "e", "Valor Venda Sugerido": "p", "Media C. UNITARIO": "c",
+          "TOTAL_QTD": "v", "ULT_COMPRA": "u"}
+# badges extras (fora das regras): destaques do armazém
+BADGE_ENCALHADO = ("zero", "🐌 Encalhado")
+BADGE_CAMPEAO = ("hot", "🥇 Campeão")
+
+
+# =============================
+# Catálogo compacto (colunas, não registros)
+# =============================
+def inteiros(serie):
+    return pd.to_numeric(serie, errors="coerce").fillna(0).round().astype("int64").tolist()
+
+def decimais(serie, casas=2):
+    v = pd.to_numeric(serie, errors="coerce").round(casas)
+    return v.astype(object).where(v.notna(), None).tolist()
+
+def montar_dados(catalogo, giro, ultima_compra, mascaras, top5=(), encalhados=(), fotos=None, sparklines=None):
+    t = catalogo.reset_index(drop=True)
+    n = len(t)
+    nomes = t["PRODUTO"].astype(str) if "PRODUTO" in t.columns else pd.Series([""] * n)
+    ult = nomes.map(ultima_compra.drop_duplicates("PRODUTO").set_index("PRODUTO")["ULT_COMPRA"]) if not ultima_compra.empty else pd.Series([pd.NaT] * n)
+    g = giro.drop_duplicates("PRODUTO").set_index("PRODUTO") if giro is not None and not giro.empty else pd.DataFrame()
+
+    def do_giro(coluna):
+        return nomes.map(g[coluna]) if coluna in g.columns else pd.Series(np.nan, index=t.index)
+
+    estoque = pd.to_numeric(t.get("EM ESTOQUE", 0), errors="coerce").fillna(0)
+    # mesmos enfeites dos cards do servidor: bits = badges das regras + encalhado/campeão
+    regras_badge = [rg for rg in REGRAS if "badge" in rg]
+    regras_faixa = [rg for rg in REGRAS if "faixa" in rg]
+    badges = [rg["badge"] for rg in regras_badge] + [BADGE_ENCALHADO, BADGE_CAMPEAO]
+    bits = np.zeros(n, dtype=np.int64)
+    for k, rg in enumerate(regras_badge):
+        bits |= mascaras[rg["id"]].to_numpy(dtype=bool).astype(np.int64) << k
+    enc = nomes.isin(set(encalhados)).to_numpy()
+    top = nomes.isin(set(top5)).to_numpy()
+    bits |= enc.astype(np.int64) << len(regras_badge)
+    bits |= top.astype(np.int64) << (len(regras_badge) + 1)
+    # borda: 1 = encalhado (vermelha), 2 = campeão (verde)
+    borda = np.where(enc, 1, np.where(top, 2, 0))
+    # faixa "dias sem vender": primeira regra que disparou, senão a faixa ok; -1 = não mostra
+    dias = do_giro("DIAS_SEM_VENDER")
+    faixa = np.full(n, len(regras_faixa), dtype=np.int64)
+    for k in reversed(range(len(regras_faixa))):
+        faixa[mascaras[regras_faixa[k]["id"]].to_numpy(dtype=bool)] = k
+    faixa[(dias.isna() | (estoque <= 0)).to_numpy()] = -1
+    vel = do_giro("VEL_DIA")
+    repor = do_giro("REPOR")
+
+    fotos = fotos or {}
+    # sparkline: unidades/dia dos últimos DIAS_SPARKLINE dias (linhas do catálogo); null = sem venda no período
+    if sparklines is None:
+        sparklines = np.zeros((n, 0))
+    serie = [linha.astype(np.int64).tolist() if linha.any() else None for linha in np.rint(sparklines)]
+    return {
+        "n": nomes.tolist(),
+        "e": inteiros(estoque),
+        "p": decimais(t.get("Valor Venda Sugerido", 0)),
+        "c": decimais(t.get("Media C. UNITARIO", 0)),
+        "v": inteiros(t.get("TOTAL_QTD", 0)),
+        "u": ult.dt.strftime("%Y-%m-%d").astype(object).where(ult.notna(), None).tolist(),
+        "b": bits.tolist(),
+        "x": borda.tolist(),
+        "f": faixa.tolist(),
+        "d": inteiros(dias),
+        "g": decimais(vel.where(vel > 0)),
+        "k": decimais(do_giro("COBERTURA_DIAS").where(vel > 0), 0),
+        "r": (repor.astype("float64").fillna(0) > 0).astype(int).tolist(),
+        "i": [fotos.get(nome) for nome in nomes],
+        "s": serie,
+        "config": {
+            "badges": badges,
+            "faixas": [rg["faixa"] for rg in regras_faixa] + [FAIXA_OK],
+            "ordens": {rotulo: [CURTAS.get(coluna), crescente] for rotulo, (coluna, crescente) in CHAVES_ORDENACAO.items()},
+            "ordenacoes": ORDENACOES,
+            "baixo": ESTOQUE_BAIXO,
+            "alto": ESTOQUE_ALTO,
+            "dias_spark": DIAS_SPARKLINE,
+        },
+    }
+
+
+# =============================
+# Publicação (arquivo por conteúdo) + HTML do componente
+# =============================
+def publicar(dados):
+    # devolve a URL do JSON; nome = hash do conteúdo, então o navegador pode guardar para sempre
+    corpo = json.dumps(dados, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    nome = hashlib.sha1(corpo).hexdigest()[:20] + ".json"
+    destino = os.path.join(PASTA_VITRINE, nome)
+    if not os.path.exists(destino):
+        os.makedirs(PASTA_VITRINE, exist_ok=True)
+        tmp = f"{destino}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(corpo)
+        os.replace(tmp, destino)
+        antigos = sorted((e for e in os.scandir(PASTA_VITRINE) if e.name.endswith(".json")),
+                         key=lambda e: e.stat().st_mtime, reverse=True)
+        for e in antigos[MANTER:]:
+            try:
+                os.remove(e.path)
+            except OSError:
+                pass
+    return f"{URL_VITRINE}/{nome}"
+
+_modelo = None
+
+def html_vitrine(dados, embutida=False, altura=ALTURA):
+    global _modelo
+    if _modelo is None:
+        with open(ARQUIVO_HTML, encoding="utf-8") as f, open(ARQUIVO_ESTILO, encoding="utf-8") as css:
+            _modelo = f.read().replace("__ESTILO__", css.read())
+    if embutida:
+        fonte = {"dados": dados}
+    else:
+        fonte = {"url": publicar(dados)}
+    # "</" escapado: o JSON entra num <script>
+    fonte = json.dumps(fonte, ensure_ascii=False).replace("</", "<\\/")
+    return _modelo.replace("__ALTURA__", str(altura)).replace("__FONTE__", fonte)
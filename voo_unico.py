@@ -0,0 +1,49 @@
+# voo_unico.py — Coalescência de cargas concorrentes (single-flight): um cálculo por chave, resultado compartilhado
+import threading
+
+
+class Voo:
+    def __init__(self):
+        self.pronto = threading.Event()
+        self.resultado = None
+        self.erro = None
+        self.esperando = 0
+
+
+class VooUnico:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.em_voo = {}         # chave -> Voo em andamento
+        self.execucoes = 0       # quantas vezes a função rodou de fato
+        self.compartilhadas = 0  # chamadas que só esperaram o voo de outra sessão
+
+    def fazer(self, chave, func):
+        # devolve (resultado, compartilhado); quem chega durante o voo espera e recebe o mesmo objeto
+        with self._lock:
+            voo = self.em_voo.get(chave)
+            dono = voo is None
+            if dono:
+                voo = Voo()
+                self.em_voo[chave] = voo
+                self.execucoes += 1
+            else:
+                voo.esperando += 1
+                self.compartilhadas += 1
+
+        if not dono:
+            voo.pronto.wait()
+            if voo.erro is not None:
+                raise voo.erro
+            return voo.resultado, True
+
+        try:
+            voo.resultado = func()
+        except BaseException as e:
+            voo.erro = e
+            raise
+        finally:
+            # sai do mapa antes de liberar: quem chegar depois (ex.: novo 🔄) abre outro voo
+            with self._lock:
+                self.em_voo.pop(chave, None)
+            voo.pronto.set()
+        return voo.resultado, False